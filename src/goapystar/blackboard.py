@@ -0,0 +1,153 @@
+"""Blackboard (projected planner state) storage.
+
+Each candidate Action in a search produces its own forecasted state, and most of them
+get thrown away. Copying the whole parent state for each of them is wasteful, as an Action's
+Effects typically only touch a handful of keys - so instead, each derived blackboard is a thin
+layer recording just the keys that changed, on top of its (shared, read-only) parent.
+
+Lookups walk down the layers until they find the key; to keep that cheap, the chain gets
+flattened back into a single layer every MAX_OVERLAY_DEPTH derivations.
+
+Each blackboard also keeps its statehash() up to date as it's written to, so hashing
+a derived state costs O(keys changed) rather than O(all keys).
+"""
+import typing
+from collections.abc import Mapping, MutableMapping
+
+from .state import item_hash
+
+MAX_OVERLAY_DEPTH = 8
+
+# Marks keys deleted in a layer while still present in one of its parents.
+_DELETED = object()
+
+
+class OverlayBlackboard(MutableMapping):
+    """A copy-on-write dict-like state.
+
+    Writes only ever go into the topmost layer, so deriving a child from a blackboard is O(1)
+    and modifying the child never affects its parent. The reverse does NOT hold - modifying
+    a blackboard after children were derived from it will leak into them, so don't.
+    """
+    __slots__ = ("_parent", "_layer", "_depth", "_hash")
+
+    def __init__(
+        self,
+        initial: typing.Optional[typing.Union[Mapping, typing.Iterable[typing.Tuple[typing.Any, typing.Any]]]] = None,
+        parent: typing.Optional["OverlayBlackboard"] = None,
+    ):
+        self._parent = parent
+        self._depth = 0 if parent is None else parent._depth + 1
+        self._hash = 0 if parent is None else parent._hash
+
+        if self._depth > MAX_OVERLAY_DEPTH:
+            # Squash the chain, so lookups don't degrade into a linear walk over the whole plan.
+            self._layer = parent.to_dict()
+            self._parent = None
+            self._depth = 0
+
+        else:
+            self._layer = {}
+
+        if initial:
+            items = initial.items() if isinstance(initial, Mapping) else initial
+            for (key, value) in items:
+                self[key] = value
+
+    def derive(self) -> "OverlayBlackboard":
+        """Creates a new, empty layer on top of this blackboard."""
+        return self.__class__(parent=self)
+
+    def get(self, key, default=None):
+        node = self
+
+        while node is not None:
+            layer = node._layer
+
+            if key in layer:
+                value = layer[key]
+                return default if value is _DELETED else value
+
+            node = node._parent
+
+        return default
+
+    def __getitem__(self, key):
+        value = self.get(key, _DELETED)
+
+        if value is _DELETED:
+            raise KeyError(key)
+
+        return value
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _DELETED) is not _DELETED
+
+    def __setitem__(self, key, value):
+        old_value = self.get(key, _DELETED)
+
+        if old_value is not _DELETED:
+            self._hash ^= item_hash(key, old_value)
+
+        self._hash ^= item_hash(key, value)
+        self._layer[key] = value
+
+    def __delitem__(self, key):
+        old_value = self.get(key, _DELETED)
+
+        if old_value is _DELETED:
+            raise KeyError(key)
+
+        self._hash ^= item_hash(key, old_value)
+
+        if self._parent is None:
+            del self._layer[key]
+        else:
+            self._layer[key] = _DELETED
+
+    def as_hash(self) -> int:
+        return self._hash
+
+    def to_dict(self) -> dict:
+        """Materializes the full state as a plain dict."""
+        layers = []
+        node = self
+
+        while node is not None:
+            layers.append(node._layer)
+            node = node._parent
+
+        merged = {}
+        for layer in reversed(layers):
+            merged.update(layer)
+
+        return {k: v for (k, v) in merged.items() if v is not _DELETED}
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def items(self):
+        return self.to_dict().items()
+
+    def values(self):
+        return self.to_dict().values()
+
+    def __iter__(self):
+        return iter(self.to_dict())
+
+    def __len__(self) -> int:
+        return len(self.to_dict())
+
+    def copy(self) -> "OverlayBlackboard":
+        return self.__class__(self.to_dict())
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_dict()!r})"
+
+
+def overlay_on(base: typing.Optional[Mapping]) -> OverlayBlackboard:
+    """Returns a fresh writable layer on top of base, whatever kind of Mapping it is."""
+    if isinstance(base, OverlayBlackboard):
+        return base.derive()
+
+    return OverlayBlackboard(base)
@@ -0,0 +1,250 @@
+"""Goal Oriented Action Planning algorithm.
+
+This is the beam-stack variant (Zhou & Hansen's beam-stack search).
+
+A bounded open list (max_queue_size) makes the other planners a beam search: once the queue is full,
+the worst candidates are evicted, and they're gone for good - if the way to the goal went through one
+of them, the search fails, or settles for a worse plan.
+
+Beam-stack search also keeps a bounded beam, one layer (plan step) at a time: each layer holds at most
+beam_width of the best (by f = g + h) successors of the layer above it. What it does differently is
+remember *where* it cut each layer off - the range of f-values (the 'beam stack' item) the layer
+was built from. Once a dive runs out of candidates, it backtracks to the deepest layer that had
+something cut off, rebuilds it from the next range up (starting where the last one ended), and dives again.
+
+Every plan found becomes the upper bound for the rest of the search, so anything that can't beat it
+is never kept in the first place. When the beam stack runs out, every range of every layer has been
+tried, so the best plan found is optimal (given an admissible goal_measure), and if none was found,
+there's none. In the meantime, memory stays bounded by beam_width * depth.
+
+To tell candidates with the same f apart, ranges go over (f, h, tiebreak) triples rather than f alone,
+so a layer with more ties than fit in the beam still gets split up into ranges that make progress.
+The tiebreak is a checksum of the state's contents. Unlike the state hash, it doesn't depend on PYTHONHASHSEED,
+so ties get broken (and the plans found on the way turn up) the same way from run to run. It is not
+the order the candidates were generated in on purpose: with nothing else to go on (e.g. no goal_measure),
+that always favours the same Actions, and in a map where those can be repeated forever, so can the first dive.
+"""
+import typing
+import zlib
+
+from .common import (
+    NoPathError,
+    EmptyQueueError,
+    PLUS_INF,
+    SearchBudget,
+    evaluate_neighbor_astar,
+    new_root_node,
+    notify_search_start,
+    suppress_not_found,
+)
+from .nodes import SearchNode
+from ..measures import equality_check, no_goal_heuristic, zero_heuristic
+from ..state import State, STATE_TYPES, statehash
+from ..types import StateLike, ActionTuple, ActionKey, IntoState, BlackboardBinOp
+
+# A total order over the candidates of a layer: (f, h, tiebreak).
+RangeKey = typing.Tuple[float, float, int]
+UNBOUNDED: RangeKey = (PLUS_INF, PLUS_INF, 0)
+
+
+class BeamLayer:
+    """One layer of the beam - the nodes kept, and the range of candidates they were picked from."""
+    __slots__ = ("nodes", "costs", "range_min", "range_max")
+
+    def __init__(self, range_min: typing.Optional[RangeKey] = None):
+        self.nodes: typing.List[SearchNode] = []
+        # The best cost of each state in the layer, for duplicate detection.
+        self.costs: typing.Dict[int, float] = {}
+        # The candidates considered for this layer were those with range_min <= key < range_max;
+        # range_max gets lowered to where the beam cut them off, if it had to.
+        self.range_min = range_min
+        self.range_max = UNBOUNDED
+
+
+def _tiebreak(state: StateLike) -> int:
+    return zlib.crc32(repr(sorted(state.items(), key=repr)).encode("utf-8"))
+
+
+def find_plan(
+    start_pos: IntoState,
+    goal: IntoState,
+    adjacency_gen: typing.Callable[[StateLike], typing.Iterable[ActionTuple]],
+    preconditions_check: typing.Callable[[StateLike], bool],
+    handle_backtrack_node: typing.Optional[typing.Callable[[ActionTuple], typing.Any]] = None,
+    neighbor_measure: typing.Optional[typing.Callable[[StateLike], bool]] = None,
+    goal_measure: typing.Optional[typing.Callable[[IntoState], float]] = None,
+    goal_check: typing.Optional[typing.Callable[[StateLike], bool]] = None,
+    get_effects: typing.Optional[typing.Callable[[StateLike], float]] = None,
+    beam_width: int = 100,
+    cutoff_iter: typing.Optional[int] = 1000,
+    blackboard_default: typing.Any = 0,
+    blackboard_update_op: typing.Optional[typing.Union[BlackboardBinOp, typing.Dict[ActionKey, BlackboardBinOp]]] = None,
+    deadline: typing.Optional[float] = None,
+    max_generated: typing.Optional[int] = None,
+):
+    """Run a beam-stack GOAP planner to achieve a specified goal state given an initial state.
+    Callbacks as for goap.find_plan(..., astar=True).
+
+    :param beam_width: Optional. How many nodes each layer (plan step) can hold. Default 100.
+                       Memory use is bounded by beam_width * plan length. Narrower beams use less memory,
+                       but have to backtrack more to prove (or improve) a plan.
+    :param cutoff_iter: Optional. Budget for the number of nodes expanded. Default 1000.
+    :param deadline: Optional. A time.monotonic() timestamp after which the planner gives up.
+    :param max_generated: Optional. Budget for the number of candidate nodes generated.
+    :raises: A NoPathError if the budget ran out before any plan was found,
+             an EmptyQueueError if there is no plan at all.
+    :return: A (cost, plan) tuple. The plan is optimal if the search ran to completion;
+             if the budget ran out after it had found some plan, it's the best one found by then.
+    """
+    if beam_width < 1:
+        raise ValueError(f"The beam width must be positive, got {beam_width}!")
+
+    _start_pos = start_pos
+    if not isinstance(start_pos, STATE_TYPES):
+        _start_pos = State.fromdict(start_pos, name="START")
+
+    _goal = goal
+    if not isinstance(goal, STATE_TYPES):
+        _goal = State.fromdict(goal, name="END")
+
+    _neighbor_measure = neighbor_measure or no_goal_heuristic
+    _goal_measure = goal_measure or zero_heuristic
+    _goal_check = goal_check or equality_check
+
+    root = new_root_node(
+        _start_pos,
+        blackboard_default=blackboard_default,
+        blackboard_update_op=blackboard_update_op,
+    )
+    notify_search_start(_goal_measure, root.blackboard, _goal)
+
+    root_layer = BeamLayer()
+    root_layer.nodes.append(root)
+    root_layer.costs[statehash(root.blackboard)] = 0
+    layers = [root_layer]
+
+    budget = SearchBudget(cutoff_iter=cutoff_iter, deadline=deadline, max_generated=max_generated)
+    curr_iter, generated = 0, 0
+    incumbent = root if _goal_check(root.blackboard, _goal) else None
+
+    def _seen_cheaper(state_hash: int, path_cost: float) -> bool:
+        return any(prev_layer.costs.get(state_hash, PLUS_INF) <= path_cost for prev_layer in layers)
+
+    def _fill_layer(parent_layer: BeamLayer, layer: BeamLayer) -> None:
+        # Builds the layer from the successors of its parent layer that fall within its range.
+        nonlocal curr_iter, generated, incumbent
+        upper_bound = PLUS_INF if incumbent is None else incumbent.cost
+        candidates = {}
+
+        for node in parent_layer.nodes:
+            curr_iter += 1
+            budget.check(curr_iter, generated, queue_size=sum(len(prev_layer.nodes) for prev_layer in layers))
+
+            for neigh in adjacency_gen(node.pos):
+                neighbor_triple = evaluate_neighbor_astar(
+                    check_preconds=preconditions_check,
+                    neigh=neigh,
+                    current_pos=node.pos,
+                    goal=_goal,
+                    curr_cost=node.cost,
+                    neighbor_measure=_neighbor_measure,
+                    goal_measure=_goal_measure,
+                    blackboard=node.blackboard,
+                    blackboard_default=blackboard_default,
+                    blackboard_update_op=blackboard_update_op,
+                    get_effects=get_effects,
+                )
+
+                if not neighbor_triple:
+                    continue
+
+                generated += 1
+                path_cost, goal_distance, effects = neighbor_triple
+                est_total_cost = path_cost + goal_distance
+
+                if not est_total_cost < upper_bound:
+                    # Can't beat the plan we already have.
+                    continue
+
+                if _goal_check(effects, _goal):
+                    # Costs are non-negative, so there's no point going any further from a goal state.
+                    incumbent = SearchNode(neigh, parent=node, cost=path_cost, blackboard=effects)
+                    upper_bound = path_cost
+                    continue
+
+                state_hash = statehash(effects)
+
+                if _seen_cheaper(state_hash, path_cost):
+                    continue
+
+                stored = candidates.get(state_hash)
+
+                if stored is None or path_cost < stored[1].cost:
+                    range_key = (est_total_cost, goal_distance, _tiebreak(effects))
+                    cand_node = SearchNode(neigh, parent=node, cost=path_cost, blackboard=effects)
+                    candidates[state_hash] = (range_key, cand_node)
+
+        ranked = sorted(
+            (range_key, state_hash, cand_node) for (state_hash, (range_key, cand_node)) in candidates.items()
+            # Anything below range_min was already covered by an earlier range of this layer.
+            if range_key[0] < upper_bound and (layer.range_min is None or range_key >= layer.range_min)
+        )
+
+        if len(ranked) > beam_width:
+            # The rest will have to wait until we backtrack here.
+            layer.range_max = ranked[beam_width][0]
+            ranked = ranked[:beam_width]
+
+        for (_, state_hash, cand_node) in ranked:
+            layer.nodes.append(cand_node)
+            layer.costs[state_hash] = cand_node.cost
+
+    # If the start already satisfies the goal, there's nothing cheaper to look for.
+    next_layer = BeamLayer() if incumbent is None else None
+
+    while next_layer is not None:
+        try:
+            _fill_layer(layers[-1], next_layer)
+
+        except NoPathError as error:
+            if incumbent is not None:
+                # Out of budget, but we do have a plan, if not a proven optimal one.
+                break
+
+            best_node = layers[-1].nodes[0]
+            error.best_partial_plan = (best_node.cost, best_node.path())
+            raise
+
+        if next_layer.nodes:
+            layers.append(next_layer)
+            next_layer = BeamLayer()
+            continue
+
+        # A dead end - backtrack to the deepest layer that had candidates cut off (that could still beat
+        # the incumbent), and rebuild it from the range starting where its last one ended.
+        # If there's no such layer, every range of every layer has been tried, and we're done.
+        upper_bound = PLUS_INF if incumbent is None else incumbent.cost
+        next_layer = None
+
+        while len(layers) > 1:
+            exhausted = layers.pop()
+
+            if exhausted.range_max[0] < upper_bound:
+                next_layer = BeamLayer(range_min=exhausted.range_max)
+                break
+
+    if incumbent is None:
+        raise EmptyQueueError("Exhausted all candidates before a path was found!")
+
+    path = incumbent.path()
+
+    if handle_backtrack_node:
+        for parent_elem in path:
+            handle_backtrack_node(parent_elem)
+
+    return incumbent.cost, path
+
+
+@suppress_not_found(default=None, default_factory=lambda: (PLUS_INF, list()))
+def maybe_find_plan(*args, **kwargs):
+    return find_plan(*args, **kwargs)
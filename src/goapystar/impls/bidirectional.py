@@ -0,0 +1,253 @@
+"""Bidirectional point-to-point search for explicit graphs.
+
+For plain pathfinding (ActionGraph, Map2D) we know exactly which position we want to end up at,
+so we can search from both ends at once - one frontier growing forwards from the start and one
+growing backwards from the goal, along reversed edges. Each frontier only has to get about halfway,
+and as the area a frontier covers grows with the square of its radius (on an open 2D map, at least),
+two half-radius frontiers cover a good deal less than a single full-radius one. In corridor-heavy mazes,
+where the frontiers are more like snakes than disks, the savings are smaller.
+
+The first time the frontiers touch is NOT necessarily on the best path, so the search keeps going
+until it can prove no better path is left - that is, until the smallest priorities on the two frontiers
+add up to at least the cost of the best path found so far (the classic bidirectional Dijkstra rule).
+
+With a heuristic, each frontier can't just use its own estimate (to the goal going forwards, to the start
+going backwards) - the two would disagree on how far along a position is and the stopping rule breaks.
+Instead, both use the average of the two, (h(pos, goal) - h(pos, start)) / 2, with opposite signs;
+this keeps the rule above valid, and the paths optimal, for any consistent heuristic.
+
+This doesn't apply to the GOAP planners proper - a goal there is a *set* of states, so there's no single
+state to search backwards from (see regression.py for the backward search that does work there).
+"""
+import typing
+
+from .common import NoPathError, EmptyQueueError, PLUS_INF, SearchBudget, new_open_list, suppress_not_found
+from .openlist import IndexedOpenList
+from ..measures import zero_heuristic
+
+Position = typing.Hashable
+
+
+class SearchFrontier:
+    """One direction of the search - the best known costs to positions, and how we got there."""
+    __slots__ = ("adjacency_gen", "edge_cost", "potential", "costs", "parents", "queue", "closed")
+
+    def __init__(
+        self,
+        root: Position,
+        adjacency_gen: typing.Callable[[Position], typing.Iterable[Position]],
+        edge_cost: typing.Callable[[Position, Position], float],
+        potential: typing.Callable[[Position], float],
+    ):
+        self.adjacency_gen = adjacency_gen
+        self.edge_cost = edge_cost
+        self.potential = potential
+
+        self.costs: typing.Dict[Position, float] = {root: 0}
+        self.parents: typing.Dict[Position, typing.Optional[Position]] = {root: None}
+        self.queue: IndexedOpenList = new_open_list()
+        self.closed: typing.Set[Position] = set()
+
+        goal_distance = potential(root)
+        self.queue.push(root, (goal_distance, goal_distance, 0), 0)
+
+    def min_priority(self) -> float:
+        if not self.queue:
+            return PLUS_INF
+
+        priority, _, _ = self.queue.peek()
+        return priority[0]
+
+    def expand(self, curr_iter: int) -> typing.Iterator[Position]:
+        """Expands the most promising position, yielding each neighbor it found a better path to."""
+        _, pos, path_cost = self.queue.pop()
+        self.closed.add(pos)
+
+        for neigh in self.adjacency_gen(pos):
+            if neigh in self.closed:
+                continue
+
+            neigh_cost = path_cost + self.edge_cost(pos, neigh)
+
+            if not neigh_cost < self.costs.get(neigh, PLUS_INF):
+                continue
+
+            self.costs[neigh] = neigh_cost
+            self.parents[neigh] = pos
+
+            goal_distance = self.potential(neigh)
+            self.queue.push(neigh, (neigh_cost + goal_distance, goal_distance, curr_iter), neigh_cost)
+            yield neigh
+
+    def path_to(self, pos: Position) -> typing.List[Position]:
+        """The positions from this frontier's root to pos (inclusive)."""
+        path = []
+        curr = pos
+
+        while curr is not None:
+            path.append(curr)
+            curr = self.parents[curr]
+
+        path.reverse()
+        return path
+
+
+def find_path(
+    start_pos: Position,
+    goal: Position,
+    adjacency_gen: typing.Callable[[Position], typing.Iterable[Position]],
+    reverse_adjacency_gen: typing.Optional[typing.Callable[[Position], typing.Iterable[Position]]] = None,
+    edge_cost: typing.Optional[typing.Callable[[Position, Position], float]] = None,
+    heuristic: typing.Optional[typing.Callable[[Position, Position], float]] = None,
+    handle_backtrack_node: typing.Optional[typing.Callable[[Position], typing.Any]] = None,
+    cutoff_iter: typing.Optional[int] = 1000,
+    bidirectional: bool = True,
+    deadline: typing.Optional[float] = None,
+    max_generated: typing.Optional[int] = None,
+):
+    """Finds the cheapest path between two positions of a graph, searching from both ends.
+
+    :param start_pos: The position to start from.
+    :param goal: The position to get to.
+    :param adjacency_gen: A callable that, given a position, returns an iterable of the positions
+                          we can get to from there in one step.
+    :param reverse_adjacency_gen: Optional. A callable that, given a position, returns an iterable
+                                  of the positions we can get to it *from* in one step.
+                                  If not set, the graph is assumed to be undirected (same as adjacency_gen).
+    :param edge_cost: Optional. A callable taking two adjacent positions (in the direction of travel,
+                      whichever frontier is asking) and returning the cost of stepping from one to the other.
+                      Defaults to 1 for every step.
+    :param heuristic: Optional. A callable taking two positions and returning an estimate of the cost
+                      of the path between them; gets asked about the distance to the goal going forwards
+                      and about the distance to the start going backwards, so it should be symmetric.
+                      If it is also consistent (e.g. manhattan_distance on a grid without diagonals),
+                      the path found is still the cheapest one. Defaults to 0 (bidirectional Dijkstra).
+    :param handle_backtrack_node: Optional. Callback to apply to each position in the found path.
+    :param cutoff_iter: Optional. Budget for the number of positions expanded (by both frontiers together).
+    :param bidirectional: Optional boolean. If False, only searches forwards (a plain Dijkstra/A*);
+                          mainly useful to see what the backward frontier is buying you.
+    :param deadline: Optional. A time.monotonic() timestamp after which the search gives up.
+    :param max_generated: Optional. Budget for the number of positions generated (by both frontiers together).
+    :raises: A NoPathError if no path was found within the budget, an EmptyQueueError if there is none at all.
+             The former carries the search stats and a partial path - the cheapest path found so far
+             if the frontiers have met already (just not proven the cheapest overall yet),
+             otherwise the path to the position the forward frontier would have expanded next.
+    :return: A (cost, path) tuple, where the path runs from start_pos to goal (inclusive).
+    """
+    _reverse_adjacency_gen = reverse_adjacency_gen or adjacency_gen
+    _edge_cost = edge_cost or (lambda start, end: 1)
+    _heuristic = heuristic or zero_heuristic
+
+    if bidirectional:
+        # Each frontier gets the average of 'how far to my target' and 'how far from the other one's',
+        # which keeps the two consistent with each other - see the module docstring.
+        def _forward_potential(pos: Position) -> float:
+            return (_heuristic(pos, goal) - _heuristic(pos, start_pos)) / 2
+
+        def _backward_potential(pos: Position) -> float:
+            return -_forward_potential(pos)
+
+    else:
+        def _forward_potential(pos: Position) -> float:
+            return _heuristic(pos, goal)
+
+        _backward_potential = _forward_potential
+
+    forward = SearchFrontier(start_pos, adjacency_gen, _edge_cost, _forward_potential)
+    backward = SearchFrontier(
+        goal,
+        _reverse_adjacency_gen,
+        # The backward frontier steps from pos to neigh along an edge that runs from neigh to pos.
+        lambda pos, neigh: _edge_cost(neigh, pos),
+        _backward_potential,
+    )
+
+    best_cost, meeting_point = (0, start_pos) if start_pos == goal else (PLUS_INF, None)
+    budget = SearchBudget(cutoff_iter=cutoff_iter, deadline=deadline, max_generated=max_generated)
+    curr_iter = 0
+    generated = 0
+
+    def _best_partial_path() -> typing.Tuple[float, typing.List[Position]]:
+        if meeting_point is not None:
+            return best_cost, forward.path_to(meeting_point) + backward.path_to(meeting_point)[-2::-1]
+
+        _, pos, path_cost = forward.queue.peek()
+        return path_cost, forward.path_to(pos)
+
+    while forward.queue and (backward.queue or not bidirectional):
+        # Any path we haven't found yet costs at least as much as this; if we have one that good, we're done.
+        lower_bound = forward.min_priority()
+        if bidirectional:
+            lower_bound += backward.min_priority()
+
+        if best_cost <= lower_bound:
+            break
+
+        curr_iter += 1
+        budget.check(
+            curr_iter,
+            generated,
+            queue_size=len(forward.queue) + len(backward.queue),
+            best_partial_plan=_best_partial_path,
+        )
+
+        # Grow the smaller frontier - keeps the two balanced, even if one end of the graph is much bushier.
+        if bidirectional and len(backward.queue) < len(forward.queue):
+            frontier, other = backward, forward
+        else:
+            frontier, other = forward, backward
+
+        for neigh in frontier.expand(curr_iter):
+            generated += 1
+            other_cost = other.costs.get(neigh)
+
+            if other_cost is None:
+                continue
+
+            path_cost = frontier.costs[neigh] + other_cost
+            if path_cost < best_cost:
+                best_cost, meeting_point = path_cost, neigh
+
+    if meeting_point is None:
+        raise EmptyQueueError("Exhausted all candidates before a path was found!")
+
+    path = forward.path_to(meeting_point) + backward.path_to(meeting_point)[-2::-1]
+
+    if handle_backtrack_node:
+        for parent_elem in path:
+            handle_backtrack_node(parent_elem)
+
+    return best_cost, path
+
+
+def find_graph_path(
+    graph,
+    start_pos: Position,
+    goal: Position,
+    heuristic: typing.Optional[typing.Callable[[Position, Position], float]] = None,
+    cutoff_iter: typing.Optional[int] = 1000,
+    bidirectional: bool = True,
+    deadline: typing.Optional[float] = None,
+    max_generated: typing.Optional[int] = None,
+):
+    """find_path() on a pathfinding graph (e.g. ActionGraph, Map2D), using its own adjacency and edge costs.
+    The found path is also recorded on the graph, for visualize().
+    """
+    return find_path(
+        start_pos=start_pos,
+        goal=goal,
+        adjacency_gen=graph.adjacent_lazy,
+        reverse_adjacency_gen=graph.adjacent_reverse_lazy,
+        edge_cost=graph.edge_cost,
+        heuristic=heuristic,
+        handle_backtrack_node=graph.add_to_path,
+        cutoff_iter=cutoff_iter,
+        bidirectional=bidirectional,
+        deadline=deadline,
+        max_generated=max_generated,
+    )
+
+
+@suppress_not_found(default=None, default_factory=lambda: (PLUS_INF, list()))
+def maybe_find_path(*args, **kwargs):
+    return find_path(*args, **kwargs)
@@ -5,12 +5,15 @@ The planner here is a closure with all the non-cacheable params (callbacks, most
 This means we can apply lru_cache() to the function returned by the cacheable_solver()
      and reap the benefits of in-memory caching of paths.
 Realistically, this *probably* isn't that useful, since states are path-dependent, but it is a PoC.
+
+The cached solver freezes its start/goal inputs into FrozenStates before they hit the cache,
+so plain dicts can be used as inputs and cache lookups don't need to rehash the states each time.
 """
 import functools
 import typing
 
-from .common import NoPathError, _astar_deepening_search
-from ..state import State
+from .common import NoPathError, SearchBudget, run_search
+from ..state import State, STATE_TYPES, freeze_state
 from ..types import StateLike, ActionTuple, IntoState, BlackboardBinOp, ActionKey, PathTuple, ResultTuple
 
 
@@ -27,23 +30,26 @@ def cacheable_solver(
     pqueue_key_func: typing.Optional[typing.Callable] = None,
     blackboard_default: typing.Any = 0,
     blackboard_update_op: typing.Optional[typing.Union[BlackboardBinOp, typing.Dict[ActionKey, BlackboardBinOp]]] = None,
+    astar: bool = False,
+    max_generated: typing.Optional[int] = None,
 ):
 
     def cacheable_solve(
         start_pos: IntoState,
         goal: StateLike,
         paths: typing.Optional[typing.Dict[ActionKey, PathTuple]] = None,
+        deadline: typing.Optional[float] = None,
     ) -> ResultTuple:
 
         _start_pos = start_pos
-        if not isinstance(start_pos, State):
+        if not isinstance(start_pos, STATE_TYPES):
             _start_pos = State.fromdict(start_pos, name="START")
 
         _goal = goal
-        if not isinstance(goal, State):
+        if not isinstance(goal, STATE_TYPES):
             _goal = State.fromdict(goal, name="END")
 
-        continue_search, next_params = True, dict(
+        next_params = dict(
             adjacency_gen=adjacency_gen,
             preconditions_checker=preconditions_check,
             start_pos=_start_pos,
@@ -57,39 +63,59 @@ def cacheable_solver(
             pqueue_key_func=pqueue_key_func,
             blackboard_default=blackboard_default,
             blackboard_update_op=blackboard_update_op,
+            astar=astar,
         )
 
-        best_cost, best_parent = None, None
-        curr_iter = 0
-
-        while next_params:
-            continue_search, next_params = _astar_deepening_search(**next_params)
+        budget = SearchBudget(cutoff_iter=cutoff_iter, deadline=deadline, max_generated=max_generated)
+        return run_search(next_params, budget, handle_backtrack_node=handle_backtrack_node)
 
-            if continue_search:
+    return cacheable_solve
 
-                if cutoff_iter is not None:
-                    curr_iter = next_params.get("_iter") or curr_iter + 1
-                    if curr_iter >= cutoff_iter:
-                        raise NoPathError(f"Path not found within {cutoff_iter} iterations!")
 
-            else:
-                best_cost, best_parent = next_params
-                break
+class _NotAKey:
+    """Wraps an argument so that lru_cache() passes it through without making it part of the cache key."""
 
-        parent_cost, path = best_cost, best_parent
+    __slots__ = ("value",)
 
-        for parent_elem in path:
-            handle_backtrack_node(parent_elem)
+    def __init__(self, value: typing.Any):
+        self.value = value
 
-        return best_cost, path
+    def __hash__(self) -> int:
+        return 0
 
-    return cacheable_solve
+    def __eq__(self, other: typing.Any) -> bool:
+        return isinstance(other, _NotAKey)
 
 
 def cached_solver(cache_size=None, *args, **kwargs):
     uncached_solver = cacheable_solver(*args, **kwargs)
-    _cached_solver = functools.lru_cache(maxsize=cache_size)(uncached_solver)
-    return _cached_solver
+
+    def _solve_with_deadline(
+        start_pos: IntoState,
+        goal: StateLike,
+        paths: typing.Optional[typing.Dict[ActionKey, PathTuple]],
+        deadline: _NotAKey,
+    ) -> ResultTuple:
+        return uncached_solver(start_pos, goal, paths, deadline=deadline.value)
+
+    _cached_solver = functools.lru_cache(maxsize=cache_size)(_solve_with_deadline)
+
+    @functools.wraps(uncached_solver)
+    def _frozen_cached_solver(
+        start_pos: IntoState,
+        goal: StateLike,
+        paths: typing.Optional[typing.Dict[ActionKey, PathTuple]] = None,
+        deadline: typing.Optional[float] = None,
+    ) -> ResultTuple:
+        _start_pos = freeze_state(start_pos, name="START")
+        _goal = freeze_state(goal, name="END")
+        # The deadline only bounds the work of a cache miss; a plan found in time is the same plan either way,
+        # and running out of time raises rather than caching anything.
+        return _cached_solver(_start_pos, _goal, paths, _NotAKey(deadline))
+
+    _frozen_cached_solver.cache_info = _cached_solver.cache_info
+    _frozen_cached_solver.cache_clear = _cached_solver.cache_clear
+    return _frozen_cached_solver
 
 
 def find_plan(cache_size=None, setup_args=None, setup_kwargs=None, *args, **kwargs):
@@ -1,12 +1,13 @@
-import copy
-import functools
-import heapq
 import operator
+import time
 import typing
 
-from ..measures import action_graph_dist, equality_check
-from ..state import State, statehash
-from ..types import StateLike, BlackboardBinOp, ActionKey, IntoState, PathTuple, CandidateTuple
+from ..blackboard import OverlayBlackboard, overlay_on
+from .nodes import SearchNode
+from .openlist import IndexedOpenList, BoundedOpenList
+from ..measures import action_graph_dist, equality_check, zero_heuristic
+from ..state import STATE_TYPES, statehash
+from ..types import StateLike, BlackboardBinOp, ActionKey, IntoState, PathTuple
 
 
 class EmptyQueueError(Exception):
@@ -14,11 +15,100 @@ class EmptyQueueError(Exception):
 
 
 class NoPathError(Exception):
-    pass
+    """Raised when a planner runs out of budget before it finds a plan.
+
+    Besides the message, it carries what the search had got up to by then:
+    - stats: a dict of counters - iterations, generated (candidate nodes), queue_size and elapsed (seconds).
+    - best_partial_plan: a (cost, path) tuple for the candidate the search would have expanded next;
+      this does NOT reach the goal yet, but it is a sensible prefix to fall back on. None if not available.
+    - continuation: a SearchContinuation to carry on with the same search with more budget,
+      rather than starting over. None for the planners that can't be resumed.
+    """
+
+    def __init__(
+        self,
+        message: str = "",
+        stats: typing.Optional[typing.Dict[str, float]] = None,
+        best_partial_plan: typing.Optional[typing.Tuple[float, list]] = None,
+        continuation: typing.Optional["SearchContinuation"] = None,
+    ):
+        super().__init__(message)
+        self.stats = stats or {}
+        self.best_partial_plan = best_partial_plan
+        self.continuation = continuation
 
 
 PLUS_INF = float("inf")
-BLACKBOARD_CLASS = dict
+BLACKBOARD_CLASS = OverlayBlackboard
+
+
+class SearchBudget:
+    """The limits a single planner run has to stay within; any of them can be None for 'no limit'.
+
+    - cutoff_iter: the number of planning iterations,
+    - deadline: a point in time, as per time.monotonic(),
+    - max_generated: the number of candidate nodes generated (i.e. pushed onto the open list).
+
+    Checking it is a few comparisons and a clock read, so the planners do it on every iteration.
+
+    The deadline is a point in time rather than an amount, so unlike the other limits, it can't be fixed upfront;
+    the planners that get set up once and then called over and over (cacheable_solver(), BaseGOAP subclasses,
+    realtime_solver()) take it on every call instead, and build a fresh SearchBudget each time.
+    """
+    __slots__ = ("cutoff_iter", "deadline", "max_generated", "started_at")
+
+    def __init__(
+        self,
+        cutoff_iter: typing.Optional[int] = None,
+        deadline: typing.Optional[float] = None,
+        max_generated: typing.Optional[int] = None,
+    ):
+        self.cutoff_iter = cutoff_iter
+        self.deadline = deadline
+        self.max_generated = max_generated
+        self.started_at = time.monotonic()
+
+    def exceeded(self, curr_iter: int, generated: int = 0) -> typing.Optional[str]:
+        """Returns why the budget is spent, or None if it isn't yet."""
+        if self.cutoff_iter is not None and curr_iter >= self.cutoff_iter:
+            return f"within {self.cutoff_iter} iterations"
+
+        if self.max_generated is not None and generated >= self.max_generated:
+            return f"within {self.max_generated} generated nodes"
+
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return "before the deadline"
+
+        return None
+
+    def stats(self, curr_iter: int, generated: int = 0, queue_size: int = 0) -> typing.Dict[str, float]:
+        return dict(
+            iterations=curr_iter,
+            generated=generated,
+            queue_size=queue_size,
+            elapsed=time.monotonic() - self.started_at,
+        )
+
+    def check(
+        self,
+        curr_iter: int,
+        generated: int = 0,
+        queue_size: int = 0,
+        best_partial_plan: typing.Optional[typing.Callable[[], typing.Tuple[float, list]]] = None,
+    ) -> None:
+        """Raises a NoPathError if the budget is spent.
+        The best partial plan is passed in as a callable, so it only gets backtracked if we do give up.
+        """
+        reason = self.exceeded(curr_iter, generated)
+
+        if reason is None:
+            return
+
+        raise NoPathError(
+            f"Path not found {reason}!",
+            stats=self.stats(curr_iter, generated, queue_size),
+            best_partial_plan=best_partial_plan() if best_partial_plan else None,
+        )
 
 
 def update_counts(
@@ -38,6 +128,33 @@ def update_counts(
     return src
 
 
+def apply_effects(
+    blackboard: StateLike,
+    new_effects: typing.Optional[StateLike],
+    default: typing.Any = 0,
+    op: typing.Optional[typing.Union[BlackboardBinOp, typing.Dict[ActionKey, BlackboardBinOp]]] = None,
+) -> StateLike:
+    # State representations that know how to project themselves forward (e.g. compiled SlotStates)
+    # get to do it their own way; everything else gets a copy-on-write layer updated with the Effects.
+    custom_apply = getattr(blackboard, "apply_effects", None)
+
+    if custom_apply is not None:
+        return custom_apply(new_effects or (), default=default, op=op)
+
+    # Copy-on-write - this only records what the Effects change, the rest is shared with the parent.
+    successor = overlay_on(blackboard)
+
+    if new_effects:
+        update_counts(
+            successor,
+            new_effects,
+            default=default,
+            op=op,
+        )
+
+    return successor
+
+
 def evaluate_neighbor(
     check_preconds: typing.Callable[[IntoState, StateLike], bool],
     neigh: ActionKey,
@@ -54,22 +171,19 @@ def evaluate_neighbor(
 ):
     _neighbor_measure = neighbor_measure or measure or action_graph_dist
     _goal_measure = goal_measure or measure or action_graph_dist
-    _blackboard = blackboard or BLACKBOARD_CLASS()
+    _blackboard = blackboard if blackboard is not None else BLACKBOARD_CLASS()
 
     valid = check_preconds(neigh, _blackboard)
 
-    effects = copy.deepcopy(_blackboard or BLACKBOARD_CLASS())
-    curr_src = list(effects.get("src") or [])
-    curr_src.append(current_pos)
+    if not valid:
+        return
 
-    if get_effects:
-        new_effects = get_effects(neigh)
-        update_counts(
-            effects,
-            new_effects,
-            default=blackboard_default,
-            op=blackboard_update_op,
-        )
+    effects = apply_effects(
+        _blackboard,
+        get_effects(neigh) if get_effects else None,
+        default=blackboard_default,
+        op=blackboard_update_op,
+    )
 
     if transposition_table:
         fx_hash = statehash(effects)
@@ -80,11 +194,6 @@ def evaluate_neighbor(
 
         transposition_table.add(fx_hash)
 
-    effects["src"] = curr_src
-
-    if not valid:
-        return
-
     neigh_distance = _neighbor_measure(
         current_pos,
         neigh
@@ -103,24 +212,143 @@ def evaluate_neighbor(
     return heuristic, effects
 
 
-def cached_parse_effects(effects_checker, blackboard_default=0, blackboard_update_op=None):
+def evaluate_neighbor_astar(
+    check_preconds: typing.Callable[[IntoState, StateLike], bool],
+    neigh: ActionKey,
+    current_pos: IntoState,
+    goal: StateLike,
+    curr_cost: float = 0,
+    blackboard: typing.Optional[StateLike] = None,
+    blackboard_default: typing.Any = 0,
+    blackboard_update_op: typing.Optional[typing.Union[BlackboardBinOp, typing.Dict[ActionKey, BlackboardBinOp]]] = None,
+    neighbor_measure: typing.Optional[typing.Callable[[StateLike], float]] = None,
+    goal_measure: typing.Optional[typing.Callable[[IntoState], float]] = None,
+    get_effects: typing.Optional[typing.Callable[[ActionKey], StateLike]] = None,
+    transposition_table: typing.Optional[dict] = None,
+):
+    """Like evaluate_neighbor(), but keeps the cost so far (g) and the estimate to the goal (h) apart.
 
-    @functools.lru_cache(10)
-    def _check_effects(src_pos):
-        rebuilt_blackboard = BLACKBOARD_CLASS()
+    The goal_measure gets the *resulting state* rather than the Action, as that's what we need
+    to estimate how far off the goal we are. The transposition table here maps state hashes
+    to the cheapest cost we've reached them with so far, so a cheaper path to an already seen
+    state still gets through (and reopens it), while a more expensive one doesn't.
+
+    Path-dependent heuristics can provide a measure_successor(state, goal, parent, action) method
+    on the goal_measure, which then gets called instead, with the state we came from and the Action taken.
+    Those usually keep some per-search state too; see notify_search_start() for resetting that.
+
+    :return: A (g, h, effects) triple, or None if the neighbor is invalid or not an improvement.
+    """
+    _blackboard = blackboard if blackboard is not None else BLACKBOARD_CLASS()
+
+    if not check_preconds(neigh, _blackboard):
+        return
+
+    effects = apply_effects(
+        _blackboard,
+        get_effects(neigh) if get_effects else None,
+        default=blackboard_default,
+        op=blackboard_update_op,
+    )
+
+    path_cost = curr_cost + neighbor_measure(current_pos, neigh)
+
+    if transposition_table is not None:
+        fx_hash = statehash(effects)
+
+        if transposition_table.get(fx_hash, PLUS_INF) <= path_cost:
+            # We've already got here at least as cheaply, nothing to gain from this one.
+            return
+
+        transposition_table[fx_hash] = path_cost
+
+    successor_measure = getattr(goal_measure, "measure_successor", None)
+
+    if successor_measure is not None:
+        goal_distance = successor_measure(effects, goal, parent=_blackboard, action=neigh)
+    else:
+        goal_distance = goal_measure(effects, goal)
+
+    return path_cost, goal_distance, effects
+
+
+def new_open_list(max_queue_size: typing.Optional[int] = None) -> typing.Union[IndexedOpenList, BoundedOpenList]:
+    if max_queue_size is None:
+        return IndexedOpenList()
+
+    return BoundedOpenList(max_size=max_queue_size)
+
+
+def candidate_key(
+    neigh: ActionKey,
+    effects: StateLike,
+    serial: int,
+    transposition_table: typing.Optional[typing.Union[set, dict]] = None,
+):
+    # Identity of a search node in the open list in the default mode - the same Action resulting in the same state
+    # is the same node as far as the rest of the search is concerned, regardless of how we got there.
+    # The priorities there lead with the iteration, so a node queued again never beats its queued copy -
+    # this only merges duplicates. The A* mode keys nodes by state alone, and does decrease-key on them.
+    cached_hash = getattr(effects, "as_hash", None)
+
+    if cached_hash is not None:
+        return neigh, cached_hash()
+
+    if transposition_table is None:
+        # Hashing the whole state just to merge the odd duplicate isn't worth it; every candidate is its own node.
+        return neigh, serial
+
+    return neigh, statehash(effects)
 
-        for trajectory in src_pos:
-            traj_eff = effects_checker(trajectory)
-            update_counts(
-                rebuilt_blackboard,
-                traj_eff,
-                default=blackboard_default,
-                op=blackboard_update_op
-            )
 
-        return rebuilt_blackboard
+def notify_search_start(
+    goal_measure: typing.Optional[typing.Callable],
+    start_state: StateLike,
+    goal: StateLike,
+) -> None:
+    # Stateful heuristics can provide a start_search(goal, start_state) method, to set up for a new search
+    # from the actual start state (rather than guessing it from whichever state they get asked about first).
+    start_search = getattr(goal_measure, "start_search", None)
+
+    if start_search is not None:
+        start_search(goal, start_state)
+
+
+def new_transposition_table(start_state: StateLike, astar: bool = False) -> typing.Union[set, dict]:
+    # Regular search only needs to know if we've seen a state before;
+    # A* needs to know how cheaply, so it can tell if a new path to it is an improvement.
+    start_hash = statehash(start_state)
+
+    if astar:
+        return {start_hash: 0}
 
-    return _check_effects
+    return {start_hash}
+
+
+def new_root_node(
+    start_pos: IntoState,
+    curr_cost: float = 0,
+    blackboard: typing.Optional[StateLike] = None,
+    blackboard_default: typing.Any = 0,
+    blackboard_update_op: typing.Optional[typing.Union[BlackboardBinOp, typing.Dict[ActionKey, BlackboardBinOp]]] = None,
+) -> SearchNode:
+
+    if hasattr(start_pos, "apply_effects"):
+        # A self-contained state (e.g. compiled) doubles as its own blackboard.
+        return SearchNode(start_pos, cost=curr_cost, blackboard=start_pos)
+
+    # Otherwise, build the initial state.
+    _blackboard = BLACKBOARD_CLASS(blackboard)
+
+    if isinstance(start_pos, (*STATE_TYPES, dict)):
+        update_counts(
+            _blackboard,
+            start_pos,
+            default=blackboard_default,
+            op=blackboard_update_op
+        )
+
+    return SearchNode(start_pos, cost=curr_cost, blackboard=_blackboard)
 
 
 def _astar_deepening_search(
@@ -139,32 +367,40 @@ def _astar_deepening_search(
     blackboard_update_op: typing.Optional[typing.Union[BlackboardBinOp, typing.Dict[ActionKey, BlackboardBinOp]]] = None,
     visited: typing.Optional[typing.Dict[ActionKey, int]] = None,
     paths: typing.Optional[typing.Dict[ActionKey, PathTuple]] = None,
-    queue: typing.Optional[typing.MutableSequence[CandidateTuple]] = None,
+    queue: typing.Optional[typing.Union[IndexedOpenList, BoundedOpenList]] = None,
     curr_cost: float = 0,
-    transposition_table: typing.Optional[set] = None,
+    node: typing.Optional[SearchNode] = None,
+    transposition_table: typing.Optional[typing.Union[set, dict]] = None,
+    astar: bool = False,
     _iter=1,
+    _generated=0,
 ):
 
     _paths = paths or dict()
-    _pqueue = queue or []
-    _blackboard = blackboard.copy() if blackboard else BLACKBOARD_CLASS()
+    _pqueue = queue if queue is not None else new_open_list(max_queue_size)
     _goal_check = goal_checker or equality_check
 
-    if isinstance(start_pos, (State, dict)):
-        update_counts(
-            _blackboard,
+    if node is not None:
+        # The node already knows the state it leads to, we computed it when we generated it.
+        _node = node
+        _blackboard = node.blackboard
+
+    else:
+        _node = new_root_node(
             start_pos,
-            default=blackboard_default,
-            op=blackboard_update_op
+            curr_cost=curr_cost,
+            blackboard=blackboard,
+            blackboard_default=blackboard_default,
+            blackboard_update_op=blackboard_update_op,
         )
+        _blackboard = _node.blackboard
 
     if _goal_check(_blackboard, goal):
-        cost, parent, path = _paths.get(start_pos) or (curr_cost, start_pos, (start_pos,))
-
-        return False, (cost, _blackboard.get("src", []) + [start_pos])
+        return False, (_node.cost, _node.path())
 
     _neighbor_measure = neighbor_measure or action_graph_dist
-    _goal_measure = goal_measure or action_graph_dist
+    # In A* mode, the heuristic has to be admissible for the plans to be optimal, so we default to 0.
+    _goal_measure = goal_measure or (zero_heuristic if astar else action_graph_dist)
 
     if visited is not None:
         visited[start_pos] = visited.get(start_pos, 0) + 1
@@ -175,6 +411,52 @@ def _astar_deepening_search(
         if visited and neigh in visited:
             continue
 
+        if astar:
+            neighbor_triple = evaluate_neighbor_astar(
+                check_preconds=preconditions_checker,
+                neigh=neigh,
+                current_pos=start_pos,
+                goal=goal,
+                curr_cost=curr_cost,
+                neighbor_measure=_neighbor_measure,
+                goal_measure=_goal_measure,
+                blackboard=_blackboard,
+                blackboard_default=blackboard_default,
+                blackboard_update_op=blackboard_update_op,
+                get_effects=get_effects,
+                transposition_table=transposition_table,
+            )
+
+            if not neighbor_triple:
+                continue
+
+            path_cost, goal_distance, effects = neighbor_triple
+            est_total_cost = path_cost + goal_distance
+
+            if not est_total_cost < PLUS_INF:
+                # The heuristic says this is a dead end.
+                continue
+
+            cand_node = SearchNode(neigh, parent=_node, cost=path_cost, blackboard=effects)
+            stored_neigh_cost, _, _ = _paths.get(neigh) or (PLUS_INF, None, None)
+
+            if path_cost < stored_neigh_cost:
+                _paths[neigh] = (path_cost, start_pos, cand_node)
+
+            # Unlike the default mode, this is ordered by f = g + h first.
+            # Ties go to whichever is closer to the goal by the heuristic (i.e. deeper), then first come first served.
+            priority_key = (
+                pqueue_key_func(_iter, path_cost, goal_distance) if pqueue_key_func
+                else (est_total_cost, goal_distance, _iter)
+            )
+
+            # A state is the same node no matter which Action got us there, so a cheaper path to a state
+            # that's already queued replaces the queued copy (decrease-key), and a pricier one gets dropped.
+            # The blackboards keep their hash up to date as Effects get applied, so this doesn't rehash anything.
+            _pqueue.push(statehash(effects), (priority_key, path_cost, neigh), cand_node)
+            _generated += 1
+            continue
+
         neighbor_pair = evaluate_neighbor(
             check_preconds=preconditions_checker,
             neigh=neigh,
@@ -197,10 +479,10 @@ def _astar_deepening_search(
 
         stored_neigh_cost, stored_curr_parent, _ = _paths.get(neigh) or (PLUS_INF, None, None)
         total_cost = curr_cost + heuristic
-        src = effects["src"]
+        cand_node = SearchNode(neigh, parent=_node, cost=total_cost, blackboard=effects)
 
         if total_cost < stored_neigh_cost:
-            _paths[neigh] = (total_cost, start_pos, src)
+            _paths[neigh] = (total_cost, start_pos, cand_node)
 
         # =================== VERY VERY *VERY* IMPORTANT: ===================
         # Storing the iteration as the first element of the candidate
@@ -215,38 +497,30 @@ def _astar_deepening_search(
         # the search goal (in other words, depth-first search).
         # ===================================================================
         priority_key = pqueue_key_func(_iter, curr_cost, heuristic) if pqueue_key_func else (_iter,)
-        cand_tuple = (priority_key, total_cost, neigh, src)
 
-        if cand_tuple not in _pqueue and total_cost < PLUS_INF:
-            heapq.heappush(
-                _pqueue,
-                cand_tuple
+        if total_cost < PLUS_INF:
+            # If we already have this exact node queued up, we only keep whichever copy is better.
+            # The open list is indexed, so this is O(1) lookup + O(log n) update rather than a scan.
+            # If the queue is bounded (beam search), this evicts the worst candidate when full.
+            _pqueue.push(
+                candidate_key(neigh, effects, _generated, transposition_table),
+                (priority_key, total_cost, neigh),
+                cand_node,
             )
-            if max_queue_size is not None:
-                _pqueue = _pqueue[:max_queue_size]
+            _generated += 1
 
     if not _pqueue:
         raise EmptyQueueError("Exhausted all candidates before a path was found!")
 
-    cand_cost, cand_pos, src_pos = heapq.heappop(_pqueue)[1:]
-
-    fx_rebuilder = cached_parse_effects(
-        get_effects,
-        blackboard_default=blackboard_default,
-        blackboard_update_op=blackboard_update_op
-    )
-    stack = tuple(src_pos + [cand_pos])
-    cand_fx = fx_rebuilder(stack)
-
-    cand_blackboard = cand_fx
-    cand_blackboard["src"] = src_pos
+    _, _, cand_node = _pqueue.pop()
 
     result = True, dict(
-        start_pos=cand_pos,
+        start_pos=cand_node.pos,
         goal=goal,
         adjacency_gen=adjacency_gen,
         preconditions_checker=preconditions_checker,
-        curr_cost=cand_cost,
+        curr_cost=cand_node.cost,
+        node=cand_node,
         paths=_paths,
         visited=visited,
         neighbor_measure=_neighbor_measure,
@@ -254,15 +528,125 @@ def _astar_deepening_search(
         queue=_pqueue,
         goal_checker=_goal_check,
         get_effects=get_effects,
-        blackboard=cand_blackboard,
         blackboard_default=blackboard_default,
         blackboard_update_op=blackboard_update_op,
         max_queue_size=max_queue_size,
-        _iter=_iter+1
+        pqueue_key_func=pqueue_key_func,
+        transposition_table=transposition_table,
+        astar=astar,
+        _iter=_iter+1,
+        _generated=_generated,
     )
     return result
 
 
+class SearchContinuation:
+    """A trampolined search that ran out of budget, stopped right before its next step.
+
+    The search keeps all of its state (the queue, candidate paths, the transposition table...)
+    in the parameters of its next step, so picking up where it left off is just a matter of making that call.
+    Resuming it is much cheaper than retrying with a bigger budget, which redoes all the work done so far.
+    """
+    __slots__ = ("next_params", "handle_backtrack_node", "resumed")
+
+    def __init__(
+        self,
+        next_params: dict,
+        handle_backtrack_node: typing.Optional[typing.Callable[[typing.Any], typing.Any]] = None,
+    ):
+        self.next_params = next_params
+        self.handle_backtrack_node = handle_backtrack_node
+        self.resumed = False
+
+    def resume(
+        self,
+        extra_iters: typing.Optional[int] = None,
+        extra_generated: typing.Optional[int] = None,
+        deadline: typing.Optional[float] = None,
+    ) -> typing.Tuple[float, list]:
+        """Carries on with the search, within a new budget; any limit left as None is lifted.
+
+        :param extra_iters: Optional. How many more iterations the search gets.
+        :param extra_generated: Optional. How many more candidate nodes the search can generate.
+        :param deadline: Optional. A new time.monotonic() timestamp to give up at.
+        :raises: A NoPathError if the new budget runs out too (with a new continuation),
+                 an EmptyQueueError if there's nothing left to search.
+                 A RuntimeError if this continuation has already been resumed, as the search has moved on since.
+        :return: A (cost, plan) tuple, same as the planner that started the search would have returned.
+        """
+        if self.resumed:
+            raise RuntimeError("This search has already been resumed; use the continuation it raised with instead!")
+
+        self.resumed = True
+        curr_iter, generated = self.next_params["_iter"], self.next_params["_generated"]
+
+        budget = SearchBudget(
+            cutoff_iter=None if extra_iters is None else curr_iter + extra_iters,
+            deadline=deadline,
+            max_generated=None if extra_generated is None else generated + extra_generated,
+        )
+        return run_search(self.next_params, budget, handle_backtrack_node=self.handle_backtrack_node)
+
+
+def search_steps(
+    next_params: dict,
+    budget: typing.Optional[SearchBudget] = None,
+    handle_backtrack_node: typing.Optional[typing.Callable[[typing.Any], typing.Any]] = None,
+) -> typing.Generator[dict, None, typing.Tuple[float, list]]:
+    """Drives the trampolined search, i.e. feeds the outputs of each _astar_deepening_search() call back into it.
+
+    Yields the parameters of the next step after each one, and returns the (cost, path) of the plan it found,
+    having applied handle_backtrack_node (if any) to each of its nodes.
+    :raises: A NoPathError once the budget is spent, an EmptyQueueError if there's nothing left to search.
+    """
+    while True:
+        continue_search, next_params = _astar_deepening_search(**next_params)
+
+        if not continue_search:
+            break
+
+        if budget is not None:
+            node = next_params["node"]
+
+            try:
+                budget.check(
+                    next_params["_iter"],
+                    next_params["_generated"],
+                    queue_size=len(next_params["queue"]),
+                    best_partial_plan=lambda: (node.cost, node.path()),
+                )
+
+            except NoPathError as error:
+                error.continuation = SearchContinuation(next_params, handle_backtrack_node=handle_backtrack_node)
+                raise
+
+        yield next_params
+
+    best_cost, path = next_params
+
+    if handle_backtrack_node:
+        for parent_elem in path:
+            handle_backtrack_node(parent_elem)
+
+    return best_cost, path
+
+
+def run_search(
+    next_params: dict,
+    budget: typing.Optional[SearchBudget] = None,
+    handle_backtrack_node: typing.Optional[typing.Callable[[typing.Any], typing.Any]] = None,
+) -> typing.Tuple[float, list]:
+    """Runs search_steps() to completion, returning the (cost, path) of the plan it found."""
+    steps = search_steps(next_params, budget, handle_backtrack_node=handle_backtrack_node)
+
+    while True:
+        try:
+            next(steps)
+
+        except StopIteration as stop:
+            return stop.value
+
+
 def suppress_not_found(default, default_factory=None):
 
     def _noexc_deco(func):
@@ -0,0 +1,145 @@
+"""Goal Oriented Action Planning algorithm.
+
+This is the bounded-suboptimal variant - focal search (A*-epsilon), and weighted A* as the simpler alternative.
+
+The A* mode of goap.find_plan() finds the optimal plan, but to *prove* it's optimal, it has to expand
+every candidate that might still beat it - which, with a weak heuristic, is a lot of them.
+Plenty of use-cases would happily take a slightly worse plan in exchange for finding it sooner,
+as long as it can't be *much* worse.
+
+Both variants here trade plan quality for speed with a guarantee: given an admissible goal_measure,
+the plan costs at most `weight` times as much as the optimal one.
+
+- Weighted A* just orders the candidates by g + weight * h rather than g + h, which makes the search
+  greedier; it's a pqueue_key_func (see weighted_astar_key()) on top of the regular A* mode.
+- Focal search keeps the regular A* open list, but rather than always expanding the candidate
+  with the lowest f, it expands the best one by a secondary priority among all those within
+  weight * (the lowest f); see FocalOpenList. By default, that's the one closest to the goal (lowest h).
+
+Both run on the same core search as goap.find_plan(astar=True), just with a different open list or priorities.
+The bound gets reported along with the plan. For focal search, it's often tighter than the weight -
+the lowest f left in the open list once the plan is found is a lower bound on the optimal cost,
+so the plan is known to be within cost / (that bound) of the optimum.
+"""
+import typing
+
+from .common import (
+    PLUS_INF,
+    SearchBudget,
+    new_transposition_table,
+    notify_search_start,
+    run_search,
+    suppress_not_found,
+)
+from .openlist import FocalOpenList
+from ..state import State, STATE_TYPES
+from ..types import StateLike, ActionTuple, ActionKey, IntoState, BlackboardBinOp
+
+
+def weighted_astar_key(weight: float) -> typing.Callable[[int, float, float], tuple]:
+    """A pqueue_key_func for the A* mode that makes it a weighted A* - ordered by g + weight * h,
+    then by h, then by age. With an admissible heuristic, the plans cost at most weight times the optimum.
+    """
+    def _weighted_key(curr_iter: int, path_cost: float, goal_distance: float) -> tuple:
+        return path_cost + weight * goal_distance, goal_distance, curr_iter
+
+    return _weighted_key
+
+
+def find_plan(
+    start_pos: IntoState,
+    goal: IntoState,
+    adjacency_gen: typing.Callable[[StateLike], typing.Iterable[ActionTuple]],
+    preconditions_check: typing.Callable[[StateLike], bool],
+    handle_backtrack_node: typing.Optional[typing.Callable[[ActionTuple], typing.Any]] = None,
+    neighbor_measure: typing.Optional[typing.Callable[[StateLike], bool]] = None,
+    goal_measure: typing.Optional[typing.Callable[[IntoState], float]] = None,
+    goal_check: typing.Optional[typing.Callable[[StateLike], bool]] = None,
+    get_effects: typing.Optional[typing.Callable[[StateLike], float]] = None,
+    weight: float = 2.0,
+    focal: bool = True,
+    cutoff_iter: typing.Optional[int] = 1000,
+    pqueue_key_func: typing.Optional[typing.Callable] = None,
+    blackboard_default: typing.Any = 0,
+    blackboard_update_op: typing.Optional[typing.Union[BlackboardBinOp, typing.Dict[ActionKey, BlackboardBinOp]]] = None,
+    use_transposition_table: bool = True,
+    deadline: typing.Optional[float] = None,
+    max_generated: typing.Optional[int] = None,
+) -> typing.Tuple[float, list, float]:
+    """Run a bounded-suboptimal GOAP planner to achieve a specified goal state given an initial state.
+    Takes the same callbacks as goap.find_plan(..., astar=True), plus a weight bounding how far from optimal it may go.
+
+    :param weight: Optional. How much worse than optimal the plan is allowed to be, as a factor. Default 2.
+                   A weight of 1 is a plain A* (with ties going to the secondary priority, for focal search).
+    :param focal: Optional boolean. If True (default), runs a focal search; if False, a weighted A*.
+    :param pqueue_key_func: Optional. Same as for goap.find_plan(..., astar=True). For focal search, the first element
+                            of the key must be f = g + h; the rest of it is the secondary priority for the focal list.
+                            E.g. `lambda it, g, h: (g + h, -g, it)` prefers the candidates furthest along their plans.
+                            Weighted A* ignores it, as it uses weighted_astar_key() instead.
+    :param cutoff_iter: Optional. Budget for the number of planning iterations. Default 1000.
+    :param deadline: Optional. A time.monotonic() timestamp after which the planner gives up.
+    :param max_generated: Optional. Budget for the number of candidate nodes generated.
+    :raises: A NoPathError if no solution was found within the budget, same as goap.find_plan().
+             Resuming its continuation returns just the (cost, plan), without the bound.
+             A ValueError if the weight is less than 1.
+    :return: A (cost, plan, bound) tuple if a plan was found. Given an admissible goal_measure,
+             the plan costs at most bound times as much as the optimal one; the bound is never more than the weight.
+    """
+    if weight < 1:
+        raise ValueError(f"The suboptimality weight must be at least 1, got {weight}!")
+
+    _start_pos = start_pos
+    if not isinstance(start_pos, STATE_TYPES):
+        _start_pos = State.fromdict(start_pos, name="START")
+
+    _goal = goal
+    if not isinstance(goal, STATE_TYPES):
+        _goal = State.fromdict(goal, name="END")
+
+    transposition_table = None
+
+    if use_transposition_table:
+        transposition_table = new_transposition_table(_start_pos, astar=True)
+
+    notify_search_start(goal_measure, _start_pos, _goal)
+    queue = FocalOpenList(weight=weight) if focal else None
+
+    next_params = dict(
+        adjacency_gen=adjacency_gen,
+        preconditions_checker=preconditions_check,
+        start_pos=_start_pos,
+        goal=_goal,
+        neighbor_measure=neighbor_measure,
+        goal_measure=goal_measure,
+        goal_checker=goal_check,
+        get_effects=get_effects,
+        queue=queue,
+        pqueue_key_func=pqueue_key_func if focal else weighted_astar_key(weight),
+        blackboard_default=blackboard_default,
+        blackboard_update_op=blackboard_update_op,
+        transposition_table=transposition_table,
+        astar=True,
+    )
+
+    budget = SearchBudget(cutoff_iter=cutoff_iter, deadline=deadline, max_generated=max_generated)
+    cost, path = run_search(next_params, budget, handle_backtrack_node=handle_backtrack_node)
+
+    if not focal:
+        return cost, path, weight
+
+    # Nothing left in the open list (and so, nothing that could still lead to a better plan) has a lower f.
+    lower_bound = min(queue.min_f(), cost)
+
+    if not lower_bound < cost:
+        bound = 1.0
+    elif lower_bound > 0:
+        bound = min(weight, cost / lower_bound)
+    else:
+        bound = weight
+
+    return cost, path, bound
+
+
+@suppress_not_found(default=None, default_factory=lambda: (PLUS_INF, list(), PLUS_INF))
+def maybe_find_plan(*args, **kwargs):
+    return find_plan(*args, **kwargs)
@@ -38,8 +38,16 @@ any *other* functions than the next worker call anyway.
 """
 import typing
 
-from.common import NoPathError, PLUS_INF, _astar_deepening_search, suppress_not_found
-from ..state import State
+from.common import (
+    NoPathError,
+    PLUS_INF,
+    SearchBudget,
+    new_transposition_table,
+    notify_search_start,
+    run_search,
+    suppress_not_found,
+)
+from ..state import State, STATE_TYPES
 from ..types import StateLike, ActionTuple, ActionKey, IntoState, PathTuple, BlackboardBinOp
 
 
@@ -61,17 +69,20 @@ def find_plan(
     blackboard_default: typing.Any = 0,
     blackboard_update_op: typing.Optional[typing.Union[BlackboardBinOp, typing.Dict[ActionKey, BlackboardBinOp]]] = None,
     use_transposition_table: bool = True,
+    astar: bool = False,
+    deadline: typing.Optional[float] = None,
+    max_generated: typing.Optional[int] = None,
 ):
     """Run a GOAP planner to achieve a specified goal state given an initial state.
     This is an NP-hard problem; the planner is NOT guaranteed to find a plan in a sane amount of time.
     As such, you can specify a planning budget; the planner can either return a (cost, plan) pair
     or throw a NoPathError exception if no plan was found within the assigned budget.
 
-    :param start_pos: Initial state, either a State class from this package or just a plain old dict.
+    :param start_pos: Initial state, either a State/FrozenState class from this package or just a plain old dict.
                       In the latter case, keys are ideally strings, values ideally float or int.
     :param goal: The state we want to have after the final action in a valid plan.
                  Depending on goal_check, may only be a minimum (i.e. can overperform).
-                 Either a State class from this package or just a plain old dict.
+                 Either a State/FrozenState class from this package or just a plain old dict.
                  In the latter case, keys are ideally strings, values ideally float or int.
     :param adjacency_gen: A callable that, given an action key, returns an iterable
                           of 'neighboring' action keys we can reach from there.
@@ -117,7 +128,8 @@ def find_plan(
                         Sadly, the right value to use depends heavily on *all the other parameters*.
                         The test cases all generally finish within 20k iterations at worst.
     :param max_queue_size: Optional. Memory budget. If set (off by default), the search algorithm becomes a beam search.
-                           This will limit the maximum RAM consumption.
+                           This will limit the maximum RAM consumption; once the queue is full,
+                           the worst-ranked candidates get evicted to make room for better ones.
                            The effect on the results is a gamble - sometimes you may get a solution faster,
                            sometimes it will fail to find a solution where it succeeded before.
                            Broadly, more complex, multi-step plans require a higher budget (or no limit).
@@ -142,24 +154,46 @@ def find_plan(
                                     1) Your use-case DOES care about paths that are different but equivalent, somehow.
                                     2) You have really large states and discover the hashing required is a bottleneck.
                                     3) You need a coffee break so you want the code to run slower.
-    :raises: A NoPathError if no solution was found within the budget
+    :param astar: Optional boolean. If True (off by default), runs a textbook A* rather than the default
+                  breadth-first-ish search: candidates are ordered by f = g + h, where g is the actual
+                  cost of the plan so far (the sum of neighbor_measure) and h is the goal_measure,
+                  tie-broken by h and then by age. In this mode, goal_measure is called with the state
+                  each candidate results in (rather than the Action) and the goal, and defaults to 0.
+                  The reported cost is then the actual cost of the plan, without any heuristics mixed in.
+                  With an admissible goal_measure (one that never overestimates), the plan is optimal;
+                  the more informative it is, the fewer iterations it takes to find it.
+                  Candidates are queued by the state they result in, so finding a cheaper way to a state
+                  that's already queued updates the queued one in place, with or without use_transposition_table.
+    :param deadline: Optional. A wall-clock budget - a point in time as per time.monotonic() (e.g. now + 0.005)
+                     after which the planner gives up. Unlike cutoff_iter, this doesn't depend on how
+                     expensive your callbacks are, which makes it the natural fit for a frame budget.
+    :param max_generated: Optional. Budget for the number of candidate nodes generated (pushed onto the queue).
+                          This tracks the memory and callback cost of a search more closely than cutoff_iter,
+                          as each iteration can generate anywhere from zero to all the Actions' worth of nodes.
+    :raises: A NoPathError if no solution was found within the budget (any of them); it carries the search stats
+             and the best partial plan so far, as its .stats and .best_partial_plan attributes.
+             Its .continuation can resume() the search with more budget, picking up exactly where it stopped -
+             much cheaper than calling find_plan() again with a bigger budget, which would redo all the work so far.
     :return: A (cost, plan) tuple if a plan was found.
     """
 
     _start_pos = start_pos
-    if not isinstance(start_pos, State):
+    if not isinstance(start_pos, STATE_TYPES):
         _start_pos = State.fromdict(start_pos, name="START")
 
     _goal = goal
-    if not isinstance(goal, State):
+    if not isinstance(goal, STATE_TYPES):
         _goal = State.fromdict(goal, name="END")
 
     transposition_table = None
 
     if use_transposition_table:
-        transposition_table = {_start_pos.as_hash()}
+        transposition_table = new_transposition_table(_start_pos, astar=astar)
 
-    continue_search, next_params = True, dict(
+    if astar:
+        notify_search_start(goal_measure, _start_pos, _goal)
+
+    next_params = dict(
         adjacency_gen=adjacency_gen,
         preconditions_checker=preconditions_check,
         start_pos=_start_pos,
@@ -175,32 +209,11 @@ def find_plan(
         blackboard_default=blackboard_default,
         blackboard_update_op=blackboard_update_op,
         transposition_table=transposition_table,
+        astar=astar,
     )
 
-    best_cost, best_parent = None, None
-    curr_iter = 0
-
-    while next_params:
-        continue_search, next_params = _astar_deepening_search(**next_params)
-
-        if continue_search:
-
-            if cutoff_iter is not None:
-                curr_iter = next_params.get("_iter") or curr_iter + 1
-                if curr_iter >= cutoff_iter:
-                    raise NoPathError(f"Path not found within {cutoff_iter} iterations!")
-
-        else:
-            best_cost, best_parent = next_params
-            break
-
-    parent_cost, path = best_cost, best_parent
-
-    if handle_backtrack_node:
-        for parent_elem in path:
-            handle_backtrack_node(parent_elem)
-
-    return best_cost, path
+    budget = SearchBudget(cutoff_iter=cutoff_iter, deadline=deadline, max_generated=max_generated)
+    return run_search(next_params, budget, handle_backtrack_node=handle_backtrack_node)
 
 
 @suppress_not_found(default=None, default_factory=lambda: (PLUS_INF, list()))
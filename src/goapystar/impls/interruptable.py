@@ -3,14 +3,47 @@
 This is the interruptable variant.
 The planner here is a lazy generator that yields current run's params.
 This allows the search to be abandoned early, paused, or continued past the current point.
+
+There is also an anytime variant (plan_anytime()), for when there's a hard deadline to plan within:
+it is a generator too, but yields progressively better *plans* instead, using Anytime Repairing A* (ARA*):
+
+- It starts off as a weighted A* (f = g + weight * h) with a high weight, which is greedy
+  and finds *a* plan quickly, though one that may cost up to `weight` times more than the best.
+- Then it lowers the weight and carries on from where it was rather than starting over.
+  States whose cost went down since they were expanded are the only ones re-expanded, at most once per round.
+- Each round yields the best plan so far and a bound on how far from optimal it can be,
+  down to 1.0 (optimal, given an admissible goal_measure) once the weight reaches 1.
+
+Whenever the deadline or the budget runs out, the best plan found so far is what you get.
 """
 import typing
 
-from .common import NoPathError, _astar_deepening_search, PLUS_INF
-from ..state import State
+from .common import (
+    NoPathError,
+    EmptyQueueError,
+    PLUS_INF,
+    SearchBudget,
+    search_steps,
+    evaluate_neighbor_astar,
+    new_root_node,
+    notify_search_start,
+)
+from .nodes import SearchNode
+from .openlist import IndexedOpenList
+from ..measures import equality_check, no_goal_heuristic, zero_heuristic
+from ..state import State, STATE_TYPES, statehash
 from ..types import StateLike, ActionTuple, ActionKey, IntoState, PathTuple, BlackboardBinOp
 
 
+class AnytimePlan(typing.NamedTuple):
+    cost: float
+    path: typing.List[IntoState]
+    # The plan costs at most this many times as much as the optimal one.
+    bound: float
+    # The heuristic weight of the round that produced it.
+    weight: float
+
+
 def plan_interruptible(
     start_pos: IntoState,
     goal: IntoState,
@@ -28,17 +61,20 @@ def plan_interruptible(
     pqueue_key_func: typing.Optional[typing.Callable] = None,
     blackboard_default: typing.Any = 0,
     blackboard_update_op: typing.Optional[typing.Union[BlackboardBinOp, typing.Dict[ActionKey, BlackboardBinOp]]] = None,
+    astar: bool = False,
+    deadline: typing.Optional[float] = None,
+    max_generated: typing.Optional[int] = None,
 ):
 
     _start_pos = start_pos
-    if not isinstance(start_pos, State):
+    if not isinstance(start_pos, STATE_TYPES):
         _start_pos = State.fromdict(start_pos, name="START")
 
     _goal = goal
-    if not isinstance(goal, State):
+    if not isinstance(goal, STATE_TYPES):
         _goal = State.fromdict(goal, name="END")
 
-    continue_search, next_params = True, dict(
+    next_params = dict(
         adjacency_gen=adjacency_gen,
         preconditions_checker=preconditions_check,
         start_pos=_start_pos,
@@ -53,34 +89,11 @@ def plan_interruptible(
         pqueue_key_func=pqueue_key_func,
         blackboard_default=blackboard_default,
         blackboard_update_op=blackboard_update_op,
+        astar=astar,
     )
 
-    best_cost, best_parent = None, None
-    curr_iter = 0
-
-    while next_params:
-        continue_search, next_params = _astar_deepening_search(**next_params)
-
-        if continue_search:
-
-            if cutoff_iter is not None:
-                curr_iter = next_params.get("_iter") or curr_iter + 1
-                if curr_iter >= cutoff_iter:
-                    raise NoPathError(f"Path not found within {cutoff_iter} iterations!")
-
-                yield next_params
-
-        else:
-            best_cost, best_parent = next_params
-            break
-
-    parent_cost, path = best_cost, best_parent
-
-    if handle_backtrack_node:
-        for parent_elem in path:
-            handle_backtrack_node(parent_elem)
-
-    print(curr_iter)
+    budget = SearchBudget(cutoff_iter=cutoff_iter, deadline=deadline, max_generated=max_generated)
+    best_cost, path = yield from search_steps(next_params, budget, handle_backtrack_node=handle_backtrack_node)
     return best_cost, path
 
 
@@ -101,6 +114,9 @@ def find_plan(
     pqueue_key_func: typing.Optional[typing.Callable] = None,
     blackboard_default: typing.Any = 0,
     blackboard_update_op: typing.Optional[typing.Union[BlackboardBinOp, typing.Dict[ActionKey, BlackboardBinOp]]] = None,
+    astar: bool = False,
+    deadline: typing.Optional[float] = None,
+    max_generated: typing.Optional[int] = None,
 ):
 
     plan_loop = plan_interruptible(
@@ -119,7 +135,10 @@ def find_plan(
         max_queue_size=max_queue_size,
         pqueue_key_func=pqueue_key_func,
         blackboard_default=blackboard_default,
-        blackboard_update_op=blackboard_update_op
+        blackboard_update_op=blackboard_update_op,
+        astar=astar,
+        deadline=deadline,
+        max_generated=max_generated,
     )
 
     result = None
@@ -142,3 +161,252 @@ def find_plan(
     return cost, path
 
 
+def plan_anytime(
+    start_pos: IntoState,
+    goal: IntoState,
+    adjacency_gen: typing.Callable[[StateLike], typing.Iterable[ActionTuple]],
+    preconditions_check: typing.Callable[[StateLike], bool],
+    neighbor_measure: typing.Optional[typing.Callable[[StateLike], bool]] = None,
+    goal_measure: typing.Optional[typing.Callable[[IntoState], float]] = None,
+    goal_check: typing.Optional[typing.Callable[[StateLike], bool]] = None,
+    get_effects: typing.Optional[typing.Callable[[StateLike], float]] = None,
+    deadline: typing.Optional[float] = None,
+    cutoff_iter: typing.Optional[int] = None,
+    initial_weight: float = 3.0,
+    weight_step: float = 0.5,
+    blackboard_default: typing.Any = 0,
+    blackboard_update_op: typing.Optional[typing.Union[BlackboardBinOp, typing.Dict[ActionKey, BlackboardBinOp]]] = None,
+    max_generated: typing.Optional[int] = None,
+) -> typing.Generator[AnytimePlan, None, AnytimePlan]:
+    """Anytime Repairing A* - yields an AnytimePlan each time it finds a better plan (or a tighter bound).
+    The callbacks work the same as for find_plan(..., astar=True).
+
+    :param deadline: Optional. A time.monotonic() timestamp to stop searching at.
+    :param cutoff_iter: Optional. Budget for the total number of expanded nodes, over all the rounds.
+    :param max_generated: Optional. Budget for the total number of generated nodes, over all the rounds.
+    :param initial_weight: How much to inflate the goal_measure by in the first round; >= 1.
+    :param weight_step: How much to lower the weight by after each round (down to 1).
+    :raises: A NoPathError if the deadline or budget ran out before any plan was found,
+             an EmptyQueueError if there is no plan at all.
+    :return: (as the StopIteration value) The last, best, plan - once it's proven optimal or the time is up.
+    """
+    if initial_weight < 1:
+        raise ValueError(f"The heuristic weight must be at least 1, got {initial_weight}!")
+
+    if weight_step <= 0:
+        raise ValueError(f"The weight step must be positive, got {weight_step}!")
+
+    _start_pos = start_pos
+    if not isinstance(start_pos, STATE_TYPES):
+        _start_pos = State.fromdict(start_pos, name="START")
+
+    _goal = goal
+    if not isinstance(goal, STATE_TYPES):
+        _goal = State.fromdict(goal, name="END")
+
+    _neighbor_measure = neighbor_measure or no_goal_heuristic
+    _goal_measure = goal_measure or zero_heuristic
+    _goal_check = goal_check or equality_check
+
+    root = new_root_node(
+        _start_pos,
+        blackboard_default=blackboard_default,
+        blackboard_update_op=blackboard_update_op,
+    )
+    notify_search_start(_goal_measure, root.blackboard, _goal)
+
+    if _goal_check(root.blackboard, _goal):
+        return AnytimePlan(0, root.path(), 1.0, initial_weight)
+
+    root_hash = statehash(root.blackboard)
+    # The cheapest known cost of each state - this also serves as the transposition table for evaluate_neighbor_astar().
+    best_costs = {root_hash: 0}
+    goal_distances = {root_hash: _goal_measure(root.blackboard, _goal)}
+
+    weight = initial_weight
+    queue = IndexedOpenList()
+    closed = set()
+    # States that got cheaper after they were expanded this round; they get another go in the next one.
+    inconsistent = {}
+    incumbent = None
+    last_plan = None
+    budget = SearchBudget(cutoff_iter=cutoff_iter, deadline=deadline, max_generated=max_generated)
+    curr_iter = 0
+    generated = 0
+
+    queue.push(root_hash, (weight * goal_distances[root_hash], goal_distances[root_hash], curr_iter), root)
+
+    def _current_plan(round_finished: bool = True) -> AnytimePlan:
+        # Nothing left unexplored can lead to a plan cheaper than the cheapest f = g + h out there.
+        lower_bound = min(
+            (cand_node.cost + goal_distances[cand_hash] for (_, cand_hash, cand_node) in queue),
+            default=PLUS_INF,
+        )
+        lower_bound = min(
+            lower_bound,
+            min((cand_node.cost + goal_distances[cand_hash] for (cand_hash, cand_node) in inconsistent.items()),
+                default=PLUS_INF),
+            incumbent.cost,
+        )
+
+        bound = PLUS_INF if lower_bound <= 0 else incumbent.cost / lower_bound
+
+        if round_finished:
+            # A completed round of weighted A* also guarantees it's within the weight of the optimum.
+            bound = min(bound, weight)
+
+        return AnytimePlan(incumbent.cost, incumbent.path(), max(bound, 1.0), weight)
+
+    while True:
+        # Keep expanding until nothing in the queue could beat the incumbent, even with the inflated heuristic.
+        while queue:
+            priority, _, _ = queue.peek()
+
+            if incumbent is not None and incumbent.cost <= priority[0]:
+                break
+
+            curr_iter += 1
+
+            if budget.exceeded(curr_iter, generated):
+                if incumbent is None:
+                    _, _, next_node = queue.peek()
+                    budget.check(
+                        curr_iter,
+                        generated,
+                        queue_size=len(queue),
+                        best_partial_plan=lambda: (next_node.cost, next_node.path()),
+                    )
+
+                plan = _current_plan(round_finished=False)
+
+                if last_plan is not None and plan.cost == last_plan.cost and last_plan.bound < plan.bound:
+                    # Same plan as we already published, and we had proven it better than this back then.
+                    plan = plan._replace(bound=last_plan.bound)
+
+                return plan
+
+            _, node_hash, node = queue.pop()
+            closed.add(node_hash)
+
+            for neigh in adjacency_gen(node.pos):
+                neighbor_triple = evaluate_neighbor_astar(
+                    check_preconds=preconditions_check,
+                    neigh=neigh,
+                    current_pos=node.pos,
+                    goal=_goal,
+                    curr_cost=node.cost,
+                    neighbor_measure=_neighbor_measure,
+                    goal_measure=_goal_measure,
+                    blackboard=node.blackboard,
+                    blackboard_default=blackboard_default,
+                    blackboard_update_op=blackboard_update_op,
+                    get_effects=get_effects,
+                    transposition_table=best_costs,
+                )
+
+                if not neighbor_triple:
+                    continue
+
+                path_cost, goal_distance, effects = neighbor_triple
+
+                if not path_cost + goal_distance < PLUS_INF:
+                    continue
+
+                cand_node = SearchNode(neigh, parent=node, cost=path_cost, blackboard=effects)
+                generated += 1
+
+                if _goal_check(effects, _goal):
+                    # Costs are non-negative, so there's no point going any further from a goal state.
+                    if incumbent is None or path_cost < incumbent.cost:
+                        incumbent = cand_node
+                    continue
+
+                cand_hash = statehash(effects)
+                goal_distances[cand_hash] = goal_distance
+
+                if cand_hash in closed:
+                    inconsistent[cand_hash] = cand_node
+                else:
+                    queue.push(cand_hash, (path_cost + weight * goal_distance, goal_distance, curr_iter), cand_node)
+
+        if incumbent is None:
+            raise EmptyQueueError("Exhausted all candidates before a path was found!")
+
+        plan = _current_plan()
+
+        if last_plan is None or plan.cost < last_plan.cost or plan.bound < last_plan.bound:
+            last_plan = plan
+            yield plan
+
+        if weight <= 1 or plan.bound <= 1:
+            return plan
+
+        # Next round - tighten the weight, requeue everything with it, and let closed states be expanded again.
+        weight = max(1.0, weight - weight_step)
+        pending = [(cand_hash, cand_node) for (_, cand_hash, cand_node) in queue]
+        pending.extend(inconsistent.items())
+
+        queue = IndexedOpenList()
+        for (cand_hash, cand_node) in pending:
+            goal_distance = goal_distances[cand_hash]
+            queue.push(cand_hash, (cand_node.cost + weight * goal_distance, goal_distance, curr_iter), cand_node)
+
+        inconsistent = {}
+        closed = set()
+
+
+def find_plan_anytime(
+    start_pos: IntoState,
+    goal: IntoState,
+    adjacency_gen: typing.Callable[[StateLike], typing.Iterable[ActionTuple]],
+    preconditions_check: typing.Callable[[StateLike], bool],
+    handle_backtrack_node: typing.Optional[typing.Callable[[ActionTuple], typing.Any]] = None,
+    neighbor_measure: typing.Optional[typing.Callable[[StateLike], bool]] = None,
+    goal_measure: typing.Optional[typing.Callable[[IntoState], float]] = None,
+    goal_check: typing.Optional[typing.Callable[[StateLike], bool]] = None,
+    get_effects: typing.Optional[typing.Callable[[StateLike], float]] = None,
+    deadline: typing.Optional[float] = None,
+    cutoff_iter: typing.Optional[int] = None,
+    initial_weight: float = 3.0,
+    weight_step: float = 0.5,
+    blackboard_default: typing.Any = 0,
+    blackboard_update_op: typing.Optional[typing.Union[BlackboardBinOp, typing.Dict[ActionKey, BlackboardBinOp]]] = None,
+    max_generated: typing.Optional[int] = None,
+) -> AnytimePlan:
+    """Runs plan_anytime() until the plan is proven optimal or the deadline/budget runs out.
+
+    :return: The best AnytimePlan found - a (cost, path, bound, weight) tuple.
+    """
+    plan_loop = plan_anytime(
+        start_pos=start_pos,
+        goal=goal,
+        adjacency_gen=adjacency_gen,
+        preconditions_check=preconditions_check,
+        neighbor_measure=neighbor_measure,
+        goal_measure=goal_measure,
+        goal_check=goal_check,
+        get_effects=get_effects,
+        deadline=deadline,
+        cutoff_iter=cutoff_iter,
+        initial_weight=initial_weight,
+        weight_step=weight_step,
+        blackboard_default=blackboard_default,
+        blackboard_update_op=blackboard_update_op,
+        max_generated=max_generated,
+    )
+
+    best_plan = None
+
+    while True:
+        try:
+            best_plan = next(plan_loop)
+
+        except StopIteration as stop:
+            best_plan = stop.value or best_plan
+            break
+
+    if handle_backtrack_node:
+        for parent_elem in best_plan.path:
+            handle_backtrack_node(parent_elem)
+
+    return best_plan
@@ -0,0 +1,190 @@
+"""Goal Oriented Action Planning algorithm.
+
+This is the memory-bounded variant, using Iterative Deepening A* (IDA*).
+
+The other planners keep every candidate they've generated around in the open list; on hard
+problems, that list (and the transposition table) is what eats all the RAM. Capping it with
+max_queue_size turns the search into a beam search, which can throw away the only way to the goal.
+
+IDA* doesn't keep an open list at all. It runs a series of depth-first searches, each one
+pruning anything whose f = g + h goes over a bound; the first bound is the estimate for the start
+state, and each next one is the smallest f that got pruned by the one before. All it needs to hold
+on to is the current path and the siblings of the nodes on it - O(depth * branching) rather than
+O(everything generated so far). With an admissible goal_measure, the first plan found is optimal,
+same as the A* mode of goap.find_plan().
+
+The catch is that plain IDA* re-explores states it reaches by different paths over and over.
+To keep that in check, each round also remembers the cheapest cost each state was reached with
+in a transposition cache of a fixed size; once the cache is full, new states just don't get cached
+and the search carries on (correctly, if less efficiently), so memory use stays flat either way.
+"""
+import typing
+
+from .common import (
+    NoPathError,
+    EmptyQueueError,
+    PLUS_INF,
+    SearchBudget,
+    evaluate_neighbor_astar,
+    new_root_node,
+    notify_search_start,
+    suppress_not_found,
+)
+from .nodes import SearchNode
+from ..measures import equality_check, no_goal_heuristic, zero_heuristic
+from ..state import State, STATE_TYPES, statehash
+from ..types import StateLike, ActionTuple, ActionKey, IntoState, BlackboardBinOp
+
+# Children of a node on the current path, cheapest (by f) last - i.e. on top, as we pop them off the end.
+Siblings = typing.List[typing.Tuple[float, float, int, SearchNode]]
+
+
+def find_plan(
+    start_pos: IntoState,
+    goal: IntoState,
+    adjacency_gen: typing.Callable[[StateLike], typing.Iterable[ActionTuple]],
+    preconditions_check: typing.Callable[[StateLike], bool],
+    handle_backtrack_node: typing.Optional[typing.Callable[[ActionTuple], typing.Any]] = None,
+    neighbor_measure: typing.Optional[typing.Callable[[StateLike], bool]] = None,
+    goal_measure: typing.Optional[typing.Callable[[IntoState], float]] = None,
+    goal_check: typing.Optional[typing.Callable[[StateLike], bool]] = None,
+    get_effects: typing.Optional[typing.Callable[[StateLike], float]] = None,
+    cutoff_iter: typing.Optional[int] = 1000,
+    max_cache_size: typing.Optional[int] = 10000,
+    blackboard_default: typing.Any = 0,
+    blackboard_update_op: typing.Optional[typing.Union[BlackboardBinOp, typing.Dict[ActionKey, BlackboardBinOp]]] = None,
+    deadline: typing.Optional[float] = None,
+    max_generated: typing.Optional[int] = None,
+):
+    """Run a memory-bounded (IDA*) GOAP planner to achieve a specified goal state given an initial state.
+    The callbacks are those of goap.find_plan(..., astar=True); only the bookkeeping is different.
+
+    :param cutoff_iter: Optional. Budget for the number of nodes expanded, over all the rounds. Default 1000.
+                        IDA* re-expands the shallower nodes in each round, so it takes more iterations
+                        than A* to find the same plan - that's the price of not keeping them in memory.
+    :param max_cache_size: Optional. How many states the transposition cache can hold. Default 10000.
+                           Bigger caches prune more duplicates; None for no limit (which is no longer memory-bounded).
+    :param deadline: Optional. A time.monotonic() timestamp after which the planner gives up.
+    :param max_generated: Optional. Budget for the number of candidate nodes generated, over all the rounds.
+    :raises: A NoPathError if no solution was found within the budget (with the search stats and the node
+             being expanded as the best partial plan), an EmptyQueueError if there is no plan at all.
+    :return: A (cost, plan) tuple if a plan was found.
+    """
+    _start_pos = start_pos
+    if not isinstance(start_pos, STATE_TYPES):
+        _start_pos = State.fromdict(start_pos, name="START")
+
+    _goal = goal
+    if not isinstance(goal, STATE_TYPES):
+        _goal = State.fromdict(goal, name="END")
+
+    _neighbor_measure = neighbor_measure or no_goal_heuristic
+    _goal_measure = goal_measure or zero_heuristic
+    _goal_check = goal_check or equality_check
+
+    root = new_root_node(
+        _start_pos,
+        blackboard_default=blackboard_default,
+        blackboard_update_op=blackboard_update_op,
+    )
+    notify_search_start(_goal_measure, root.blackboard, _goal)
+
+    def _expand(node: SearchNode) -> Siblings:
+        children = []
+
+        for neigh in adjacency_gen(node.pos):
+            neighbor_triple = evaluate_neighbor_astar(
+                check_preconds=preconditions_check,
+                neigh=neigh,
+                current_pos=node.pos,
+                goal=_goal,
+                curr_cost=node.cost,
+                neighbor_measure=_neighbor_measure,
+                goal_measure=_goal_measure,
+                blackboard=node.blackboard,
+                blackboard_default=blackboard_default,
+                blackboard_update_op=blackboard_update_op,
+                get_effects=get_effects,
+            )
+
+            if not neighbor_triple:
+                continue
+
+            path_cost, goal_distance, effects = neighbor_triple
+            cand_node = SearchNode(neigh, parent=node, cost=path_cost, blackboard=effects)
+            # The index keeps the sort away from comparing the nodes themselves.
+            children.append((path_cost + goal_distance, goal_distance, -len(children), cand_node))
+
+        children.sort(reverse=True)
+        return children
+
+    budget = SearchBudget(cutoff_iter=cutoff_iter, deadline=deadline, max_generated=max_generated)
+    curr_iter, generated = 0, 0
+    found = root if _goal_check(root.blackboard, _goal) else None
+    bound = _goal_measure(root.blackboard, _goal)
+
+    while found is None:
+        if not bound < PLUS_INF:
+            raise EmptyQueueError("Exhausted all candidates before a path was found!")
+
+        # The smallest f that went over this round's bound - the bound for the next round, if there is one.
+        next_bound = PLUS_INF
+        cache = {statehash(root.blackboard): 0}
+
+        curr_iter += 1
+        root_children = _expand(root)
+        generated += len(root_children)
+        stack = [root_children]
+
+        while stack:
+            siblings = stack[-1]
+
+            if not siblings:
+                stack.pop()
+                continue
+
+            est_total_cost, _, _, node = siblings.pop()
+
+            if est_total_cost > bound:
+                next_bound = min(next_bound, est_total_cost)
+                continue
+
+            if _goal_check(node.blackboard, _goal):
+                found = node
+                break
+
+            state_hash = statehash(node.blackboard)
+
+            if cache.get(state_hash, PLUS_INF) <= node.cost:
+                # We've already been through here at least as cheaply this round, and so seen all it leads to.
+                continue
+
+            if max_cache_size is None or len(cache) < max_cache_size or state_hash in cache:
+                cache[state_hash] = node.cost
+
+            curr_iter += 1
+            budget.check(
+                curr_iter,
+                generated,
+                queue_size=sum(len(level) for level in stack),
+                best_partial_plan=lambda: (node.cost, node.path()),
+            )
+
+            children = _expand(node)
+            generated += len(children)
+            stack.append(children)
+
+        bound = next_bound
+
+    path = found.path()
+
+    if handle_backtrack_node:
+        for parent_elem in path:
+            handle_backtrack_node(parent_elem)
+
+    return found.cost, path
+
+
+@suppress_not_found(default=None, default_factory=lambda: (PLUS_INF, list()))
+def maybe_find_plan(*args, **kwargs):
+    return find_plan(*args, **kwargs)
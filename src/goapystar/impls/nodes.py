@@ -0,0 +1,42 @@
+"""Search tree nodes for the planners.
+
+Rather than having each candidate carry its own copy of the path that led to it,
+each node only remembers its parent and the position (Action) it represents.
+Nodes share their ancestors, so storing N candidates of depth D costs O(N)
+rather than O(N * D) - the full path only gets rebuilt once we have a winner.
+
+Each node also holds on to the blackboard (projected state) it results in,
+so expanding it later doesn't require replaying the Effects of the whole path.
+"""
+import typing
+
+
+class SearchNode:
+    __slots__ = ("pos", "parent", "cost", "depth", "blackboard")
+
+    def __init__(
+        self,
+        pos: typing.Any,
+        parent: typing.Optional["SearchNode"] = None,
+        cost: float = 0,
+        blackboard: typing.Any = None,
+    ):
+        self.pos = pos
+        self.parent = parent
+        self.cost = cost
+        self.blackboard = blackboard
+        self.depth = 0 if parent is None else parent.depth + 1
+
+    def path(self) -> typing.List[typing.Any]:
+        """Rebuilds the sequence of positions from the root of the search tree to this node (inclusive)."""
+        path = [None] * (self.depth + 1)
+        node = self
+
+        while node is not None:
+            path[node.depth] = node.pos
+            node = node.parent
+
+        return path
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.pos!r} (depth={self.depth}, cost={self.cost})>"
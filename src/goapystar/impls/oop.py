@@ -8,15 +8,17 @@ import abc
 import functools
 import typing
 
-from .common import NoPathError, PLUS_INF, _astar_deepening_search
-from ..state import State
+from .common import NoPathError, PLUS_INF, SearchBudget, run_search
+from ..state import State, STATE_TYPES
 from ..types import StateLike, ActionTuple, IntoState, BlackboardBinOp, ActionKey, PathTuple, ResultTuple
 
 
 class BaseGOAP(abc.ABC):
     cutoff_iter = 20000
+    max_generated = None
     max_queue_size = None
     blackboard_default = 0
+    astar = False
 
     def __init__(
         self,
@@ -28,10 +30,12 @@ class BaseGOAP(abc.ABC):
         goal_check: typing.Optional[typing.Callable[[StateLike], bool]] = None,
         get_effects: typing.Optional[typing.Callable[[StateLike], float]] = None,
         cutoff_iter: typing.Optional[int] = None,
+        max_generated: typing.Optional[int] = None,
         max_queue_size: typing.Optional[int] = None,
         pqueue_key_func: typing.Optional[typing.Callable] = None,
         blackboard_default: typing.Any = None,
         blackboard_update_op: typing.Optional[typing.Union[BlackboardBinOp, typing.Dict[ActionKey, BlackboardBinOp]]] = None,
+        astar: typing.Optional[bool] = None,
         *args,
         **kwargs,
     ):
@@ -44,10 +48,12 @@ class BaseGOAP(abc.ABC):
         self.goal_check = goal_check or self.goal_check
         self.get_effects = get_effects or self.get_effects
         self.cutoff_iter = cutoff_iter or self.cutoff_iter
+        self.max_generated = max_generated or self.max_generated
         self.max_queue_size = max_queue_size or self.max_queue_size
         self.blackboard_default = blackboard_default or None
         self.blackboard_update_op = blackboard_update_op or None
         self.pqueue_key_func = pqueue_key_func or None
+        self.astar = self.astar if astar is None else astar
 
 
     @abc.abstractmethod
@@ -97,20 +103,21 @@ class BaseGOAP(abc.ABC):
         start_pos: IntoState,
         goal: StateLike,
         paths: typing.Optional[typing.Dict[ActionKey, PathTuple]] = None,
+        deadline: typing.Optional[float] = None,
         *args,
         **kwargs
     ) -> ResultTuple:
 
         _start_pos = start_pos
-        if not isinstance(start_pos, State):
+        if not isinstance(start_pos, STATE_TYPES):
             _start_pos = State.fromdict(start_pos, name="START")
 
         _goal = goal
-        if not isinstance(goal, State):
+        if not isinstance(goal, STATE_TYPES):
             _goal = State.fromdict(goal, name="END")
 
 
-        continue_search, next_params = True, dict(
+        next_params = dict(
             adjacency_gen=self.adjacency_gen,
             preconditions_checker=self.preconditions_check,
             start_pos=_start_pos,
@@ -122,32 +129,11 @@ class BaseGOAP(abc.ABC):
             get_effects=self.get_effects,
             max_queue_size=self.max_queue_size,
             pqueue_key_func=self.pqueue_key_func,
+            astar=self.astar,
         )
 
-        best_cost, best_parent = None, None
-        curr_iter = 0
-
-        while next_params:
-            continue_search, next_params = _astar_deepening_search(**next_params)
-
-            if continue_search:
-
-                if self.cutoff_iter is not None:
-                    curr_iter = next_params.get("_iter") or curr_iter + 1
-                    if curr_iter >= self.cutoff_iter:
-                        raise NoPathError(f"Path not found within {self.cutoff_iter} iterations!")
-
-            else:
-                best_cost, best_parent = next_params
-                break
-
-        parent_cost, path = best_cost, best_parent
-
-        if self.handle_backtrack_node:
-            for parent_elem in path:
-                self.handle_backtrack_node(parent_elem)
-
-        return best_cost, path
+        budget = SearchBudget(cutoff_iter=self.cutoff_iter, deadline=deadline, max_generated=self.max_generated)
+        return run_search(next_params, budget, handle_backtrack_node=self.handle_backtrack_node)
 
 
     def __call__(self, *args, **kwargs) -> ResultTuple:
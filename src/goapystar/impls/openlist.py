@@ -0,0 +1,505 @@
+"""Priority queue structures used as the open list (frontier) of the planners.
+
+The stdlib heapq module only gives us a bare heap; to support cheap membership
+checks and decrease-key, we need to know *where* in the heap each candidate sits.
+The structures here keep a position index alongside the heap array, keyed by
+an arbitrary hashable node key (for the planners: the action + a hash of the state it produces).
+"""
+import typing
+
+OpenListKey = typing.Hashable
+OpenListEntry = typing.Tuple[typing.Any, OpenListKey, typing.Any]
+
+
+class IndexedOpenList:
+    """A binary min-heap with a position index.
+
+    Each entry is a (priority, key, item) triple; only the priority takes part in comparisons,
+    so items don't need to be orderable. Each key can be present at most once - pushing a key
+    that's already queued with a better priority updates it in place (decrease-key), pushing it
+    with a worse one is a no-op.
+
+    Membership checks are O(1), pushes, pops and priority updates are O(log n).
+    """
+    __slots__ = ("_heap", "_index")
+
+    def __init__(self):
+        self._heap: typing.List[OpenListEntry] = []
+        self._index: typing.Dict[OpenListKey, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __bool__(self) -> bool:
+        return bool(self._heap)
+
+    def __contains__(self, key: OpenListKey) -> bool:
+        return key in self._index
+
+    def __iter__(self) -> typing.Iterator[OpenListEntry]:
+        # Heap order, NOT priority order!
+        return iter(self._heap)
+
+    def priority_of(self, key: OpenListKey, default: typing.Any = None) -> typing.Any:
+        pos = self._index.get(key)
+        return default if pos is None else self._heap[pos][0]
+
+    def push(self, key: OpenListKey, priority: typing.Any, item: typing.Any) -> bool:
+        """Queues up an item, or improves the priority of an already queued one.
+
+        :return: True if the queue changed as a result, False if the key was already queued with a priority
+                 at least as good as the new one.
+        """
+        pos = self._index.get(key)
+
+        if pos is None:
+            self._heap.append((priority, key, item))
+            self._index[key] = len(self._heap) - 1
+            self._sift_up(len(self._heap) - 1)
+            return True
+
+        if not priority < self._heap[pos][0]:
+            return False
+
+        # Decrease-key: a priority can only get better here, so it can only ever need to move up.
+        self._heap[pos] = (priority, key, item)
+        self._sift_up(pos)
+        return True
+
+    def peek(self) -> OpenListEntry:
+        if not self._heap:
+            raise IndexError("peek from an empty open list")
+        return self._heap[0]
+
+    def pop(self) -> OpenListEntry:
+        if not self._heap:
+            raise IndexError("pop from an empty open list")
+
+        return self._pop_at(0)
+
+    def remove(self, key: OpenListKey) -> OpenListEntry:
+        pos = self._index[key]
+        return self._pop_at(pos)
+
+    def _pop_at(self, pos: int) -> OpenListEntry:
+        heap = self._heap
+        last = heap.pop()
+        del self._index[last[1]]
+
+        if pos == len(heap):
+            return last
+
+        popped = heap[pos]
+        del self._index[popped[1]]
+        heap[pos] = last
+        self._index[last[1]] = pos
+
+        self._sift_down(pos)
+        self._sift_up(pos)
+        return popped
+
+    def _sift_up(self, pos: int) -> None:
+        heap, index = self._heap, self._index
+        entry = heap[pos]
+        priority = entry[0]
+
+        while pos > 0:
+            parent_pos = (pos - 1) >> 1
+            parent = heap[parent_pos]
+
+            if not priority < parent[0]:
+                break
+
+            heap[pos] = parent
+            index[parent[1]] = pos
+            pos = parent_pos
+
+        heap[pos] = entry
+        index[entry[1]] = pos
+
+    def _sift_down(self, pos: int) -> None:
+        heap, index = self._heap, self._index
+        size = len(heap)
+        entry = heap[pos]
+        priority = entry[0]
+
+        while True:
+            child_pos = 2 * pos + 1
+            if child_pos >= size:
+                break
+
+            right_pos = child_pos + 1
+            if right_pos < size and heap[right_pos][0] < heap[child_pos][0]:
+                child_pos = right_pos
+
+            child = heap[child_pos]
+            if not child[0] < priority:
+                break
+
+            heap[pos] = child
+            index[child[1]] = pos
+            pos = child_pos
+
+        heap[pos] = entry
+        index[entry[1]] = pos
+
+
+class BoundedOpenList:
+    """A size-capped open list, for beam searches.
+
+    Backed by an indexed min-max heap, so that both the best AND the worst entry are available
+    in O(1) and removable in O(log n). Once the list is full, pushing a new entry evicts
+    the current worst one (or rejects the newcomer, if *it* is the worst).
+
+    The interface otherwise mirrors IndexedOpenList, so the two are interchangeable.
+    """
+    __slots__ = ("_heap", "_index", "max_size")
+
+    def __init__(self, max_size: int):
+        if max_size < 1:
+            raise ValueError(f"Bounded open list size must be positive, got {max_size}!")
+
+        self._heap: typing.List[OpenListEntry] = []
+        self._index: typing.Dict[OpenListKey, int] = {}
+        self.max_size = max_size
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __bool__(self) -> bool:
+        return bool(self._heap)
+
+    def __contains__(self, key: OpenListKey) -> bool:
+        return key in self._index
+
+    def __iter__(self) -> typing.Iterator[OpenListEntry]:
+        # Heap order, NOT priority order!
+        return iter(self._heap)
+
+    def priority_of(self, key: OpenListKey, default: typing.Any = None) -> typing.Any:
+        pos = self._index.get(key)
+        return default if pos is None else self._heap[pos][0]
+
+    def push(self, key: OpenListKey, priority: typing.Any, item: typing.Any) -> bool:
+        """Queues up an item, or improves the priority of an already queued one.
+        If the list is full, the worst entry is evicted to make room.
+
+        :return: True if the queue changed as a result, False if the new entry was rejected.
+        """
+        pos = self._index.get(key)
+
+        if pos is not None:
+            if not priority < self._heap[pos][0]:
+                return False
+
+            self._heap[pos] = (priority, key, item)
+            self._restore(pos)
+            return True
+
+        if len(self._heap) >= self.max_size:
+            worst_pos = self._worst_pos()
+
+            if not priority < self._heap[worst_pos][0]:
+                return False
+
+            self._pop_at(worst_pos)
+
+        self._heap.append((priority, key, item))
+        self._index[key] = len(self._heap) - 1
+        self._push_up(len(self._heap) - 1)
+        return True
+
+    def peek(self) -> OpenListEntry:
+        if not self._heap:
+            raise IndexError("peek from an empty open list")
+        return self._heap[0]
+
+    def peek_worst(self) -> OpenListEntry:
+        if not self._heap:
+            raise IndexError("peek from an empty open list")
+        return self._heap[self._worst_pos()]
+
+    def pop(self) -> OpenListEntry:
+        if not self._heap:
+            raise IndexError("pop from an empty open list")
+        return self._pop_at(0)
+
+    def pop_worst(self) -> OpenListEntry:
+        if not self._heap:
+            raise IndexError("pop from an empty open list")
+        return self._pop_at(self._worst_pos())
+
+    def remove(self, key: OpenListKey) -> OpenListEntry:
+        pos = self._index[key]
+        return self._pop_at(pos)
+
+    def _worst_pos(self) -> int:
+        heap = self._heap
+        size = len(heap)
+
+        if size < 3:
+            return size - 1
+
+        return 1 if heap[2][0] < heap[1][0] else 2
+
+    @staticmethod
+    def _is_min_level(pos: int) -> bool:
+        # Levels alternate min, max, min, ... starting from the root.
+        return not ((pos + 1).bit_length() - 1) & 1
+
+    def _swap(self, pos_a: int, pos_b: int) -> None:
+        heap, index = self._heap, self._index
+        heap[pos_a], heap[pos_b] = heap[pos_b], heap[pos_a]
+        index[heap[pos_a][1]] = pos_a
+        index[heap[pos_b][1]] = pos_b
+
+    def _pop_at(self, pos: int) -> OpenListEntry:
+        heap = self._heap
+        last = heap.pop()
+        del self._index[last[1]]
+
+        if pos == len(heap):
+            return last
+
+        popped = heap[pos]
+        del self._index[popped[1]]
+        heap[pos] = last
+        self._index[last[1]] = pos
+
+        self._restore(pos)
+        return popped
+
+    def _restore(self, pos: int) -> None:
+        # An entry that was replaced in the middle of the heap can violate the ordering
+        # against its ancestors, its descendants, or - if it gets swapped with its parent,
+        # which is on a level of the opposite kind - leave the old parent misordered below it.
+        # Pushing up first, then trickling down whatever sits in the slot afterwards covers all of those.
+        self._push_up(pos)
+        self._trickle_down(pos)
+
+    def _push_up(self, pos: int) -> None:
+        if pos == 0:
+            return
+
+        heap = self._heap
+        parent_pos = (pos - 1) >> 1
+        is_min = self._is_min_level(pos)
+
+        if is_min:
+            if heap[parent_pos][0] < heap[pos][0]:
+                self._swap(pos, parent_pos)
+                self._push_up_by(parent_pos, is_min=False)
+            else:
+                self._push_up_by(pos, is_min=True)
+
+        else:
+            if heap[pos][0] < heap[parent_pos][0]:
+                self._swap(pos, parent_pos)
+                self._push_up_by(parent_pos, is_min=True)
+            else:
+                self._push_up_by(pos, is_min=False)
+
+    def _push_up_by(self, pos: int, is_min: bool) -> None:
+        heap = self._heap
+
+        while pos > 2:
+            grandparent_pos = (((pos - 1) >> 1) - 1) >> 1
+
+            if is_min:
+                out_of_order = heap[pos][0] < heap[grandparent_pos][0]
+            else:
+                out_of_order = heap[grandparent_pos][0] < heap[pos][0]
+
+            if not out_of_order:
+                break
+
+            self._swap(pos, grandparent_pos)
+            pos = grandparent_pos
+
+    def _trickle_down(self, pos: int) -> None:
+        heap = self._heap
+        size = len(heap)
+        is_min = self._is_min_level(pos)
+
+        while True:
+            first_child = 2 * pos + 1
+            if first_child >= size:
+                return
+
+            # Find the most extreme entry among the children and grandchildren.
+            descendants = [first_child, first_child + 1]
+            descendants.extend(range(4 * pos + 3, 4 * pos + 7))
+
+            extreme_pos = first_child
+            for cand_pos in descendants:
+                if cand_pos >= size:
+                    continue
+
+                if is_min:
+                    better = heap[cand_pos][0] < heap[extreme_pos][0]
+                else:
+                    better = heap[extreme_pos][0] < heap[cand_pos][0]
+
+                if better:
+                    extreme_pos = cand_pos
+
+            if is_min:
+                out_of_order = heap[extreme_pos][0] < heap[pos][0]
+            else:
+                out_of_order = heap[pos][0] < heap[extreme_pos][0]
+
+            if not out_of_order:
+                return
+
+            self._swap(extreme_pos, pos)
+
+            if extreme_pos <= first_child + 1:
+                # Direct child - the two levels are now consistent, nothing below to fix.
+                return
+
+            # Grandchild - the entry we pushed down might now be misordered against its new parent.
+            parent_pos = (extreme_pos - 1) >> 1
+
+            if is_min:
+                misordered = heap[parent_pos][0] < heap[extreme_pos][0]
+            else:
+                misordered = heap[extreme_pos][0] < heap[parent_pos][0]
+
+            if misordered:
+                self._swap(extreme_pos, parent_pos)
+
+            pos = extreme_pos
+
+
+def _core_f_of(priority: typing.Any) -> float:
+    # The core A* mode queues (priority key, cost, Action) triples, and the priority key starts with f.
+    return priority[0][0]
+
+
+def _core_focal_of(priority: typing.Any) -> typing.Any:
+    # ...and the rest of the key (by default, h and then age) is what orders the focal list.
+    return priority[0][1:], priority[1:]
+
+
+class FocalOpenList:
+    """An open list for focal search (Pearl & Kim's A*-epsilon), for bounded-suboptimal planning.
+
+    Rather than always popping the entry with the lowest f, this pops the best entry by a *secondary*
+    priority among those within weight * (the lowest f). That lets the search commit to whatever looks
+    closest to done, as long as it can't make the plan worse than weight times the optimal one.
+
+    Internally, it's three indexed heaps - all the entries by f, the ones in the focal range
+    by the secondary priority, and the rest by f, waiting for the range to grow enough to take them in.
+    The lowest f can also go *down* as new entries come in; rather than scanning the focal list for
+    entries that fell out of range, those get moved back out lazily, when they come up to be popped.
+
+    By default, the priorities are taken to be the ones the core A* mode uses; f_of and focal_of
+    pull f and the secondary priority out of a priority otherwise.
+    The interface otherwise mirrors IndexedOpenList, so the two are interchangeable.
+    """
+    __slots__ = ("weight", "f_of", "focal_of", "_open", "_focal", "_waiting")
+
+    def __init__(
+        self,
+        weight: float = 1.0,
+        f_of: typing.Callable[[typing.Any], float] = _core_f_of,
+        focal_of: typing.Callable[[typing.Any], typing.Any] = _core_focal_of,
+    ):
+        if weight < 1:
+            raise ValueError(f"Focal list weight must be at least 1, got {weight}!")
+
+        self.weight = weight
+        self.f_of = f_of
+        self.focal_of = focal_of
+        self._open = IndexedOpenList()
+        self._focal = IndexedOpenList()
+        self._waiting = IndexedOpenList()
+
+    def __len__(self) -> int:
+        return len(self._open)
+
+    def __bool__(self) -> bool:
+        return bool(self._open)
+
+    def __contains__(self, key: OpenListKey) -> bool:
+        return key in self._open
+
+    def __iter__(self) -> typing.Iterator[OpenListEntry]:
+        # Heap order, NOT priority order!
+        return iter(self._open)
+
+    def priority_of(self, key: OpenListKey, default: typing.Any = None) -> typing.Any:
+        return self._open.priority_of(key, default=default)
+
+    def min_f(self) -> float:
+        """The lowest f of all the entries; with an admissible heuristic, a lower bound on the optimal plan's cost."""
+        if not self._open:
+            return float("inf")
+
+        return self.f_of(self._open.peek()[0])
+
+    def push(self, key: OpenListKey, priority: typing.Any, item: typing.Any) -> bool:
+        """Queues up an item, or improves the priority of an already queued one.
+
+        :return: True if the queue changed as a result, False if the key was already queued with a priority
+                 at least as good as the new one.
+        """
+        if not self._open.push(key, priority, item):
+            return False
+
+        if key in self._focal:
+            self._focal.remove(key)
+
+        if key in self._waiting:
+            self._waiting.remove(key)
+
+        # Everything starts out waiting; it gets let into the focal list once we know the range.
+        self._waiting.push(key, priority, item)
+        return True
+
+    def peek(self) -> OpenListEntry:
+        if not self._open:
+            raise IndexError("peek from an empty open list")
+
+        key = self._select()
+        return self._open.priority_of(key), key, self._focal.peek()[2]
+
+    def pop(self) -> OpenListEntry:
+        if not self._open:
+            raise IndexError("pop from an empty open list")
+
+        self._select()
+        _, key, item = self._focal.pop()
+        priority, _, _ = self._open.remove(key)
+        return priority, key, item
+
+    def remove(self, key: OpenListKey) -> OpenListEntry:
+        entry = self._open.remove(key)
+
+        if key in self._focal:
+            self._focal.remove(key)
+        else:
+            self._waiting.remove(key)
+
+        return entry
+
+    def _select(self) -> OpenListKey:
+        # Brings the focal list up to date with the current range, and returns the key of its best entry.
+        bound = self.weight * self.min_f()
+        waiting, focal = self._waiting, self._focal
+
+        while waiting and self.f_of(waiting.peek()[0]) <= bound:
+            priority, key, item = waiting.pop()
+            focal.push(key, self.focal_of(priority), item)
+
+        while True:
+            _, key, item = focal.peek()
+            priority = self._open.priority_of(key)
+
+            if self.f_of(priority) <= bound:
+                # The entry with the lowest f is always in range, so this can't run out.
+                return key
+
+            # The range shrank since this one got in.
+            focal.pop()
+            waiting.push(key, priority, item)
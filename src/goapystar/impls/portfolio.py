@@ -0,0 +1,224 @@
+"""Goal Oriented Action Planning algorithm.
+
+This is the portfolio variant - it races several configurations of goap.find_plan() against each other.
+
+Which configuration of the planner does best depends heavily on the goal: some plans only show up
+with a big enough beam (max_queue_size), some need no beam at all, some are found faster without
+the transposition table, and so on. Rather than tuning that by hand for each goal, we can just
+run a handful of configurations at the same time, in separate processes, and take whichever
+comes up with a plan first. The winner gets reported along with the plan, so over time,
+you can tell which configuration makes a good default for a domain.
+
+The worker processes load the map once, when they start, and build the usual callbacks for it
+(see default_impl), so each race only has to ship the start, goal and configuration over.
+As soon as one configuration wins, the rest are told to stop; they check for that every
+time they expand a node, so they wind down quickly rather than running to the end of their budgets.
+
+Configurations are keyword arguments for goap.find_plan(), so they have to be picklable - module-level
+functions are fine, closures aren't. As most heuristics need the map, a configuration can also
+provide a `goal_measure_factory` instead of a goal_measure - a (module-level) function that takes
+the map and returns the goal_measure, which then gets called in each worker.
+"""
+import concurrent.futures
+import multiprocessing
+import time
+import typing
+
+from . import goap
+from .common import NoPathError, EmptyQueueError
+from ..maputils import load_map_json
+from ..measures import no_goal_heuristic
+from ..state import State, STATE_TYPES
+from ..types import ActionDict, IntoState
+from ..usecases.actiongraph.utils import (
+    get_actions,
+    get_effects,
+    goal_checker_for,
+    neighbor_measure,
+    preconds_checker_for,
+)
+
+# Roughly the configurations test_quick.py and test_slow.py get tuned between.
+DEFAULT_PORTFOLIO = (
+    dict(max_queue_size=3000, cutoff_iter=5000),
+    dict(max_queue_size=None, cutoff_iter=5000),
+    dict(max_queue_size=200, cutoff_iter=5000, use_transposition_table=False),
+    dict(astar=True, cutoff_iter=20000),
+)
+
+# Per worker process; set up by _init_worker().
+_worker_map: typing.Optional[ActionDict] = None
+_worker_callbacks: typing.Optional[dict] = None
+_worker_cancel_event = None
+
+
+class _Cancelled(Exception):
+    pass
+
+
+def _init_worker(mapobj: typing.Union[str, ActionDict], cancel_event) -> None:
+    global _worker_map, _worker_callbacks, _worker_cancel_event
+
+    _worker_map = load_map_json(mapobj) if isinstance(mapobj, str) else mapobj
+    _worker_cancel_event = cancel_event
+
+    actiongetter = get_actions(_worker_map)
+
+    def _cancellable_actiongetter(*args, **kwargs):
+        # Called once per expansion, which makes it a good place to check whether someone else has won already.
+        if _worker_cancel_event.is_set():
+            raise _Cancelled()
+
+        return actiongetter(*args, **kwargs)
+
+    _worker_callbacks = dict(
+        adjacency_gen=_cancellable_actiongetter,
+        preconditions_check=preconds_checker_for(_worker_map),
+        neighbor_measure=neighbor_measure(_worker_map),
+        goal_check=goal_checker_for(_worker_map),
+        get_effects=get_effects(_worker_map),
+    )
+
+
+def _run_configuration(
+    start_pos: IntoState,
+    goal: IntoState,
+    config: dict,
+    deadline: typing.Optional[float] = None,
+) -> typing.Optional[typing.Tuple[float, list]]:
+    # Runs in the worker processes. Failing to find a plan is a perfectly normal outcome for a configuration,
+    # so we report it as None rather than an exception (which wouldn't survive pickling with all it carries anyway).
+    kwargs = dict(_worker_callbacks)
+    kwargs.update(config)
+
+    goal_measure_factory = kwargs.pop("goal_measure_factory", None)
+
+    if goal_measure_factory is not None:
+        kwargs["goal_measure"] = goal_measure_factory(_worker_map)
+
+    # The default mode's default goal_measure needs an ActionGraph; an unbiased one will do instead.
+    kwargs.setdefault("goal_measure", None if kwargs.get("astar") else no_goal_heuristic)
+    kwargs.setdefault("deadline", deadline)
+
+    try:
+        return goap.find_plan(start_pos, goal, **kwargs)
+
+    except (NoPathError, EmptyQueueError, _Cancelled):
+        return None
+
+
+def portfolio_solver(
+    mapobj: typing.Union[str, ActionDict],
+    configurations: typing.Sequence[dict] = DEFAULT_PORTFOLIO,
+    max_workers: typing.Optional[int] = None,
+):
+    """Starts up a pool of worker processes with the map pre-loaded, and returns a function
+    that races the configurations against each other on it, same as portfolio_find_plan().
+
+    The pool stays up between the calls, so this is the way to go for planning repeatedly on the same map.
+    Call .shutdown() on the returned function once done with it. The calls must not overlap.
+    """
+    if not configurations:
+        raise ValueError("The portfolio needs at least one configuration!")
+
+    _configurations = tuple(configurations)
+    cancel_event = multiprocessing.Event()
+
+    executor = concurrent.futures.ProcessPoolExecutor(
+        max_workers=max_workers or len(_configurations),
+        initializer=_init_worker,
+        initargs=(mapobj, cancel_event),
+    )
+
+    def portfolio_solve(
+        start_pos: IntoState,
+        goal: IntoState,
+        deadline: typing.Optional[float] = None,
+    ) -> typing.Tuple[float, list, dict]:
+
+        _start_pos = start_pos
+        if not isinstance(start_pos, STATE_TYPES):
+            _start_pos = State.fromdict(start_pos, name="START")
+
+        _goal = goal
+        if not isinstance(goal, STATE_TYPES):
+            _goal = State.fromdict(goal, name="END")
+
+        cancel_event.clear()
+
+        futures = {
+            executor.submit(_run_configuration, _start_pos, _goal, config, deadline): config
+            for config in _configurations
+        }
+
+        pending = set(futures)
+        result, winner = None, None
+
+        try:
+            while pending and result is None:
+                timeout = None if deadline is None else max(0., deadline - time.monotonic())
+                done, pending = concurrent.futures.wait(
+                    pending, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # Out of time - the workers should be giving up by now too, as they got the same deadline.
+                    break
+
+                for future in done:
+                    outcome = future.result()
+
+                    if outcome is not None:
+                        result, winner = outcome, futures[future]
+                        break
+
+        finally:
+            # Stop the losers - the queued ones never start, the running ones notice on their next expansion.
+            # We wait for them to actually stop, so they don't hog the workers (or see the event cleared) next call.
+            cancel_event.set()
+
+            for future in pending:
+                future.cancel()
+
+            concurrent.futures.wait(pending)
+
+        if result is None:
+            raise NoPathError(f"None of the {len(_configurations)} configurations found a path!")
+
+        cost, path = result
+        return cost, path, winner
+
+    portfolio_solve.shutdown = executor.shutdown
+    return portfolio_solve
+
+
+def portfolio_find_plan(
+    start_pos: IntoState,
+    goal: IntoState,
+    mapobj: typing.Union[str, ActionDict],
+    configurations: typing.Sequence[dict] = DEFAULT_PORTFOLIO,
+    max_workers: typing.Optional[int] = None,
+    deadline: typing.Optional[float] = None,
+) -> typing.Tuple[float, list, dict]:
+    """Race several configurations of goap.find_plan() against each other in separate processes,
+    and return the first plan any of them finds.
+
+    :param start_pos: Initial state, same as for goap.find_plan().
+    :param goal: The state we want to have after the final action in a valid plan, same as for goap.find_plan().
+    :param mapobj: The map (a dict of Actions) to plan on, or the name of one to load_map_json() in the workers.
+    :param configurations: Optional. A sequence of dicts of keyword arguments for goap.find_plan(), one per contender.
+                           The callbacks are filled in from the map, unless a configuration overrides them.
+                           Defaults to DEFAULT_PORTFOLIO, a few broadly useful setups.
+    :param max_workers: Optional. How many processes to race in. Defaults to one per configuration;
+                        with fewer, the later configurations only start once the earlier ones have failed.
+    :param deadline: Optional. A time.monotonic() timestamp after which the race is called off.
+    :raises: A NoPathError if none of the configurations found a plan (in time).
+    :return: A (cost, plan, configuration) tuple - the configuration being the one that won the race.
+    """
+    solver = portfolio_solver(mapobj, configurations=configurations, max_workers=max_workers)
+
+    try:
+        return solver(start_pos, goal, deadline=deadline)
+
+    finally:
+        solver.shutdown()
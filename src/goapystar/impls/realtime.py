@@ -0,0 +1,234 @@
+"""Goal Oriented Action Planning algorithm.
+
+This is the real-time variant (Koenig & Likhachev's Real-Time Adaptive A*, RTAA* - a flavour of LRTA*).
+
+The other planners work out the whole plan up front, and how long that takes depends on how hard the goal is.
+An agent that re-plans every tick anyway (because the world keeps changing under it) only really
+needs the *next* Action, and it needs it within a fixed budget, however hard the goal is.
+
+So instead, each call runs a small A* lookahead from the current state - a fixed number of expansions
+(or until a deadline) - and commits to the first Action on the way to the most promising candidate it's seen.
+On its own, that would be short-sighted, and could run around in circles between states that look
+good from up close. To avoid that, each call also *learns*: every state the lookahead expanded gets its
+heuristic raised to what the lookahead found out about it (the best f on the frontier, minus the cost to get there).
+The learned values go into a heuristic table, which persists across calls - so the more an agent plans
+in a domain, the better informed (and so, the cheaper) its lookaheads get, and repeated trials converge
+on the optimal plan (given an admissible goal_measure).
+
+The table is keyed by the hashes of the goal and the state, so one table can serve all the goals of a domain,
+but it only makes sense for a single domain (set of Actions and costs); use realtime_solver() to keep one around.
+"""
+import typing
+
+from .common import (
+    EmptyQueueError,
+    PLUS_INF,
+    SearchBudget,
+    evaluate_neighbor_astar,
+    new_open_list,
+    new_root_node,
+    notify_search_start,
+)
+from .nodes import SearchNode
+from ..measures import equality_check, no_goal_heuristic, zero_heuristic
+from ..state import State, STATE_TYPES, statehash
+from ..types import StateLike, ActionTuple, ActionKey, IntoState, BlackboardBinOp
+
+# Learned heuristic values, keyed by (goal hash, state hash).
+HeuristicTable = typing.Dict[typing.Tuple[int, int], float]
+
+
+def find_next_action(
+    start_pos: IntoState,
+    goal: IntoState,
+    adjacency_gen: typing.Callable[[StateLike], typing.Iterable[ActionTuple]],
+    preconditions_check: typing.Callable[[StateLike], bool],
+    neighbor_measure: typing.Optional[typing.Callable[[StateLike], bool]] = None,
+    goal_measure: typing.Optional[typing.Callable[[IntoState], float]] = None,
+    goal_check: typing.Optional[typing.Callable[[StateLike], bool]] = None,
+    get_effects: typing.Optional[typing.Callable[[StateLike], float]] = None,
+    heuristic_table: typing.Optional[HeuristicTable] = None,
+    lookahead: typing.Optional[int] = 10,
+    blackboard_default: typing.Any = 0,
+    blackboard_update_op: typing.Optional[typing.Union[BlackboardBinOp, typing.Dict[ActionKey, BlackboardBinOp]]] = None,
+    deadline: typing.Optional[float] = None,
+    max_generated: typing.Optional[int] = None,
+) -> typing.Tuple[float, typing.Optional[ActionKey]]:
+    """Pick the next Action to take towards a goal state from the current state, within a fixed budget.
+    Uses the callbacks of goap.find_plan(..., astar=True), but searches only a few steps ahead.
+
+    Unlike the other planners, this never runs out of budget - it always answers with its best guess so far.
+
+    :param heuristic_table: Optional. A dict to read learned heuristic values from, and to write new ones to.
+                            Pass the same one to all the calls for the same domain, so they can learn from each other;
+                            if not provided, this call's learning is thrown away.
+    :param lookahead: Optional. Budget for the number of nodes expanded per call. Default 10.
+                      Deeper lookaheads make better decisions (and learn more per call), but take longer.
+    :param deadline: Optional. A time.monotonic() timestamp by which to wrap the lookahead up.
+                     The starting state gets expanded regardless, or there'd be nothing to choose from.
+    :param max_generated: Optional. Budget for the number of candidate nodes generated per call.
+    :raises: An EmptyQueueError if the lookahead ran out of candidates without reaching the goal,
+             i.e. there is no plan at all from the current state.
+    :return: An (estimated cost, Action) tuple - the estimated cost of the whole plan from the current state,
+             and the Action to take next; None (at a cost of 0) if the current state already satisfies the goal.
+    """
+    _start_pos = start_pos
+    if not isinstance(start_pos, STATE_TYPES):
+        _start_pos = State.fromdict(start_pos, name="START")
+
+    _goal = goal
+    if not isinstance(goal, STATE_TYPES):
+        _goal = State.fromdict(goal, name="END")
+
+    _neighbor_measure = neighbor_measure or no_goal_heuristic
+    _goal_measure = goal_measure or zero_heuristic
+    _goal_check = goal_check or equality_check
+    _heuristic_table = heuristic_table if heuristic_table is not None else {}
+
+    goal_hash = statehash(_goal)
+
+    def _learned_measure(state: StateLike, goal: StateLike, **context) -> float:
+        # What we've learned about a state overrides the goal_measure's guess (and saves us working it out).
+        learned = _heuristic_table.get((goal_hash, statehash(state)))
+
+        if learned is not None:
+            return learned
+
+        successor_measure = getattr(_goal_measure, "measure_successor", None)
+
+        if successor_measure is not None and context:
+            return successor_measure(state, goal, **context)
+
+        return _goal_measure(state, goal)
+
+    # Passes the parent and Action through to path-dependent heuristics, if that's what we've got.
+    _learned_measure.measure_successor = _learned_measure
+
+    root = new_root_node(
+        _start_pos,
+        blackboard_default=blackboard_default,
+        blackboard_update_op=blackboard_update_op,
+    )
+    notify_search_start(_goal_measure, root.blackboard, _goal)
+
+    if _goal_check(root.blackboard, _goal):
+        return 0, None
+
+    best_costs = {statehash(root.blackboard): 0}
+    queue = new_open_list()
+    budget = SearchBudget(cutoff_iter=lookahead, deadline=deadline, max_generated=max_generated)
+    curr_iter, generated = 0, 0
+
+    # The expanded states, with the cost we reached them with and the heuristic the lookahead used for them.
+    expanded: typing.List[typing.Tuple[int, float, float]] = []
+    state_hash = statehash(root.blackboard)
+    goal_distance = _learned_measure(root.blackboard, _goal)
+    node = root
+    found = None
+
+    while True:
+        curr_iter += 1
+        expanded.append((state_hash, node.cost, goal_distance))
+
+        for neigh in adjacency_gen(node.pos):
+            neighbor_triple = evaluate_neighbor_astar(
+                check_preconds=preconditions_check,
+                neigh=neigh,
+                current_pos=node.pos,
+                goal=_goal,
+                curr_cost=node.cost,
+                neighbor_measure=_neighbor_measure,
+                goal_measure=_learned_measure,
+                blackboard=node.blackboard,
+                blackboard_default=blackboard_default,
+                blackboard_update_op=blackboard_update_op,
+                get_effects=get_effects,
+                transposition_table=best_costs,
+            )
+
+            if not neighbor_triple:
+                continue
+
+            path_cost, neigh_distance, effects = neighbor_triple
+            neigh_hash = statehash(effects)
+
+            if not neigh_distance < PLUS_INF:
+                continue
+
+            # Same tie-breaking as the core A* mode - by heuristic, then by age.
+            queue.push(
+                neigh_hash,
+                (path_cost + neigh_distance, neigh_distance, generated),
+                SearchNode(neigh, parent=node, cost=path_cost, blackboard=effects),
+            )
+            generated += 1
+
+        if not queue:
+            raise EmptyQueueError("Exhausted all candidates before a path was found!")
+
+        (est_total_cost, goal_distance, _), state_hash, node = queue.peek()
+
+        if _goal_check(node.blackboard, _goal):
+            # The goal is the best candidate; nothing else on the frontier can beat it.
+            found = node
+            break
+
+        if budget.exceeded(curr_iter, generated):
+            break
+
+        queue.pop()
+
+    # Everything we expanded is at least as far from the goal as the best candidate on the frontier says.
+    # For a consistent goal_measure, that can only ever raise the estimates, but we make sure of it regardless.
+    for (expanded_hash, expanded_cost, expanded_distance) in expanded:
+        learned_distance = max(expanded_distance, est_total_cost - expanded_cost)
+        _heuristic_table[(goal_hash, expanded_hash)] = learned_distance
+
+    target = found or node
+
+    while target.parent is not root:
+        target = target.parent
+
+    return est_total_cost, target.pos
+
+
+def realtime_solver(
+    adjacency_gen: typing.Callable[[StateLike], typing.Iterable[ActionTuple]],
+    preconditions_check: typing.Callable[[StateLike], bool],
+    neighbor_measure: typing.Optional[typing.Callable[[StateLike], bool]] = None,
+    goal_measure: typing.Optional[typing.Callable[[IntoState], float]] = None,
+    goal_check: typing.Optional[typing.Callable[[StateLike], bool]] = None,
+    get_effects: typing.Optional[typing.Callable[[StateLike], float]] = None,
+    lookahead: typing.Optional[int] = 10,
+    blackboard_default: typing.Any = 0,
+    blackboard_update_op: typing.Optional[typing.Union[BlackboardBinOp, typing.Dict[ActionKey, BlackboardBinOp]]] = None,
+    max_generated: typing.Optional[int] = None,
+    heuristic_table: typing.Optional[HeuristicTable] = None,
+):
+    """Binds find_next_action() to a domain, along with a heuristic table for it to learn into."""
+    _heuristic_table = heuristic_table if heuristic_table is not None else {}
+
+    def next_action(
+        start_pos: IntoState,
+        goal: IntoState,
+        deadline: typing.Optional[float] = None,
+    ) -> typing.Tuple[float, typing.Optional[ActionKey]]:
+        return find_next_action(
+            start_pos,
+            goal,
+            adjacency_gen=adjacency_gen,
+            preconditions_check=preconditions_check,
+            neighbor_measure=neighbor_measure,
+            goal_measure=goal_measure,
+            goal_check=goal_check,
+            get_effects=get_effects,
+            heuristic_table=_heuristic_table,
+            lookahead=lookahead,
+            blackboard_default=blackboard_default,
+            blackboard_update_op=blackboard_update_op,
+            deadline=deadline,
+            max_generated=max_generated,
+        )
+
+    next_action.heuristic_table = _heuristic_table
+    return next_action
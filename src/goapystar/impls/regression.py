@@ -0,0 +1,229 @@
+"""Goal Oriented Action Planning algorithm.
+
+This is the regression (backward) variant, for action maps with the standard semantics of
+the action map helpers - additive Effects and 'at least this much' preconditions and goals.
+
+The other planners progress forwards from the start state, trying every applicable Action at each step.
+When the goal only mentions a couple of keys, most of those Actions have nothing to do with it.
+Here, the search runs the other way around - it starts from the goal and asks 'what would have to hold
+right before the last Action for the goal to hold right after it?', over and over, until it gets to
+a requirement ('subgoal') the start state already satisfies.
+
+Regressing a subgoal through an Action works out, per key, the least value it must have beforehand:
+
+    required_before[key] = max(subgoal[key] - effect[key], precondition[key])
+
+and the only Actions worth regressing through are the ones with a positive Effect on a key
+the subgoal constrains - regressing through anything else only ever makes the subgoal harder,
+so the branching factor is the number of *relevant* Actions rather than all of them.
+Note that this is decided per subgoal, not against the start state - a key the start already
+has enough of may still need raising, if an earlier Action in the plan is going to use some of it up.
+What we can drop are requirements no plan could ever break: most Actions that use a key up also require
+at least that much of it, which puts a floor under the key's value (see key_floors()); a requirement
+at or below the floor holds in every state reachable from the start, so it's no longer a constraint.
+
+The search itself is a textbook A* over subgoals (cost so far = the actual cost of the Actions
+regressed through), so with the default or any other admissible goal_measure, plans are optimal.
+The plan is reported the same way as goap.find_plan() reports it - start state first, then
+the Actions in the order they should be executed.
+"""
+import typing
+
+from .common import NoPathError, EmptyQueueError, PLUS_INF, SearchBudget, new_open_list, suppress_not_found
+from .nodes import SearchNode
+from ..state import State, STATE_TYPES
+from ..types import ActionDict, ActionTuple, IntoState, StateLike
+from ..usecases.actiongraph.compiled import CompiledDomain, compile_domain
+
+# Per-slot requirements, None where the subgoal doesn't care about the key.
+Subgoal = typing.Tuple[typing.Any, ...]
+
+
+def regress(domain: CompiledDomain, subgoal: Subgoal, action: int) -> Subgoal:
+    """The weakest subgoal that has to hold before the action for the subgoal to hold after it."""
+    required = list(subgoal)
+
+    for (slot, delta) in domain.effects[action]:
+        if required[slot] is not None:
+            required[slot] = required[slot] - delta
+
+    for (slot, value) in domain.preconds[action]:
+        if required[slot] is None or required[slot] < value:
+            required[slot] = value
+
+    return tuple(required)
+
+
+def key_floors(domain: CompiledDomain, start_values: typing.Sequence[typing.Any]) -> typing.Tuple[float, ...]:
+    """The least value each key can take in any state reachable from the start (-inf if unbounded)."""
+    floors = list(start_values)
+
+    for action in range(len(domain.actions)):
+        preconds = dict(domain.preconds[action])
+
+        for (slot, delta) in domain.effects[action]:
+            if delta < 0:
+                # Without a precondition on the key, nothing stops the Action from driving it arbitrarily low.
+                floor = preconds[slot] + delta if slot in preconds else -PLUS_INF
+                floors[slot] = min(floors[slot], floor)
+
+    return tuple(floors)
+
+
+def drop_settled(subgoal: Subgoal, floors: typing.Sequence[float]) -> Subgoal:
+    """The subgoal without the requirements that hold in any reachable state anyway."""
+    return tuple(
+        None if value is not None and value <= floor else value
+        for (value, floor) in zip(subgoal, floors)
+    )
+
+
+def relevant_actions(
+    achievers: typing.Sequence[typing.Tuple[int, ...]],
+    start_values: typing.Sequence[typing.Any],
+    subgoal: Subgoal,
+) -> typing.Optional[typing.Set[int]]:
+    """Actions that raise a key the subgoal constrains; None if the start satisfies the subgoal."""
+    constrained = [slot for (slot, value) in enumerate(subgoal) if value is not None]
+
+    if all(start_values[slot] >= subgoal[slot] for slot in constrained):
+        return None
+
+    relevant = set()
+    for slot in constrained:
+        relevant.update(achievers[slot])
+
+    return relevant
+
+
+def decode_subgoal(domain: CompiledDomain, subgoal: Subgoal) -> dict:
+    return {key: value for (key, value) in zip(domain.keys, subgoal) if value is not None}
+
+
+def find_plan(
+    start_pos: IntoState,
+    goal: IntoState,
+    mapobj: typing.Union[ActionDict, CompiledDomain],
+    handle_backtrack_node: typing.Optional[typing.Callable[[ActionTuple], typing.Any]] = None,
+    goal_measure: typing.Optional[typing.Callable[[StateLike, dict], float]] = None,
+    cutoff_iter: typing.Optional[int] = 1000,
+    max_queue_size: typing.Optional[int] = None,
+    use_transposition_table: bool = True,
+    deadline: typing.Optional[float] = None,
+    max_generated: typing.Optional[int] = None,
+):
+    """Run a regression GOAP planner, searching backwards from the goal to the given initial state.
+    Same contract as goap.find_plan() in A* mode, except the domain is given directly as an action map
+    rather than as a set of callbacks (which are implied - additive Effects, minimum-value
+    preconditions and goals, action costs as the neighbor measure).
+
+    :param start_pos: Initial state, either a State class from this package or just a plain old dict.
+    :param goal: The state we want to have after the final action in a valid plan (as a minimum).
+    :param mapobj: The action map, or the same compiled with compile_domain() (with the same default);
+                   precompiling is worthwhile if you plan against the same domain repeatedly.
+                   Keys missing from the start state are taken to be the compiled domain's default.
+    :param handle_backtrack_node: Optional. Callback to apply to each node in the found Plan as we report back.
+    :param goal_measure: Optional. A callable taking the *start* state and a subgoal (a plain dict of
+                         key -> least required value) and returning an estimate of the cost of getting
+                         from the former to the latter. Defaults to 0 (uniform-cost search).
+                         The state-based heuristics in usecases.actiongraph.heuristics work as-is, e.g.
+                         deficit_measure(mapobj), though the ones precomputing things per goal redo
+                         that for each subgoal, so the cheap ones pay off the most here.
+    :param cutoff_iter: Optional. Budget for number of planning iterations. Default 1000.
+    :param max_queue_size: Optional. Memory budget; turns the search into a beam search.
+    :param use_transposition_table: Optional boolean. If True (default), only re-expands a subgoal
+                                    if it was reached more cheaply than before.
+    :param deadline: Optional. A time.monotonic() timestamp after which the planner gives up.
+    :param max_generated: Optional. Budget for the number of subgoals generated (pushed onto the queue).
+    :raises: A NoPathError if no solution was found within the budget; it carries the search stats,
+             but no partial plan - the Actions found so far are the *end* of a plan, which can't be executed yet.
+    :return: A (cost, plan) tuple if a plan was found.
+    """
+    _start_pos = start_pos
+    if not isinstance(start_pos, STATE_TYPES):
+        _start_pos = State.fromdict(start_pos, name="START")
+
+    _goal = goal
+    if not isinstance(goal, STATE_TYPES):
+        _goal = State.fromdict(goal, name="END")
+
+    if isinstance(mapobj, CompiledDomain):
+        domain = mapobj
+    else:
+        # Keys nothing in the domain touches still need a slot so we can compare them against the start.
+        domain = compile_domain(mapobj, extra_keys=(*_start_pos.keys(), *_goal.keys()))
+
+    start_values = tuple(domain.compile_state(_start_pos))
+    floors = key_floors(domain, start_values)
+    root_subgoal = drop_settled(domain.compile_goal(_goal), floors)
+
+    achievers = tuple(
+        tuple(
+            action for action in range(len(domain.actions))
+            if any(slot == key_slot and delta > 0 for (key_slot, delta) in domain.effects[action])
+        )
+        for slot in range(len(domain.keys))
+    )
+
+    def _estimate(subgoal: Subgoal) -> float:
+        if goal_measure is None:
+            return 0
+
+        return goal_measure(_start_pos, decode_subgoal(domain, subgoal))
+
+    best_costs = {root_subgoal: 0} if use_transposition_table else None
+    queue = new_open_list(max_queue_size)
+    node = SearchNode(None, cost=0, blackboard=root_subgoal)
+    budget = SearchBudget(cutoff_iter=cutoff_iter, deadline=deadline, max_generated=max_generated)
+    curr_iter = 1
+    generated = 0
+
+    while True:
+        relevant = relevant_actions(achievers, start_values, node.blackboard)
+
+        if relevant is None:
+            break
+
+        for action in sorted(relevant):
+            subgoal = drop_settled(regress(domain, node.blackboard, action), floors)
+            path_cost = node.cost + domain.costs[action]
+
+            if best_costs is not None:
+                if best_costs.get(subgoal, PLUS_INF) <= path_cost:
+                    continue
+                best_costs[subgoal] = path_cost
+
+            goal_distance = _estimate(subgoal)
+            if not goal_distance < PLUS_INF:
+                continue
+
+            # Same tie-breaking as the core A* mode - by heuristic, then by age.
+            queue.push(
+                subgoal if best_costs is not None else (action, node.blackboard, subgoal),
+                (path_cost + goal_distance, goal_distance, curr_iter),
+                SearchNode(action, parent=node, cost=path_cost, blackboard=subgoal),
+            )
+            generated += 1
+
+        if not queue:
+            raise EmptyQueueError("Exhausted all candidates before a path was found!")
+
+        _, _, node = queue.pop()
+        curr_iter += 1
+
+        budget.check(curr_iter, generated, queue_size=len(queue))
+
+    # The search tree runs from the goal backwards, so its deepest Action is the first one to execute.
+    raw_path = node.path()
+    path = [_start_pos] + [domain.actions[action] for action in reversed(raw_path[1:])]
+
+    if handle_backtrack_node:
+        for parent_elem in path:
+            handle_backtrack_node(parent_elem)
+
+    return node.cost, path
+
+
+@suppress_not_found(default=None, default_factory=lambda: (PLUS_INF, list()))
+def maybe_find_plan(*args, **kwargs):
+    return find_plan(*args, **kwargs)
@@ -0,0 +1,373 @@
+"""Goal Oriented Action Planning algorithm.
+
+This is the vectorized variant, for numeric domains with additive Effects
+(i.e. the default blackboard_update_op) and the standard 'at least this much'
+preconditions and goals of the action map helpers.
+
+Rather than looping over every Action in Python to check its preconditions and
+apply its Effects, the domain is compiled (see usecases.actiongraph.compiled) into
+a precondition matrix and an Effect matrix over the interned state keys.
+Expanding a node is then a single vectorized comparison of the current blackboard
+against the precondition matrix, plus one broadcasted add to get every applicable
+successor at once.
+
+The search itself follows the core A* implementation step for step, so for the same
+settings, this returns the same plans as goap.find_plan() on the same (compiled) domain.
+
+Optionally, the frontier can also be expanded in batches (see batch_size) - the best K candidates
+are popped together, stacked into a 2-D array, and expanded, goal-checked and hashed in one go.
+This amortizes the interpreter overhead per node, at the cost of no longer following the
+exact expansion order of the core implementation (plans are still valid, but may differ).
+
+This requires NumPy, which is an optional dependency of this package.
+"""
+import typing
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+from .common import NoPathError, EmptyQueueError, PLUS_INF, SearchBudget, new_open_list, suppress_not_found
+from .nodes import SearchNode
+from ..state import State, SlotState, STATE_TYPES
+from ..types import ActionDict, ActionTuple, IntoState, StateLike
+from ..usecases.actiongraph.compiled import CompiledDomain, compile_domain
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError(
+            "The vectorized planner requires NumPy - install it with `pip install numpy`."
+        )
+    return np
+
+
+class VectorizedDomain:
+    """Matrix form of a compiled domain; A = number of Actions, K = number of state keys.
+
+    - preconds: (A, K) - minimal value of each key for the Action to be applicable, -inf if unconstrained.
+    - effects: (A, K) - how much each Action adds to each key.
+    - costs: (A,) - Action costs.
+    """
+
+    def __init__(self, domain: CompiledDomain):
+        _require_numpy()
+
+        self.domain = domain
+        num_actions, num_keys = len(domain.actions), len(domain.keys)
+
+        self.preconds = np.full((num_actions, num_keys), -np.inf)
+        self.effects = np.zeros((num_actions, num_keys))
+        self.costs = np.asarray(domain.costs, dtype=float)
+
+        for action_idx in range(num_actions):
+            for (slot, value) in domain.preconds[action_idx]:
+                self.preconds[action_idx, slot] = value
+
+            for (slot, value) in domain.effects[action_idx]:
+                self.effects[action_idx, slot] += value
+
+    def state_vector(self, state: typing.Optional[StateLike]) -> "np.ndarray":
+        slot_state = state if isinstance(state, SlotState) else self.domain.compile_state(state)
+        return np.asarray(slot_state, dtype=float)
+
+    def goal_vector(self, goal: StateLike) -> "np.ndarray":
+        slot_goal = goal if isinstance(goal, SlotState) else self.domain.compile_goal(goal)
+        return np.array([-np.inf if value is None else value for value in slot_goal], dtype=float)
+
+    def satisfies(self, blackboard: "np.ndarray", goal_vector: "np.ndarray") -> bool:
+        return bool((blackboard >= goal_vector).all())
+
+    def expand(self, blackboard: "np.ndarray") -> typing.Tuple["np.ndarray", "np.ndarray"]:
+        """Returns the indices of all Actions applicable in the given state and the (A', K) states they result in."""
+        applicable = np.flatnonzero((blackboard >= self.preconds).all(axis=1))
+        successors = blackboard + self.effects[applicable]
+        return applicable, successors
+
+    def expand_batch(
+        self,
+        blackboards: "np.ndarray"
+    ) -> typing.Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """Like expand(), but for a (B, K) stack of states at once.
+
+        :return: A triple of (index of the source state, Action index, resulting state) arrays,
+                 ordered by source state, then by Action - same as expanding them one by one would be.
+        """
+        applicable = (blackboards[:, np.newaxis, :] >= self.preconds[np.newaxis, :, :]).all(axis=2)
+        source_idx, actions = np.nonzero(applicable)
+        successors = blackboards[source_idx] + self.effects[actions]
+        return source_idx, actions, successors
+
+    def satisfies_batch(self, blackboards: "np.ndarray", goal_vector: "np.ndarray") -> "np.ndarray":
+        return (blackboards >= goal_vector).all(axis=1)
+
+
+def _row_keys(rows: "np.ndarray") -> typing.List[bytes]:
+    # Hashable keys for each row, in one pass; equivalent to [row.tobytes() for row in rows].
+    if not rows.shape[1]:
+        return [b""] * rows.shape[0]
+
+    rows = np.ascontiguousarray(rows)
+    as_void = rows.view(np.dtype((np.void, rows.itemsize * rows.shape[1])))
+    return as_void.ravel().tolist()
+
+
+def _heuristics_for(vec_domain, actions, goal, goal_measure):
+    heuristics = vec_domain.costs[actions]
+
+    if goal_measure is None:
+        return heuristics + 1
+
+    action_names = vec_domain.domain.actions
+    return heuristics + np.array([goal_measure(action_names[act], goal) for act in actions.tolist()], dtype=float)
+
+
+def _plan_for(vec_domain: VectorizedDomain, node: SearchNode) -> typing.Tuple[float, list]:
+    """The (cost, plan) leading up to the node, with the Actions translated back from indices to names."""
+    action_names = vec_domain.domain.actions
+    raw_path = node.path()
+    return node.cost, raw_path[:1] + [action_names[action] for action in raw_path[1:]]
+
+
+def _search_sequential(
+    vec_domain: VectorizedDomain,
+    root: SearchNode,
+    goal: StateLike,
+    goal_vector: "np.ndarray",
+    goal_measure: typing.Optional[typing.Callable[[IntoState], float]] = None,
+    budget: typing.Optional[SearchBudget] = None,
+    max_queue_size: typing.Optional[int] = None,
+    pqueue_key_func: typing.Optional[typing.Callable] = None,
+    use_transposition_table: bool = True,
+) -> SearchNode:
+
+    transposition_table = None
+    if use_transposition_table:
+        transposition_table = {root.blackboard.tobytes()}
+
+    _budget = budget or SearchBudget()
+    queue = new_open_list(max_queue_size)
+    node = root
+    curr_iter = 1
+    generated = 0
+
+    while not vec_domain.satisfies(node.blackboard, goal_vector):
+        actions, successors = vec_domain.expand(node.blackboard)
+        heuristics = _heuristics_for(vec_domain, actions, goal, goal_measure)
+        curr_cost = node.cost
+
+        for (action, successor, heuristic) in zip(actions.tolist(), successors, heuristics.tolist()):
+            state_key = successor.tobytes()
+
+            if transposition_table is not None:
+                if state_key in transposition_table:
+                    continue
+                transposition_table.add(state_key)
+
+            total_cost = curr_cost + heuristic
+            if not total_cost < PLUS_INF:
+                continue
+
+            # Same priority as the core implementation (see the big comment in common.py as to why).
+            priority_key = pqueue_key_func(curr_iter, curr_cost, heuristic) if pqueue_key_func else (curr_iter,)
+            queue.push(
+                (action, state_key),
+                (priority_key, total_cost, action),
+                SearchNode(action, parent=node, cost=total_cost, blackboard=successor),
+            )
+            generated += 1
+
+        if not queue:
+            raise EmptyQueueError("Exhausted all candidates before a path was found!")
+
+        _, _, node = queue.pop()
+        curr_iter += 1
+
+        _budget.check(curr_iter, generated, queue_size=len(queue), best_partial_plan=lambda: _plan_for(vec_domain, node))
+
+    return node
+
+
+def _search_batched(
+    vec_domain: VectorizedDomain,
+    root: SearchNode,
+    goal: StateLike,
+    goal_vector: "np.ndarray",
+    batch_size: int,
+    goal_measure: typing.Optional[typing.Callable[[IntoState], float]] = None,
+    budget: typing.Optional[SearchBudget] = None,
+    max_queue_size: typing.Optional[int] = None,
+    pqueue_key_func: typing.Optional[typing.Callable] = None,
+    use_transposition_table: bool = True,
+) -> SearchNode:
+
+    if vec_domain.satisfies(root.blackboard, goal_vector):
+        return root
+
+    transposition_table = None
+    if use_transposition_table:
+        transposition_table = {root.blackboard.tobytes()}
+
+    _budget = budget or SearchBudget()
+    queue = new_open_list(max_queue_size)
+    frontier = [root]
+    curr_iter = 1
+    generated = 0
+
+    while True:
+        blackboards = np.stack([node.blackboard for node in frontier])
+        source_idx, actions, successors = vec_domain.expand_batch(blackboards)
+
+        heuristics = _heuristics_for(vec_domain, actions, goal, goal_measure)
+        reached_goal = vec_domain.satisfies_batch(successors, goal_vector)
+        state_keys = _row_keys(successors)
+
+        goal_candidates = []
+
+        candidates = zip(
+            source_idx.tolist(),
+            actions.tolist(),
+            state_keys,
+            heuristics.tolist(),
+            reached_goal.tolist(),
+        )
+
+        for (row, (source, action, state_key, heuristic, is_goal)) in enumerate(candidates):
+            if transposition_table is not None:
+                if state_key in transposition_table:
+                    continue
+                transposition_table.add(state_key)
+
+            parent = frontier[source]
+            total_cost = parent.cost + heuristic
+            if not total_cost < PLUS_INF:
+                continue
+
+            # Each node in the batch still counts as its own iteration, to keep the queue ordering
+            # as close as possible to what we'd get expanding them one at a time.
+            source_iter = curr_iter + source
+            priority_key = pqueue_key_func(source_iter, parent.cost, heuristic) if pqueue_key_func else (source_iter,)
+            priority = (priority_key, total_cost, action)
+            child = SearchNode(action, parent=parent, cost=total_cost, blackboard=successors[row])
+
+            if is_goal:
+                # We've already goal-checked the whole batch, so we can stop here rather than queueing these up.
+                goal_candidates.append((priority, child))
+                continue
+
+            queue.push((action, state_key), priority, child)
+            generated += 1
+
+        if goal_candidates:
+            _, best_goal = min(goal_candidates, key=lambda candidate: candidate[0])
+            return best_goal
+
+        if not queue:
+            raise EmptyQueueError("Exhausted all candidates before a path was found!")
+
+        curr_iter += len(frontier)
+        _budget.check(curr_iter, generated, queue_size=len(queue), best_partial_plan=lambda: _plan_for(vec_domain, queue.peek()[2]))
+
+        cutoff_iter = _budget.cutoff_iter
+        next_batch_size = batch_size if cutoff_iter is None else min(batch_size, cutoff_iter - curr_iter)
+        frontier = [queue.pop()[2] for _ in range(min(next_batch_size, len(queue)))]
+
+
+def find_plan(
+    start_pos: IntoState,
+    goal: IntoState,
+    mapobj: typing.Union[ActionDict, CompiledDomain, VectorizedDomain],
+    handle_backtrack_node: typing.Optional[typing.Callable[[ActionTuple], typing.Any]] = None,
+    goal_measure: typing.Optional[typing.Callable[[IntoState], float]] = None,
+    cutoff_iter: typing.Optional[int] = 1000,
+    max_queue_size: typing.Optional[int] = None,
+    pqueue_key_func: typing.Optional[typing.Callable] = None,
+    use_transposition_table: bool = True,
+    batch_size: int = 1,
+    deadline: typing.Optional[float] = None,
+    max_generated: typing.Optional[int] = None,
+):
+    """Run a vectorized GOAP planner to achieve a specified goal state given an initial state.
+    Same contract as goap.find_plan(), except the domain is given directly as an action map
+    rather than as a set of callbacks (which are implied - additive Effects, minimum-value
+    preconditions and goals, action costs as the neighbor measure).
+
+    :param start_pos: Initial state, either a State class from this package or just a plain old dict.
+    :param goal: The state we want to have after the final action in a valid plan (as a minimum).
+    :param mapobj: The action map, or the same compiled with compile_domain()/VectorizedDomain();
+                   precompiling is worthwhile if you plan against the same domain repeatedly,
+                   though then the start and goal can only use keys the compiled domain knows about.
+    :param handle_backtrack_node: Optional. Callback to apply to each node in the found Plan as we report back.
+    :param goal_measure: Optional. A callable taking an Action name and the goal and returning a heuristic.
+                         By default, every Action scores the same (like measures.no_goal_heuristic).
+                         Note that a custom measure gets called in Python for each successor,
+                         which eats into the speedup.
+    :param cutoff_iter: Optional. Budget for number of planning iterations. Default 1000.
+    :param max_queue_size: Optional. Memory budget; turns the search into a beam search.
+    :param pqueue_key_func: Optional. A callable that takes in a planning iteration, cost, and heuristic
+                            and returns the Priority for the queue of candidates.
+    :param use_transposition_table: Optional boolean. If True (default), discards duplicate states.
+    :param batch_size: Optional. How many of the best candidates to pop and expand together. Default 1.
+                       With 1, the search expands nodes in exactly the same order as goap.find_plan().
+                       Larger batches amortize the per-node overhead on big numeric domains, but expand some
+                       nodes the sequential search would not have, and goal-check successors as they are
+                       generated, so the plans found may differ (though they are still valid plans).
+                       Each node in a batch counts as one iteration towards cutoff_iter.
+    :param deadline: Optional. A time.monotonic() timestamp after which the planner gives up.
+    :param max_generated: Optional. Budget for the number of candidate nodes generated (pushed onto the queue).
+    :raises: A NoPathError if no solution was found within the budget; it carries the search stats
+             and the best partial plan so far.
+    :return: A (cost, plan) tuple if a plan was found.
+    """
+    _require_numpy()
+
+    _start_pos = start_pos
+    if not isinstance(start_pos, STATE_TYPES):
+        _start_pos = State.fromdict(start_pos, name="START")
+
+    _goal = goal
+    if not isinstance(goal, STATE_TYPES):
+        _goal = State.fromdict(goal, name="END")
+
+    if isinstance(mapobj, VectorizedDomain):
+        vec_domain = mapobj
+    elif isinstance(mapobj, CompiledDomain):
+        vec_domain = VectorizedDomain(mapobj)
+    else:
+        # Keys nothing in the domain touches still need a slot so we can compare them against the goal.
+        vec_domain = VectorizedDomain(compile_domain(mapobj, extra_keys=(*_start_pos.keys(), *_goal.keys())))
+
+    if batch_size < 1:
+        raise ValueError(f"Batch size must be positive, got {batch_size}!")
+
+    root = SearchNode(_start_pos, cost=0, blackboard=vec_domain.state_vector(_start_pos))
+    search_kwargs = dict(
+        vec_domain=vec_domain,
+        root=root,
+        goal=_goal,
+        goal_vector=vec_domain.goal_vector(_goal),
+        goal_measure=goal_measure,
+        budget=SearchBudget(cutoff_iter=cutoff_iter, deadline=deadline, max_generated=max_generated),
+        max_queue_size=max_queue_size,
+        pqueue_key_func=pqueue_key_func,
+        use_transposition_table=use_transposition_table,
+    )
+
+    if batch_size == 1:
+        node = _search_sequential(**search_kwargs)
+    else:
+        node = _search_batched(batch_size=batch_size, **search_kwargs)
+
+    cost, path = _plan_for(vec_domain, node)
+
+    if handle_backtrack_node:
+        for parent_elem in path:
+            handle_backtrack_node(parent_elem)
+
+    return cost, path
+
+
+@suppress_not_found(default=None, default_factory=lambda: (PLUS_INF, list()))
+def maybe_find_plan(*args, **kwargs):
+    return find_plan(*args, **kwargs)
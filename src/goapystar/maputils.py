@@ -2,13 +2,13 @@ import json
 import os
 import typing
 
-from src.goapystar.state import State
+from src.goapystar.state import STATE_TYPES, State
 from src.goapystar.constants import MAPS_DIR, STATE_MARKER, NAME_MARKER
 
 
 class MapJsonEncoder(json.JSONEncoder):
     def default(self, o: typing.Any) -> typing.Any:
-        if isinstance(o, State):
+        if isinstance(o, STATE_TYPES):
             raw_serialized = o.to_dict()
             raw_serialized[STATE_MARKER] = True
             raw_serialized[NAME_MARKER] = o._name
@@ -1,23 +1,49 @@
+import operator
 import types
+from collections.abc import Mapping
 from copy import deepcopy
 
 
+def value_hash(value) -> int:
+    if isinstance(value, Mapping):
+        return statehash(value)
+
+    try:
+        return hash(value)
+
+    except TypeError:
+        # Unhashable (e.g. a list) - fall back to the string form.
+        return hash(str(value))
+
+
+def item_hash(key, value) -> int:
+    return hash((key, value_hash(value)))
+
+
 def statehash(goap_state: dict):
     # Used for transposition tables.
     # We want to skip equivalent plans, e.g. "Get[B] -> Get[A] -> Foo" == "Get[A] -> Get[B] -> Foo"
     # We don't care about the ordering if the results are equivalent,
     # and retaining such duplicates slows planning down significantly.
     # To do that, we need to have a way to check output states for any ordering.
-    # We'll do that by just sorting keys alphabetically then stringifying them + value.
-    if not isinstance(goap_state, dict):
+    #
+    # We do that Zobrist-style - hash each (key, value) pair independently and XOR them together.
+    # XOR doesn't care about ordering, so there's no need to sort anything, and, more importantly,
+    # the hash can be updated incrementally - changing one key is XOR-ing out the hash of the old pair
+    # and XOR-ing in the new one. Blackboards that support it (see blackboard.py) carry their hash
+    # along and keep it up to date as Effects are applied, so we don't have to rehash the whole state.
+    if not isinstance(goap_state, Mapping):
         # for recursion
-        return str(goap_state)
+        return value_hash(goap_state)
+
+    incremental = getattr(goap_state, "as_hash", None)
+    if incremental is not None:
+        return incremental()
+
+    hashed = 0
+    for (key, value) in goap_state.items():
+        hashed ^= item_hash(key, value)
 
-    sorted_keys = sorted(goap_state.keys(), key=lambda x: str(x))
-    ordered_pairs = ((sortkey, goap_state[sortkey]) for sortkey in sorted_keys)
-    recursivized = ((sortkey, statehash(sortval)) for (sortkey, sortval) in ordered_pairs)
-    as_tuple = tuple(recursivized)
-    hashed = hash(as_tuple)
     return hashed
 
 
@@ -88,3 +114,166 @@ class State(types.SimpleNamespace):
     def __str__(self):
         stringform = f"<{self._name} ({self.to_dict()})>"
         return stringform
+
+
+class FrozenState:
+    """An immutable, hashable State.
+
+    Behaves like State for reading, but cannot be modified after creation. In exchange:
+    - the (recursive, fairly pricey) state hash is only computed once, on creation,
+    - there are no underscore-prefixed bookkeeping keys mixed in with the data, so iterating doesn't need filtering,
+    - instances have no __dict__ of their own, so they are a fair bit smaller.
+
+    This makes it a good fit for anything that gets hashed repeatedly - dict/set keys and lru_cache arguments.
+    """
+    __slots__ = ("_data", "_name", "_hash")
+
+    def __init__(self, name=None, **values):
+        object.__setattr__(self, "_data", values)
+        object.__setattr__(self, "_name", name or "State")
+        object.__setattr__(self, "_hash", statehash(values))
+
+    @classmethod
+    def fromdict(cls, initdict: dict, name=None):
+        return cls(name=name, **initdict)
+
+    @classmethod
+    def fromstate(cls, state, name=None):
+        if isinstance(state, cls):
+            return state
+
+        if isinstance(state, State):
+            return cls.fromdict(state.to_dict(), name=name or state._name)
+
+        return cls.fromdict(dict(state.items()), name=name)
+
+    def to_dict(self):
+        return dict(self._data)
+
+    def keys(self):
+        return self._data.keys()
+
+    def items(self):
+        return self._data.items()
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __getattr__(self, item):
+        # Only called if regular attribute lookup fails, so this doesn't shadow the slots.
+        try:
+            return self._data[item]
+        except KeyError:
+            raise AttributeError(item) from None
+
+    def __setattr__(self, key, value):
+        raise TypeError(f"{self.__class__.__name__} is immutable!")
+
+    def __delattr__(self, item):
+        raise TypeError(f"{self.__class__.__name__} is immutable!")
+
+    def __getitem__(self, item):
+        return self._data[item]
+
+    def __contains__(self, item):
+        return item in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __reduce__(self):
+        return self.__class__.fromdict, (self._data, self._name)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memodict):
+        return self
+
+    def __eq__(self, other):
+        if isinstance(other, FrozenState):
+            return self._hash == other._hash and self._data == other._data
+
+        if isinstance(other, State):
+            return self._data == other.to_dict()
+
+        return NotImplemented
+
+    def as_hash(self):
+        return self._hash
+
+    def __hash__(self):
+        return self._hash
+
+    def __str__(self):
+        stringform = f"<{self._name} ({self._data})>"
+        return stringform
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(_name={self._name!r}, {self._data!r})"
+
+
+class SlotState(tuple):
+    """A fixed-width, immutable state for compiled domains (see usecases.actiongraph.compiled).
+
+    Keys are interned into integer slots ahead of time, so the state is just a tuple of values,
+    one per slot. Lookups are plain indexing and hashing is the (C-level) tuple hash - no dicts involved.
+
+    Unlike the other State classes, this one knows how to apply Effects to itself, so the planners
+    use it as its own blackboard instead of building a dict-like one from it.
+    """
+    __slots__ = ()
+
+    def get(self, slot, default=None):
+        # Slots only - a key name raises a TypeError rather than quietly reading as the default;
+        # code that works with names should go through CompiledDomain.view() instead.
+        try:
+            return self[slot]
+
+        except IndexError:
+            return default
+
+    def keys(self):
+        return range(len(self))
+
+    def items(self):
+        return enumerate(self)
+
+    def as_hash(self):
+        return hash(self)
+
+    def apply_effects(self, effects, default=0, op=None):
+        """Returns the state after applying Effects, given as (slot, value) pairs.
+        The update op works like in update_counts(), except a per-key dict of ops is keyed by slots.
+        """
+        values = list(self)
+        pairs = effects.items() if isinstance(effects, Mapping) else effects
+
+        if op is None:
+            for (slot, value) in pairs:
+                values[slot] += value
+
+        else:
+            op_is_dict = isinstance(op, dict)
+            for (slot, value) in pairs:
+                op_for_slot = op.get(slot, operator.add) if op_is_dict else op
+                values[slot] = op_for_slot(values[slot], value)
+
+        return self.__class__(values)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({tuple(self)!r})"
+
+
+def freeze_state(state, name=None):
+    """Converts a state into an immutable, hashable equivalent (if it isn't one already)."""
+    if isinstance(state, SlotState):
+        return state
+
+    return FrozenState.fromstate(state, name=name)
+
+
+STATE_TYPES = (State, FrozenState, SlotState)
@@ -1,8 +1,9 @@
 import typing
 
-from .state import State
+from .impls.nodes import SearchNode
+from .state import State, FrozenState, SlotState
 
-StateLike = typing.Union[dict, State]
+StateLike = typing.Union[dict, State, FrozenState, SlotState]
 
 Cost = float
 Preconditions = StateLike
@@ -15,8 +16,8 @@ ActionDict = typing.Dict[ActionKey, ActionTuple]
 
 IntoState = typing.Union[StateLike, ActionTuple, ActionKey]
 
-PathTuple = typing.Tuple[Cost, ActionKey, typing.Sequence[ActionKey]]
-CandidateTuple = typing.Tuple[typing.Any, Cost, ActionKey, typing.Sequence[ActionKey]]
+PathTuple = typing.Tuple[Cost, ActionKey, SearchNode]
+CandidateTuple = typing.Tuple[typing.Any, typing.Hashable, SearchNode]
 ResultTuple = typing.Tuple[Cost, typing.Sequence[IntoState]]
 
 BlackboardBinOp = typing.Callable[[dict, dict], typing.Any]
\ No newline at end of file
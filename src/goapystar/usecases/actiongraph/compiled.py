@@ -0,0 +1,231 @@
+"""Compiled planning domains.
+
+The plain action maps are string-keyed dicts all the way down, so every precondition check,
+Effect application, goal check and state hash in the planner's inner loop is a round of dict lookups.
+
+compile_domain() does that work once, upfront: every state key used by any Action gets interned
+into an integer slot, states become fixed-width SlotState tuples, and preconditions, Effects and goals
+become tuples of (slot, value) pairs. Actions are referred to by their index in the domain.
+
+The compiled domain hands out the same kinds of callbacks as the helpers in utils.py, so any of the
+planners can run on it as-is - just compile the start and goal states with the same domain:
+
+    domain = compile_domain(load_map_json("debug_complex"))
+    cost, path = find_plan(
+        start_pos=domain.compile_state(start),
+        goal=domain.compile_goal(goal),
+        adjacency_gen=domain.get_actions(),
+        preconditions_check=domain.preconds_checker(),
+        neighbor_measure=domain.neighbor_measure(),
+        goal_check=domain.goal_checker(),
+        get_effects=domain.get_effects(),
+        ...
+    )
+    plan = domain.decode_plan(path)
+
+Code that looks states up by key name rather than by slot (e.g. the heuristics) can either decode them
+with decode_state(), or look through them with view(), which translates names to slots without copying.
+"""
+import operator
+import typing
+from collections.abc import Mapping
+
+from ...state import SlotState, STATE_TYPES
+from ...types import ActionDict, ActionKey, BlackboardBinOp, StateLike
+
+ActionIndex = int
+SlotPairs = typing.Tuple[typing.Tuple[int, typing.Any], ...]
+
+
+class NamedView(Mapping):
+    """A read-only, by-name view of a SlotState. Slots the state leaves as None read as unset."""
+    __slots__ = ("_state", "_slots")
+
+    def __init__(self, state: SlotState, slots: typing.Dict[str, int]):
+        self._state = state
+        self._slots = slots
+
+    def get(self, key, default=None):
+        slot = self._slots.get(key)
+        if slot is None:
+            return default
+
+        value = self._state[slot]
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self._state[self._slots[key]]
+        if value is None:
+            raise KeyError(key)
+
+        return value
+
+    def __iter__(self):
+        state = self._state
+        return (key for (key, slot) in self._slots.items() if state[slot] is not None)
+
+    def __len__(self):
+        return sum(1 for value in self._state if value is not None)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict(self)!r})"
+
+
+class CompiledDomain:
+    def __init__(
+        self,
+        mapobj: ActionDict,
+        default: typing.Any = 0,
+        extra_keys: typing.Iterable[str] = (),
+    ):
+        self.default = default
+
+        # Sorted, so that action indices compare the same way the action names would;
+        # the planners use the action as a tie-breaker, so this keeps the search order identical.
+        self.actions: typing.Tuple[ActionKey, ...] = tuple(sorted(mapobj.keys()))
+        self.action_indices: typing.Dict[ActionKey, ActionIndex] = {
+            action: idx for (idx, action) in enumerate(self.actions)
+        }
+
+        state_keys = list(extra_keys)
+        for action in self.actions:
+            cost, preconds, effects = mapobj[action]
+            state_keys.extend(preconds.keys())
+            state_keys.extend(effects.keys())
+
+        # dict.fromkeys() dedupes while keeping the first-seen order.
+        self.keys: typing.Tuple[str, ...] = tuple(dict.fromkeys(state_keys))
+        self.slots: typing.Dict[str, int] = {key: slot for (slot, key) in enumerate(self.keys)}
+
+        self.costs: typing.Tuple[float, ...] = tuple(mapobj[action][0] for action in self.actions)
+        self.preconds: typing.Tuple[SlotPairs, ...] = tuple(
+            self.compile_pairs(mapobj[action][1]) for action in self.actions
+        )
+        self.effects: typing.Tuple[SlotPairs, ...] = tuple(
+            self.compile_pairs(mapobj[action][2]) for action in self.actions
+        )
+
+    def slot_for(self, key: str) -> int:
+        try:
+            return self.slots[key]
+
+        except KeyError:
+            raise KeyError(
+                f"State key {key!r} is not used by any Action in this domain; "
+                f"pass it in compile_domain(extra_keys=...) if you need it."
+            ) from None
+
+    def compile_pairs(self, state: StateLike) -> SlotPairs:
+        return tuple(
+            (self.slot_for(key), value)
+            for (key, value) in state.items()
+            if value is not None
+        )
+
+    def compile_state(self, state: typing.Optional[StateLike] = None) -> SlotState:
+        values = [self.default] * len(self.keys)
+
+        for (key, value) in (state or {}).items():
+            values[self.slot_for(key)] = value
+
+        return SlotState(values)
+
+    def compile_goal(self, goal: StateLike) -> SlotState:
+        # Unlike regular states, slots the goal doesn't care about are None rather than the default.
+        values = [None] * len(self.keys)
+
+        for (key, value) in goal.items():
+            values[self.slot_for(key)] = value
+
+        return SlotState(values)
+
+    def compile_ops(
+        self,
+        ops: typing.Dict[str, BlackboardBinOp]
+    ) -> typing.Dict[int, BlackboardBinOp]:
+        """Converts a per-key blackboard_update_op dict into a per-slot one."""
+        return {self.slot_for(key): op for (key, op) in ops.items()}
+
+    def decode_state(self, state: SlotState) -> dict:
+        return {key: value for (key, value) in zip(self.keys, state) if value is not None}
+
+    def view(self, state: SlotState) -> NamedView:
+        return NamedView(state, self.slots)
+
+    def decode_pairs(self, pairs: SlotPairs) -> dict:
+        return {self.keys[slot]: value for (slot, value) in pairs}
+
+    def decode_map(self) -> ActionDict:
+        """The action map this domain was compiled from (with None preconditions and Effects left out)."""
+        return {
+            action: (cost, self.decode_pairs(preconds), self.decode_pairs(effects))
+            for (action, cost, preconds, effects) in zip(self.actions, self.costs, self.preconds, self.effects)
+        }
+
+    def decode_plan(self, path: typing.Sequence[typing.Any]) -> list:
+        """Translates action indices in a found plan back into action names (and states into dicts)."""
+        return [
+            self.decode_state(step) if isinstance(step, STATE_TYPES) else self.actions[step]
+            for step in path
+        ]
+
+    def get_actions(self) -> typing.Callable:
+        action_indices = tuple(range(len(self.actions)))
+
+        def _actiongetter(*args, **kwargs) -> typing.Sequence[ActionIndex]:
+            return action_indices
+
+        return _actiongetter
+
+    def get_effects(self) -> typing.Callable:
+        effects = self.effects
+
+        def _effectgetter(action: ActionIndex, *args, **kwargs) -> SlotPairs:
+            return effects[action]
+
+        return _effectgetter
+
+    def preconds_checker(self) -> typing.Callable[[ActionIndex, SlotState], bool]:
+        preconds = self.preconds
+
+        def _checker(action: ActionIndex, blackboard: SlotState) -> bool:
+            for (slot, value) in preconds[action]:
+                if blackboard[slot] < value:
+                    return False
+
+            return True
+
+        return _checker
+
+    def neighbor_measure(self) -> typing.Callable:
+        costs = self.costs
+
+        def _measurer(start, end: ActionIndex) -> float:
+            return costs[end]
+
+        return _measurer
+
+    def goal_checker(self, cmp_op=operator.gt) -> typing.Callable[[SlotState, SlotState], bool]:
+        # The goal is the same object for the whole search, so we only need to extract its pairs once.
+        cached_goal = [None, ()]
+
+        def _goalchecker(pos: SlotState, goal: SlotState) -> bool:
+            if cached_goal[0] is not goal:
+                cached_goal[0] = goal
+                cached_goal[1] = tuple((slot, value) for (slot, value) in enumerate(goal) if value is not None)
+
+            for (slot, value) in cached_goal[1]:
+                if cmp_op(value, pos[slot]):
+                    return False
+
+            return True
+
+        return _goalchecker
+
+
+def compile_domain(
+    mapobj: ActionDict,
+    default: typing.Any = 0,
+    extra_keys: typing.Iterable[str] = (),
+) -> CompiledDomain:
+    return CompiledDomain(mapobj=mapobj, default=default, extra_keys=extra_keys)
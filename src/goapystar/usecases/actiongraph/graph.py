@@ -9,6 +9,7 @@ class ActionGraph(BasePathfindingGraph):
             raw_map=raw_map or reasoning_map(),
             start_pos=start_pos
         )
+        self._reverse_map = None
 
 
     def __getitem__(self, item):
@@ -25,6 +26,7 @@ class ActionGraph(BasePathfindingGraph):
 
 
     def __setitem__(self, key, value):
+        self._reverse_map = None
         path = key.split(",")
         focus = self.map
         curr = NotImplemented
@@ -47,6 +49,30 @@ class ActionGraph(BasePathfindingGraph):
         return adjacents
 
 
+    @property
+    def reverse_map(self) -> dict:
+        # The same edges, pointing the other way; built on first use and kept until the map changes.
+        if self._reverse_map is None:
+            reverse_map = {}
+
+            for (start, edges) in self.map.items():
+                for (end, cost) in edges.items():
+                    reverse_map.setdefault(end, {})[start] = cost
+
+            self._reverse_map = reverse_map
+
+        return self._reverse_map
+
+
+    def adjacent_reverse_lazy(self, pos, *args, **kwargs):
+        adjacents = (k for k in self.reverse_map.get(pos) or set())
+        return adjacents
+
+
+    def edge_cost(self, start, end, *args, **kwargs) -> float:
+        return self.map[start][end]
+
+
     def set_goal(self, pos, *args, **kwargs) -> BasePathfindingGraph:
         self.current_goal = pos
         return self
@@ -0,0 +1,25 @@
+from .relaxed import (
+    RelaxedDomain,
+    relaxed_measure,
+    hadd_measure,
+    hmax_measure,
+    relaxed_plan_measure,
+)
+from .deficit import (
+    best_rates,
+    deficit_measure,
+)
+from .landmarks import (
+    LandmarkGraph,
+    LandmarkCountMeasure,
+    landmark_measure,
+)
+from .pdb import (
+    PatternDatabase,
+    PatternDatabases,
+    build_pattern_databases,
+    cached_pattern_databases,
+    load_pattern_databases,
+    save_pattern_databases,
+    pattern_database_measure,
+)
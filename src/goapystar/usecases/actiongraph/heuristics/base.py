@@ -0,0 +1,73 @@
+"""Shared plumbing for the goal_measures in this package.
+
+All of them precompute whatever they can for a given goal and then evaluate states against that.
+The planners pass the same goal object for the whole search, so measure_per_goal() only rebuilds
+the precomputed part when it sees a different goal.
+
+The heuristics work out their estimates by key name, so for planning on a compiled domain, they need
+to be built from the CompiledDomain rather than the action map - see split_domain() and by_name().
+"""
+import typing
+
+from ..compiled import CompiledDomain
+from ....state import SlotState
+from ....types import ActionDict, StateLike
+
+PLUS_INF = float("inf")
+
+Estimator = typing.Callable[[StateLike], float]
+
+MapLike = typing.Union[ActionDict, CompiledDomain]
+
+
+def split_domain(mapobj: MapLike) -> typing.Tuple[ActionDict, typing.Optional[CompiledDomain]]:
+    """The action map to derive estimates from, and the compiled domain the states come from (if any)."""
+    if isinstance(mapobj, CompiledDomain):
+        return mapobj.decode_map(), mapobj
+
+    return mapobj, None
+
+
+def by_name(compiled: typing.Optional[CompiledDomain], state: StateLike) -> StateLike:
+    """The state as something that can be looked up by key name."""
+    if compiled is not None and isinstance(state, SlotState):
+        return compiled.view(state)
+
+    return state
+
+
+def require_state(pos: typing.Any, compiled: typing.Optional[CompiledDomain] = None):
+    if isinstance(pos, (str, int)):
+        # An Action's Effects on their own say next to nothing about how far off the goal we are.
+        raise TypeError(
+            f"This heuristic estimates from states, got Action {pos!r} instead - "
+            f"run the planner with astar=True to get states passed in."
+        )
+
+    if compiled is None and isinstance(pos, SlotState):
+        # Otherwise, every key would read as missing, and every goal as out of reach.
+        raise TypeError(
+            "Compiled states are indexed by slot rather than by key name - "
+            "build the heuristic from the CompiledDomain instead of the action map."
+        )
+
+
+def measure_per_goal(
+    build_estimator: typing.Callable[[StateLike], Estimator],
+    compiled: typing.Optional[CompiledDomain] = None,
+) -> typing.Callable[[StateLike, StateLike], float]:
+    """Turns a function building a state -> estimate callable for a goal into a goal_measure.
+    With a compiled domain, both the goal and the states get passed on viewed by key name.
+    """
+    cached_goal = [None, None]
+
+    def _measure(pos: StateLike, goal: StateLike) -> float:
+        require_state(pos, compiled)
+
+        if cached_goal[0] is not goal:
+            cached_goal[0] = goal
+            cached_goal[1] = build_estimator(by_name(compiled, goal))
+
+        return cached_goal[1](by_name(compiled, pos))
+
+    return _measure
@@ -0,0 +1,90 @@
+"""Numeric deficit heuristic for resource-style goals.
+
+For goals like {"Money": 30, "Rested": 5} (checked as minimums, like goal_checker_for() does),
+a quick and surprisingly decent estimate is how much of each key is still missing, priced
+at the best rate any Action offers for it:
+
+    estimate(key) = max(0, goal[key] - state[key]) * min over Actions a of (cost(a) / gain of key from a)
+
+No plan can top up the key any cheaper than that, so each per-key estimate is a lower bound;
+the estimates for the goal keys are then either:
+- maxed, which stays admissible (A* plans stay optimal), or
+- summed, which is greedier - it can overestimate when one Action helps with several keys at once,
+  but pushes the search harder towards goals with several keys missing.
+
+The best rates only depend on the domain and the goal keys, so they get worked out once per goal,
+and an estimate is just a few subtractions and multiplications per goal key.
+"""
+import typing
+
+from .base import PLUS_INF, Estimator, MapLike, measure_per_goal, split_domain
+from ....types import ActionDict, StateLike
+
+DEFICIT_COMBINERS = ("max", "sum")
+
+
+def best_rates(mapobj: ActionDict) -> typing.Dict[str, float]:
+    """The cheapest cost per unit gained of each key, over all Actions increasing it."""
+    rates = {}
+
+    for (cost, preconds, effects) in mapobj.values():
+        for (key, gain) in effects.items():
+            if not gain or gain <= 0:
+                continue
+
+            rate = cost / gain
+            if rate < rates.get(key, PLUS_INF):
+                rates[key] = rate
+
+    return rates
+
+
+def deficit_measure(
+    mapobj: MapLike,
+    combine: str = "max",
+    default: typing.Any = 0,
+) -> typing.Callable[[StateLike, StateLike], float]:
+    """Builds a goal_measure pricing the missing amount of each goal key at the best available rate.
+
+    :param mapobj: The action map, or the same compiled with compile_domain() to plan on compiled states.
+    :param combine: 'max' (default) for an admissible estimate, 'sum' for a greedier one.
+    :param default: The value state keys have if not set; should match the planner's blackboard_default.
+    :return: A callable taking a state and the goal, for use as a goal_measure with astar=True.
+    """
+    if combine not in DEFICIT_COMBINERS:
+        raise ValueError(f"Unknown way to combine deficits {combine!r}, expected one of {DEFICIT_COMBINERS}!")
+
+    actions, compiled = split_domain(mapobj)
+    rates = best_rates(actions)
+    use_max = combine == "max"
+
+    def _build_estimator(goal: StateLike) -> Estimator:
+        # Keys nothing can increase are priced at infinity; if they're short, the goal is unreachable.
+        terms = tuple(
+            (key, target, rates.get(key, PLUS_INF))
+            for (key, target) in goal.items()
+            if target is not None
+        )
+
+        def _estimate(state: StateLike) -> float:
+            result = 0
+
+            for (key, target, rate) in terms:
+                deficit = target - state.get(key, default)
+
+                if deficit <= 0:
+                    continue
+
+                key_estimate = deficit * rate
+
+                if use_max:
+                    if key_estimate > result:
+                        result = key_estimate
+                else:
+                    result += key_estimate
+
+            return result
+
+        return _estimate
+
+    return measure_per_goal(_build_estimator, compiled)
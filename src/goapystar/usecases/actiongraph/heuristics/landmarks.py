@@ -0,0 +1,317 @@
+"""Landmark-count heuristic for action maps.
+
+A landmark is a condition (e.g. HasFood >= 1) that *every* valid plan has to make true at some point.
+For a goal like {"Fed": 1}, that's not only Fed >= 1 itself - the only way to get Fed is to Eat,
+so HasFood >= 1 is a landmark too, and it has to hold right before Fed does; the only way to get
+HasFood is to Shop, so Money >= 10 is one, etc.
+
+The landmarks are extracted by working backwards from the goal conditions: if all the Actions that could
+achieve a landmark (and that are reachable at all, ignoring negative Effects) need some key to be at least
+some value, that's a landmark as well, ordered before the one we came from.
+
+The heuristic is then the (cost-weighted) count of the landmarks a search node still needs:
+- the ones no state along the path leading to it has reached yet, plus
+- the ones that were reached, but have since been undone and are needed again
+  (because they are part of the goal or need to hold before some landmark we haven't reached yet).
+
+Which landmarks were reached depends on the path taken, so this tracks them per search node,
+derived from the parent's on each step - only the landmarks on the keys the Action touched
+need to be rechecked. This needs the planner to tell us which node a state came from, which
+the core search does in A* mode (see measure_successor()). The A* planners also tell us where
+each search starts (see start_search()), so the landmarks the start state already meets count
+as reached, and nothing carries over from one search to the next.
+"""
+import typing
+
+from .base import PLUS_INF, MapLike, by_name, require_state, split_domain
+from .relaxed import RelaxedDomain
+from ....state import statehash
+from ....types import ActionDict, ActionKey, StateLike
+
+Condition = typing.Tuple[str, typing.Any]
+
+
+class LandmarkGraph:
+    """The landmarks for reaching a goal from a given initial state, with their orderings and weights."""
+
+    def __init__(
+        self,
+        mapobj: ActionDict,
+        goal: StateLike,
+        initial: StateLike,
+        default: typing.Any = 0,
+        admissible: bool = False,
+    ):
+        self.default = default
+        self.actions: typing.Tuple[ActionKey, ...] = tuple(sorted(mapobj.keys()))
+
+        reachable_actions = self._relaxed_reachable_actions(mapobj, goal, initial)
+
+        goal_conditions = [(key, value) for (key, value) in goal.items() if value is not None]
+        landmark_indices: typing.Dict[Condition, int] = {}
+        # Landmark index -> indices of the landmarks that have to be true right before it gets achieved.
+        predecessors: typing.Dict[int, typing.Set[int]] = {}
+        achievers: typing.Dict[int, typing.Tuple[ActionKey, ...]] = {}
+
+        pending = []
+        for condition in goal_conditions:
+            if condition not in landmark_indices:
+                landmark_indices[condition] = len(landmark_indices)
+                pending.append(condition)
+
+        while pending:
+            condition = pending.pop()
+            key, value = condition
+            landmark = landmark_indices[condition]
+
+            cond_achievers = tuple(
+                action for action in self.actions
+                if action in reachable_actions and (mapobj[action][2].get(key) or 0) > 0
+            )
+            achievers[landmark] = cond_achievers
+            predecessors.setdefault(landmark, set())
+
+            if not cond_achievers or initial.get(key, default) >= value:
+                # Either it's unreachable, or already true from the start; either way, nothing to backchain.
+                continue
+
+            # A key every achiever needs is a landmark itself - at the least demanding of their values.
+            shared_preconds = None
+            for action in cond_achievers:
+                preconds = {
+                    pre_key: pre_value for (pre_key, pre_value) in mapobj[action][1].items()
+                    if pre_value is not None
+                }
+
+                if shared_preconds is None:
+                    shared_preconds = preconds
+                else:
+                    shared_preconds = {
+                        pre_key: min(pre_value, preconds[pre_key])
+                        for (pre_key, pre_value) in shared_preconds.items()
+                        if pre_key in preconds
+                    }
+
+            for shared_condition in (shared_preconds or {}).items():
+                if shared_condition not in landmark_indices:
+                    landmark_indices[shared_condition] = len(landmark_indices)
+                    pending.append(shared_condition)
+
+                predecessors[landmark].add(landmark_indices[shared_condition])
+
+        self.landmarks: typing.Tuple[Condition, ...] = tuple(landmark_indices.keys())
+        self.all_mask = (1 << len(self.landmarks)) - 1
+        self.goal_mask = self.mask_of(landmark_indices[condition] for condition in goal_conditions)
+
+        # The reverse of predecessors - which landmarks each landmark needs to hold *for*.
+        successor_masks = [0] * len(self.landmarks)
+        for (landmark, landmark_preds) in predecessors.items():
+            for pred in landmark_preds:
+                successor_masks[pred] |= 1 << landmark
+        self.successor_masks: typing.Tuple[int, ...] = tuple(successor_masks)
+
+        # Only landmarks on keys an Action changes can change truth value when it's applied.
+        self.touched_masks: typing.Dict[ActionKey, int] = {
+            action: self.mask_of(
+                idx for (idx, (key, value)) in enumerate(self.landmarks)
+                if key in mapobj[action][2].keys()
+            )
+            for action in self.actions
+        }
+
+        self.weights: typing.Tuple[float, ...] = self._weights(mapobj, achievers, admissible)
+
+    @staticmethod
+    def mask_of(indices: typing.Iterable[int]) -> int:
+        mask = 0
+        for idx in indices:
+            mask |= 1 << idx
+        return mask
+
+    def _relaxed_reachable_actions(
+        self,
+        mapobj: ActionDict,
+        goal: StateLike,
+        initial: StateLike,
+    ) -> typing.Set[ActionKey]:
+        relaxed = RelaxedDomain(mapobj, goal, default=self.default)
+        costs, _ = relaxed.condition_costs(
+            relaxed.deficits(relaxed.project(initial)),
+            combine=lambda values: max(values, default=0),
+            fractional=True,
+        )
+
+        return {
+            action for (action, preconds) in zip(relaxed.actions, relaxed.preconds)
+            if all(costs[cond] < PLUS_INF for cond in preconds)
+        }
+
+    def _weights(
+        self,
+        mapobj: ActionDict,
+        achievers: typing.Dict[int, typing.Tuple[ActionKey, ...]],
+        admissible: bool,
+    ) -> typing.Tuple[float, ...]:
+        # Each Action's cost gets split evenly between all the landmarks it achieves (uniform cost partitioning),
+        # so that summing the weights never counts an Action twice; otherwise, just the cheapest achiever.
+        num_achieved: typing.Dict[ActionKey, int] = {}
+        if admissible:
+            for landmark_achievers in achievers.values():
+                for action in landmark_achievers:
+                    num_achieved[action] = num_achieved.get(action, 0) + 1
+
+        return tuple(
+            min(
+                (mapobj[action][0] / num_achieved.get(action, 1) for action in achievers[idx]),
+                default=PLUS_INF
+            )
+            for idx in range(len(self.landmarks))
+        )
+
+    def true_mask(self, state: StateLike, mask: typing.Optional[int] = None) -> int:
+        """Which of the landmarks (optionally, only the ones in mask) hold in the state."""
+        default = self.default
+        result = 0
+
+        for (idx, (key, value)) in enumerate(self.landmarks):
+            bit = 1 << idx
+
+            if mask is not None and not mask & bit:
+                continue
+
+            if state.get(key, default) >= value:
+                result |= bit
+
+        return result
+
+    def estimate(self, accepted: int, true_now: int) -> float:
+        """Total weight of the landmarks still needed, given which ones were reached and which hold now."""
+        needed = self.all_mask & ~accepted
+        lost = accepted & ~true_now
+
+        while lost:
+            bit = lost & -lost
+            lost ^= bit
+            idx = bit.bit_length() - 1
+
+            if bit & self.goal_mask or self.successor_masks[idx] & ~accepted:
+                needed |= bit
+
+        result = 0
+        weights = self.weights
+
+        while needed:
+            bit = needed & -needed
+            needed ^= bit
+            result += weights[bit.bit_length() - 1]
+
+        return result
+
+
+class LandmarkCountMeasure:
+    """A goal_measure counting the landmarks each search node has yet to reach."""
+
+    def __init__(
+        self,
+        mapobj: MapLike,
+        default: typing.Any = 0,
+        admissible: bool = False,
+    ):
+        self.mapobj, self.compiled = split_domain(mapobj)
+        self.default = default
+        self.admissible = admissible
+
+        self.graph: typing.Optional[LandmarkGraph] = None
+        self._goal = None
+        # State hash -> (landmarks reached on the way there, landmarks true there) bitmasks.
+        self._reached: typing.Dict[int, typing.Tuple[int, int]] = {}
+
+    def start_search(self, goal: StateLike, initial: StateLike) -> LandmarkGraph:
+        """Extracts the landmarks for a new search and forgets everything about the previous one.
+        The A* planners call this with their start state as they set out; see common.notify_search_start().
+        """
+        self.graph = LandmarkGraph(
+            self.mapobj,
+            by_name(self.compiled, goal),
+            by_name(self.compiled, initial),
+            default=self.default,
+            admissible=self.admissible,
+        )
+        self._goal = goal
+
+        initially_true = self.graph.true_mask(by_name(self.compiled, initial))
+        self._reached = {statehash(initial): (initially_true, initially_true)}
+        return self.graph
+
+    def measure_successor(
+        self,
+        state: StateLike,
+        goal: StateLike,
+        parent: StateLike,
+        action: typing.Optional[ActionKey] = None,
+    ) -> float:
+        """Estimate for a state reached from the parent state by applying the action."""
+        require_state(state, self.compiled)
+
+        parent_hash = statehash(parent)
+        parent_reached = self._reached.get(parent_hash) if goal is self._goal else None
+
+        if parent_reached is None:
+            # Anything we haven't generated ourselves can only be the root of a new search
+            # (by a planner that doesn't announce them).
+            self.start_search(goal, parent)
+            parent_reached = self._reached[parent_hash]
+
+        graph = self.graph
+        parent_accepted, parent_true = parent_reached
+
+        if self.compiled is not None and action is not None:
+            action = self.compiled.actions[action]
+
+        touched = graph.touched_masks.get(action, graph.all_mask)
+
+        true_now = (parent_true & ~touched) | graph.true_mask(by_name(self.compiled, state), mask=touched)
+        accepted = parent_accepted | true_now
+
+        state_hash = statehash(state)
+        known = self._reached.get(state_hash)
+
+        if known is not None:
+            # Reached along more than one path - only count on what all of them have reached.
+            accepted &= known[0]
+
+        self._reached[state_hash] = (accepted, true_now)
+        return graph.estimate(accepted, true_now)
+
+    def __call__(self, pos: StateLike, goal: StateLike) -> float:
+        require_state(pos, self.compiled)
+
+        if self.graph is None or goal is not self._goal:
+            # Same as in measure_successor() - the first state we get asked about for a goal is where the search starts.
+            self.start_search(goal, pos)
+
+        reached = self._reached.get(statehash(pos))
+
+        if reached is not None:
+            return self.graph.estimate(*reached)
+
+        # Without knowing the path, the best we can do is to assume only what holds now was reached.
+        true_now = self.graph.true_mask(by_name(self.compiled, pos))
+        return self.graph.estimate(true_now, true_now)
+
+
+def landmark_measure(
+    mapobj: MapLike,
+    default: typing.Any = 0,
+    admissible: bool = False,
+) -> LandmarkCountMeasure:
+    """Builds a landmark-count goal_measure for the action map.
+
+    :param mapobj: The action map, or the same compiled with compile_domain() to plan on compiled states.
+    :param default: The value state keys have if not set; should match the planner's blackboard_default.
+    :param admissible: If True, splits each Action's cost between the landmarks it achieves,
+                       so that the estimate never overshoots. Otherwise (default), each landmark counts
+                       for its cheapest achiever's full cost, which is more informative but greedier.
+    :return: A goal_measure, for use with astar=True.
+    """
+    return LandmarkCountMeasure(mapobj, default=default, admissible=admissible)
@@ -0,0 +1,554 @@
+"""Pattern database heuristics for action maps.
+
+A pattern is a small subset of the state keys. Projecting the problem onto a pattern (ignoring
+all the other keys, in Effects and preconditions alike) and capping the values gives an abstract
+problem small enough to solve exhaustively. For each goal, we do - working backwards from the abstract
+states that satisfy it, we store the resulting cost-to-go from every abstract state in a table row.
+The abstract problem is easier than the real one, so these costs never overestimate.
+
+Rows only get solved for the goals actually asked for, so memory grows with the number of abstract states
+times the number of distinct goals, rather than with the number of abstract states squared. Likewise, the caps
+grow with the goals: a goal asking for more than a cap gets the pattern rebuilt with the cap raised to match
+(up to max_states) - past the cap, every value looks the same, so the goal would only get credit for the cap.
+
+At planning time, an estimate is then a table lookup per pattern - project the state, compute
+its index and read off the cost - combined over the patterns either by:
+- max (default), which is always admissible, or
+- sum, which is more informative, but only admissible if no Action affects more than one pattern.
+
+Solving the abstract problems takes a while for bigger patterns/caps, so the patterns (along with the rows
+for any goals passed in up front) get saved next to the map JSON (e.g. maps/debug_complex.pdb.json) and
+reloaded from there afterwards; see cached_pattern_databases() and pattern_database_measure().
+
+The abstraction assumes the default, additive Effects. Abstract states are integers; values in between
+get rounded towards whatever is easier to get to the goal from - states up, goals down - since having more
+never makes the goal harder to reach, that keeps the estimates a lower bound for non-integer values too.
+"""
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import os
+import typing
+
+from .base import PLUS_INF, Estimator, measure_per_goal
+from ..compiled import CompiledDomain
+from ....constants import MAPS_DIR
+from ....maputils import MapJsonEncoder, load_map_json
+from ....types import ActionDict, StateLike
+
+PDB_COMBINERS = ("max", "sum")
+PDB_FILE_SUFFIX = ".pdb.json"
+DEFAULT_MAX_STATES = 2 ** 16
+
+
+# An Action projected onto a pattern: (cost, preconditions, Effects), the latter two as (slot, value) pairs.
+AbstractAction = typing.Tuple[float, typing.Tuple[typing.Tuple[int, typing.Any], ...], typing.Tuple[typing.Tuple[int, typing.Any], ...]]
+
+
+class PatternDatabase:
+    """Cost-to-go tables for an action map projected onto a handful of keys.
+
+    Abstract states are the (capped) values of the pattern keys, stored by their mixed-radix index.
+    rows[goal index][state index] is the cheapest abstract cost to get from the state to
+    anything at least as good as the goal (i.e. all keys >= the goal's values); rows get solved
+    on first use, see row().
+    """
+
+    def __init__(
+        self,
+        keys: typing.Sequence[str],
+        floors: typing.Sequence[int],
+        caps: typing.Sequence[int],
+        actions: typing.Sequence[AbstractAction],
+        rows: typing.Optional[typing.Dict[int, typing.List[float]]] = None,
+    ):
+        self.keys: typing.Tuple[str, ...] = tuple(keys)
+        self.floors: typing.Tuple[int, ...] = tuple(floors)
+        self.caps: typing.Tuple[int, ...] = tuple(caps)
+        self.sizes: typing.Tuple[int, ...] = tuple(cap - floor + 1 for (floor, cap) in zip(self.floors, self.caps))
+        self.actions: typing.Tuple[AbstractAction, ...] = tuple(actions)
+
+        # Mixed-radix multipliers; the last key varies fastest, same as itertools.product().
+        multipliers = []
+        stride = 1
+        for size in reversed(self.sizes):
+            multipliers.append(stride)
+            stride *= size
+
+        self.multipliers: typing.Tuple[int, ...] = tuple(reversed(multipliers))
+        self.num_states = stride
+        self.rows: typing.Dict[int, typing.List[float]] = dict(rows or {})
+        self._predecessors: typing.Optional[typing.List[typing.List[typing.Tuple[int, float]]]] = None
+
+    @classmethod
+    def project(
+        cls,
+        mapobj: ActionDict,
+        keys: typing.Sequence[str],
+        floors: typing.Sequence[int],
+        caps: typing.Sequence[int],
+    ) -> "PatternDatabase":
+        """Projects the action map onto the keys; no rows get solved yet."""
+        slots = {key: slot for (slot, key) in enumerate(keys)}
+        actions = []
+
+        for (cost, preconds, effects) in mapobj.values():
+            pattern_effects = tuple(
+                (slots[key], value) for (key, value) in effects.items()
+                if key in slots and value
+            )
+
+            if not pattern_effects:
+                # Can't move us anywhere in the abstract space.
+                continue
+
+            pattern_preconds = tuple(
+                (slots[key], value) for (key, value) in preconds.items()
+                if key in slots and value is not None
+            )
+            actions.append((cost, pattern_preconds, pattern_effects))
+
+        return cls(keys, floors, caps, actions)
+
+    def with_caps(self, caps: typing.Sequence[int]) -> "PatternDatabase":
+        """The same pattern with different caps; the rows have to be solved again."""
+        return self.__class__(self.keys, self.floors, caps, self.actions)
+
+    def clamp(self, slot: int, value, rounding: typing.Callable[[typing.Any], int] = math.ceil) -> int:
+        return min(max(rounding(value), self.floors[slot]), self.caps[slot])
+
+    def index_of(self, values: typing.Sequence, rounding: typing.Callable[[typing.Any], int] = math.ceil) -> int:
+        return sum(
+            (self.clamp(slot, value, rounding) - self.floors[slot]) * self.multipliers[slot]
+            for (slot, value) in enumerate(values)
+        )
+
+    def states(self) -> typing.Iterator[typing.Tuple[int, ...]]:
+        return itertools.product(*(range(floor, cap + 1) for (floor, cap) in zip(self.floors, self.caps)))
+
+    def predecessors(self) -> typing.List[typing.List[typing.Tuple[int, float]]]:
+        """Per abstract state, the (state index, Action cost) of the abstract states one Action away from it."""
+        if self._predecessors is not None:
+            return self._predecessors
+
+        # Same as for the states, anything past the cap is as good as the cap.
+        capped_actions = [
+            (cost, tuple((slot, min(value, self.caps[slot])) for (slot, value) in preconds), effects)
+            for (cost, preconds, effects) in self.actions
+        ]
+        predecessors: typing.List[typing.List[typing.Tuple[int, float]]] = [[] for _ in range(self.num_states)]
+
+        for (state_idx, state) in enumerate(self.states()):
+            for (cost, preconds, effects) in capped_actions:
+                if any(state[slot] < value for (slot, value) in preconds):
+                    continue
+
+                successor = list(state)
+                for (slot, value) in effects:
+                    if value < 0 and state[slot] == self.caps[slot]:
+                        # The top value stands for 'cap or more', so we can't tell how far a decrease takes us;
+                        # assuming it's still at least the cap keeps the abstraction optimistic.
+                        continue
+                    successor[slot] = self.clamp(slot, successor[slot] + value)
+
+                successor_idx = self.index_of(successor)
+                if successor_idx != state_idx:
+                    predecessors[successor_idx].append((state_idx, cost))
+
+        self._predecessors = predecessors
+        return predecessors
+
+    def row(self, goal_idx: int) -> typing.List[float]:
+        """The cost-to-go of each abstract state for the abstract goal; solved on first use."""
+        row = self.rows.get(goal_idx)
+
+        if row is None:
+            row = self.rows[goal_idx] = self._costs_to_goal(goal_idx)
+
+        return row
+
+    def _costs_to_goal(self, goal_idx: int) -> typing.List[float]:
+        # Dijkstra backwards from every abstract state that satisfies the goal.
+        predecessors = self.predecessors()
+        goal = self.state_at(goal_idx)
+        costs = [PLUS_INF] * self.num_states
+        queue = []
+
+        for (state_idx, state) in enumerate(self.states()):
+            if all(value >= goal_value for (value, goal_value) in zip(state, goal)):
+                costs[state_idx] = 0
+                queue.append((0, state_idx))
+
+        heapq.heapify(queue)
+
+        while queue:
+            cost, state_idx = heapq.heappop(queue)
+            if cost > costs[state_idx]:
+                continue
+
+            for (pred_idx, action_cost) in predecessors[state_idx]:
+                pred_cost = cost + action_cost
+
+                if pred_cost < costs[pred_idx]:
+                    costs[pred_idx] = pred_cost
+                    heapq.heappush(queue, (pred_cost, pred_idx))
+
+        return costs
+
+    def state_at(self, state_idx: int) -> typing.Tuple[int, ...]:
+        return tuple(
+            floor + (state_idx // multiplier) % size
+            for (floor, size, multiplier) in zip(self.floors, self.sizes, self.multipliers)
+        )
+
+    def goal_values(self, goal: StateLike) -> typing.List:
+        """The goal's values for the pattern keys; keys the goal doesn't set are unconstrained."""
+        return [
+            goal.get(key) if goal.get(key) is not None else floor
+            for (key, floor) in zip(self.keys, self.floors)
+        ]
+
+    def goal_row(self, goal: StateLike) -> typing.List[float]:
+        """The cost-to-go of each abstract state for the given goal."""
+        # Rounding the goal down rather than up, as asking for less is what keeps the estimate optimistic.
+        return self.row(self.index_of(self.goal_values(goal), rounding=math.floor))
+
+    def to_dict(self) -> dict:
+        return dict(
+            keys=list(self.keys),
+            floors=list(self.floors),
+            caps=list(self.caps),
+            actions=[
+                [cost, [list(pair) for pair in preconds], [list(pair) for pair in effects]]
+                for (cost, preconds, effects) in self.actions
+            ],
+            # JSON has no infinity, so unreachable entries are nulls; nor integer keys, so those are strings.
+            rows={
+                str(goal_idx): [None if cost == PLUS_INF else cost for cost in row]
+                for (goal_idx, row) in self.rows.items()
+            },
+        )
+
+    @classmethod
+    def fromdict(cls, data: dict) -> "PatternDatabase":
+        return cls(
+            keys=data["keys"],
+            floors=data["floors"],
+            caps=data["caps"],
+            actions=[
+                (cost, tuple(tuple(pair) for pair in preconds), tuple(tuple(pair) for pair in effects))
+                for (cost, preconds, effects) in data["actions"]
+            ],
+            rows={
+                int(goal_idx): [PLUS_INF if cost is None else cost for cost in row]
+                for (goal_idx, row) in data["rows"].items()
+            },
+        )
+
+
+def default_patterns(mapobj: ActionDict, pattern_size: int = 2) -> typing.List[typing.Tuple[str, ...]]:
+    """Partitions the keys the Actions depend on into groups of up to pattern_size keys.
+
+    Keys that are often touched by the same Actions get grouped together, as those interactions
+    are exactly what's lost when they're projected away.
+    """
+    keys = []
+    affinity: typing.Dict[typing.Tuple[str, str], int] = {}
+
+    for (cost, preconds, effects) in mapobj.values():
+        action_keys = sorted(set(preconds.keys()) | set(effects.keys()))
+        keys.extend(action_keys)
+
+        for pair in itertools.combinations(action_keys, 2):
+            affinity[pair] = affinity.get(pair, 0) + 1
+
+    remaining = list(dict.fromkeys(keys))
+    patterns = []
+
+    while remaining:
+        pattern = [remaining.pop(0)]
+
+        while len(pattern) < pattern_size and remaining:
+            best_key = max(
+                remaining,
+                key=lambda cand: sum(affinity.get(tuple(sorted((cand, key))), 0) for key in pattern)
+            )
+            remaining.remove(best_key)
+            pattern.append(best_key)
+
+        patterns.append(tuple(sorted(pattern)))
+
+    return patterns
+
+
+def default_caps(mapobj: ActionDict, goals: typing.Iterable[StateLike] = ()) -> typing.Dict[str, int]:
+    """Per key, the largest precondition plus the largest decrease - anything beyond behaves the same -
+    or the largest value any of the goals asks for, if that's more.
+    """
+    thresholds: typing.Dict[str, int] = {}
+    decreases: typing.Dict[str, int] = {}
+
+    for (cost, preconds, effects) in mapobj.values():
+        for (key, value) in preconds.items():
+            if value is not None:
+                thresholds[key] = max(thresholds.get(key, 0), value)
+
+        for (key, value) in effects.items():
+            thresholds.setdefault(key, 0)
+            if value and value < 0:
+                decreases[key] = max(decreases.get(key, 0), -value)
+
+    caps = {key: max(1, math.ceil(value + decreases.get(key, 0))) for (key, value) in thresholds.items()}
+
+    for goal in goals:
+        for (key, value) in goal.items():
+            if value is not None:
+                caps[key] = max(caps.get(key, 1), math.ceil(value))
+
+    return caps
+
+
+class PatternDatabases:
+    """A set of PatternDatabases for one domain."""
+
+    def __init__(
+        self,
+        databases: typing.Sequence[PatternDatabase],
+        fingerprint: typing.Optional[str] = None,
+        max_states: typing.Optional[int] = DEFAULT_MAX_STATES,
+    ):
+        self.databases: typing.List[PatternDatabase] = list(databases)
+        self.fingerprint = fingerprint
+        self.max_states = max_states
+
+    def covering(self, pattern_idx: int, goal: StateLike) -> PatternDatabase:
+        """The pattern's database, with its caps raised first if the goal asks for more (and that fits max_states).
+        Otherwise, the goal just gets capped - still a lower bound, if a less informative one.
+        """
+        database = self.databases[pattern_idx]
+        caps = [
+            max(cap, math.floor(value))
+            for (cap, value) in zip(database.caps, database.goal_values(goal))
+        ]
+
+        if tuple(caps) != database.caps:
+            widened = database.with_caps(caps)
+
+            if self.max_states is None or widened.num_states <= self.max_states:
+                database = self.databases[pattern_idx] = widened
+
+        return database
+
+    def goal_rows(self, goal: StateLike) -> typing.List[typing.Tuple[PatternDatabase, typing.List[float]]]:
+        """Each pattern's database (see covering()) along with its row for the goal, solving that if needed."""
+        result = []
+
+        for pattern_idx in range(len(self.databases)):
+            database = self.covering(pattern_idx, goal)
+            result.append((database, database.goal_row(goal)))
+
+        return result
+
+    def estimator(self, goal: StateLike, combine: str = "max", default: typing.Any = 0) -> Estimator:
+        if combine not in PDB_COMBINERS:
+            raise ValueError(f"Unknown way to combine pattern databases {combine!r}, expected one of {PDB_COMBINERS}!")
+
+        lookups = tuple(
+            (database.keys, database.floors, database.caps, database.multipliers, row)
+            for (database, row) in self.goal_rows(goal)
+        )
+        use_max = combine == "max"
+
+        def _estimate(state: StateLike) -> float:
+            result = 0
+
+            for (keys, floors, caps, multipliers, row) in lookups:
+                state_idx = 0
+                for (key, floor, cap, multiplier) in zip(keys, floors, caps, multipliers):
+                    value = math.ceil(state.get(key, default))
+                    state_idx += (min(max(value, floor), cap) - floor) * multiplier
+
+                cost = row[state_idx]
+
+                if use_max:
+                    if cost > result:
+                        result = cost
+                else:
+                    result += cost
+
+            return result
+
+        return _estimate
+
+    def to_dict(self) -> dict:
+        return dict(
+            fingerprint=self.fingerprint,
+            max_states=self.max_states,
+            patterns=[database.to_dict() for database in self.databases],
+        )
+
+    @classmethod
+    def fromdict(cls, data: dict) -> "PatternDatabases":
+        return cls(
+            databases=[PatternDatabase.fromdict(pattern) for pattern in data["patterns"]],
+            fingerprint=data.get("fingerprint"),
+            max_states=data.get("max_states", DEFAULT_MAX_STATES),
+        )
+
+
+def domain_fingerprint(mapobj: ActionDict, **build_params) -> str:
+    # Identifies both the domain and how the tables were built, so stale files get rebuilt.
+    serialized = json.dumps(
+        dict(domain=mapobj, params=build_params),
+        cls=MapJsonEncoder,
+        sort_keys=True,
+    )
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def build_pattern_databases(
+    mapobj: ActionDict,
+    patterns: typing.Optional[typing.Sequence[typing.Sequence[str]]] = None,
+    caps: typing.Optional[typing.Dict[str, int]] = None,
+    pattern_size: int = 2,
+    floor: int = 0,
+    max_states: typing.Optional[int] = DEFAULT_MAX_STATES,
+    goals: typing.Iterable[StateLike] = (),
+) -> PatternDatabases:
+    """Projects an action map onto the patterns, and solves the abstract problems for the goals given.
+
+    :param mapobj: The action map.
+    :param patterns: Optional. The key subsets to project onto; by default, see default_patterns().
+    :param caps: Optional. The highest value to distinguish per key; by default, see default_caps().
+                 A goal asking for more than a cap gets the cap raised to match once it's asked for,
+                 as long as that fits max_states.
+    :param pattern_size: Optional. How many keys to put in each default pattern. Default 2.
+    :param floor: Optional. The lowest value to distinguish, for all keys. Default 0.
+    :param max_states: Optional. Refuse patterns with more abstract states than this (None for no limit),
+                       as each goal's table row takes time and memory linear in the number of states.
+    :param goals: Optional. Goals to solve the rows for right away (e.g. to save them along with the tables);
+                  the default caps cover them. Rows for any other goals get solved on first use.
+    :return: A PatternDatabases object, ready to use with pattern_database_measure().
+    """
+    _goals = list(goals)
+    _patterns = [tuple(pattern) for pattern in patterns] if patterns else default_patterns(mapobj, pattern_size)
+    _caps = {**default_caps(mapobj, _goals), **(caps or {})}
+
+    databases = []
+
+    for pattern in _patterns:
+        database = PatternDatabase.project(
+            mapobj,
+            keys=pattern,
+            floors=[floor] * len(pattern),
+            caps=[max(_caps.get(key, 1), floor) for key in pattern],
+        )
+
+        if max_states is not None and database.num_states > max_states:
+            raise ValueError(
+                f"Pattern {pattern} has {database.num_states} abstract states, over the limit of {max_states}; "
+                f"use smaller patterns or caps (or raise max_states)."
+            )
+
+        databases.append(database)
+
+    fingerprint = domain_fingerprint(mapobj, patterns=_patterns, caps=_caps, floor=floor)
+    pdbs = PatternDatabases(databases, fingerprint=fingerprint, max_states=max_states)
+
+    for goal in _goals:
+        pdbs.goal_rows(goal)
+
+    return pdbs
+
+
+def pdb_path(mapname: str, directory: typing.Optional[str] = None) -> str:
+    return os.path.join(directory or MAPS_DIR, f"{mapname}{PDB_FILE_SUFFIX}")
+
+
+def save_pattern_databases(pdbs: PatternDatabases, mapname: str, directory: typing.Optional[str] = None) -> str:
+    savepath = pdb_path(mapname, directory)
+
+    with open(savepath, "w") as pdbfile:
+        json.dump(pdbs.to_dict(), pdbfile)
+
+    return savepath
+
+
+def load_pattern_databases(mapname: str, directory: typing.Optional[str] = None) -> PatternDatabases:
+    loadpath = pdb_path(mapname, directory)
+
+    with open(loadpath, "r") as pdbfile:
+        data = json.load(pdbfile)
+
+    return PatternDatabases.fromdict(data)
+
+
+def cached_pattern_databases(
+    mapname: str,
+    mapobj: typing.Optional[ActionDict] = None,
+    directory: typing.Optional[str] = None,
+    patterns: typing.Optional[typing.Sequence[typing.Sequence[str]]] = None,
+    caps: typing.Optional[typing.Dict[str, int]] = None,
+    pattern_size: int = 2,
+    floor: int = 0,
+    max_states: typing.Optional[int] = DEFAULT_MAX_STATES,
+    goals: typing.Iterable[StateLike] = (),
+) -> PatternDatabases:
+    """Loads the pattern databases for a map from disk, (re)building and saving them first if needed.
+
+    The tables get rebuilt if there's no file yet, or if the map or the build parameters changed since.
+    Parameters are the same as for build_pattern_databases(); mapobj is loaded by name if not provided.
+    Only the rows for the goals passed in get saved; the rest get solved in memory as they're asked for.
+    """
+    _goals = list(goals)
+    _mapobj = mapobj if mapobj is not None else load_map_json(mapname)
+    _patterns = [tuple(pattern) for pattern in patterns] if patterns else default_patterns(_mapobj, pattern_size)
+    _caps = {**default_caps(_mapobj, _goals), **(caps or {})}
+    expected_fingerprint = domain_fingerprint(_mapobj, patterns=_patterns, caps=_caps, floor=floor)
+
+    if os.path.exists(pdb_path(mapname, directory)):
+        pdbs = load_pattern_databases(mapname, directory)
+
+        if pdbs.fingerprint == expected_fingerprint:
+            pdbs.max_states = max_states
+            return pdbs
+
+    pdbs = build_pattern_databases(
+        _mapobj,
+        patterns=_patterns,
+        caps=caps,
+        floor=floor,
+        max_states=max_states,
+        goals=_goals,
+    )
+    save_pattern_databases(pdbs, mapname, directory)
+    return pdbs
+
+
+def pattern_database_measure(
+    pdbs: typing.Union[PatternDatabases, str],
+    combine: str = "max",
+    default: typing.Any = 0,
+    domain: typing.Optional[CompiledDomain] = None,
+    **cache_kwargs,
+) -> typing.Callable[[StateLike, StateLike], float]:
+    """Builds a goal_measure looking the estimates up in pattern databases.
+
+    :param pdbs: The PatternDatabases, or the name of a map to load (or build) them for.
+    :param combine: 'max' (default) or 'sum', see the module docstring for when the latter is admissible.
+    :param default: The value state keys have if not set; should match the planner's blackboard_default.
+    :param domain: Optional. The compiled domain the states come from, if planning on compiled states.
+    :param cache_kwargs: If pdbs is a map name, these are passed through to cached_pattern_databases().
+    :return: A callable taking a state and the goal, for use as a goal_measure with astar=True.
+    """
+    if combine not in PDB_COMBINERS:
+        raise ValueError(f"Unknown way to combine pattern databases {combine!r}, expected one of {PDB_COMBINERS}!")
+
+    _pdbs = cached_pattern_databases(pdbs, **cache_kwargs) if isinstance(pdbs, str) else pdbs
+
+    def _build_estimator(goal: StateLike) -> Estimator:
+        return _pdbs.estimator(goal, combine=combine, default=default)
+
+    return measure_per_goal(_build_estimator, domain)
@@ -0,0 +1,239 @@
+"""Relaxed-reachability heuristics for action maps.
+
+These estimate the distance to the goal by solving a simplified ('relaxed') version of the
+planning problem, where Effects can only ever help - every decrease an Action would make is ignored.
+In this relaxed world, once a condition (e.g. Money >= 10) holds, it holds forever, so the cost
+of reaching each condition can be worked out with a simple fixpoint over the Actions:
+
+    cost(key >= value) = 0, if the state already satisfies it, otherwise
+                         min over Actions a that increase the key of:
+                             cost(preconditions of a) + cost(a) * (repetitions of a needed to cover the deficit)
+
+The cost of a set of conditions (an Action's preconditions, or the goal) is then combined either by:
+- adding them up (h_add) - informative, but may overestimate, so plans may come out suboptimal,
+- taking the most expensive one (h_max) - admissible, so A* plans stay optimal, but less informative.
+  To stay a lower bound, h_max also takes the larger of the two terms above rather than their sum
+  (and lets Actions apply a fraction of a time) - an Action that raises its own precondition key
+  would otherwise have that part of the deficit counted twice,
+- or by extracting an actual relaxed plan from the h_add costs and adding up *its* cost (relaxed plan),
+  which doesn't double-count Actions that help with more than one condition.
+
+The structure of the problem (which conditions there are and which Actions contribute to them) is
+worked out once per goal; per-state estimates only redo the fixpoint, and are cached on the values
+of the keys that actually matter, so revisiting equivalent states is a dict lookup.
+
+The resulting measures work as a goal_measure for any of the planners using action maps, e.g.:
+
+    find_plan(..., goal_measure=relaxed_plan_measure(mapobj), astar=True)
+"""
+import functools
+import math
+import typing
+
+from .base import PLUS_INF, Estimator, MapLike, measure_per_goal, split_domain
+from ....types import ActionDict, ActionKey, StateLike
+
+HEURISTIC_VARIANTS = ("add", "max", "plan")
+
+Condition = typing.Tuple[str, typing.Any]
+
+
+class RelaxedDomain:
+    """The delete-relaxed view of an action map with respect to a single goal."""
+
+    def __init__(
+        self,
+        mapobj: ActionDict,
+        goal: StateLike,
+        default: typing.Any = 0,
+    ):
+        self.default = default
+        self.actions: typing.Tuple[ActionKey, ...] = tuple(sorted(mapobj.keys()))
+
+        condition_indices: typing.Dict[Condition, int] = {}
+
+        def _intern_all(state: StateLike) -> typing.Tuple[int, ...]:
+            indices = []
+
+            for (key, value) in state.items():
+                if value is None:
+                    continue
+
+                indices.append(condition_indices.setdefault((key, value), len(condition_indices)))
+
+            return tuple(indices)
+
+        self.costs: typing.Tuple[float, ...] = tuple(mapobj[action][0] for action in self.actions)
+        self.preconds: typing.Tuple[typing.Tuple[int, ...], ...] = tuple(
+            _intern_all(mapobj[action][1]) for action in self.actions
+        )
+        self.goal_conditions: typing.Tuple[int, ...] = _intern_all(goal)
+        self.conditions: typing.Tuple[Condition, ...] = tuple(condition_indices.keys())
+
+        # Only the keys something depends on affect the estimates, so that's all we look at in the states.
+        self.keys: typing.Tuple[str, ...] = tuple(dict.fromkeys(key for (key, value) in self.conditions))
+        self.condition_slots: typing.Tuple[typing.Tuple[int, typing.Any], ...] = tuple(
+            (self.keys.index(key), value) for (key, value) in self.conditions
+        )
+
+        # For each condition, the Actions that get us closer to it and by how much per application.
+        self.achievers: typing.Tuple[typing.Tuple[typing.Tuple[int, float], ...], ...] = tuple(
+            tuple(
+                (action_idx, mapobj[action][2].get(key, 0))
+                for (action_idx, action) in enumerate(self.actions)
+                if (mapobj[action][2].get(key) or 0) > 0
+            )
+            for (key, value) in self.conditions
+        )
+
+    def project(self, state: StateLike) -> tuple:
+        default = self.default
+        return tuple(state.get(key, default) for key in self.keys)
+
+    def deficits(self, values: tuple) -> typing.List[float]:
+        return [value - values[slot] for (slot, value) in self.condition_slots]
+
+    def condition_costs(
+        self,
+        deficits: typing.Sequence[float],
+        combine: typing.Callable[[typing.Iterable[float]], float] = sum,
+        fractional: bool = False,
+    ) -> typing.Tuple[typing.List[float], typing.List[typing.Optional[typing.Tuple[int, float]]]]:
+        """Relaxed cost of reaching each condition, and the cheapest Action (with its gain) to reach it with.
+
+        :param deficits: How far short of each condition the state is (<= 0 means satisfied).
+        :param combine: How to combine the costs of preconditions, and those with the cost of the Action
+                        applications covering the deficit - sum() for h_add, max() for h_max.
+        :param fractional: If True, Actions can be applied a fraction of a time; this keeps the costs
+                           a lower bound even when mixing different Actions would cover the deficit cheaper.
+        """
+        costs = [0 if deficit <= 0 else PLUS_INF for deficit in deficits]
+        supporters = [None] * len(deficits)
+        action_costs = self.costs
+        action_preconds = self.preconds
+        changed = True
+
+        while changed:
+            changed = False
+            preconds_costs = [
+                combine(costs[cond] for cond in preconds) if preconds else 0
+                for preconds in action_preconds
+            ]
+
+            for (cond, achievers) in enumerate(self.achievers):
+                deficit = deficits[cond]
+                if deficit <= 0:
+                    continue
+
+                best_cost = costs[cond]
+
+                for (action_idx, gain) in achievers:
+                    preconds_cost = preconds_costs[action_idx]
+                    if preconds_cost == PLUS_INF:
+                        continue
+
+                    repeats = deficit / gain if fractional else math.ceil(deficit / gain)
+                    cand_cost = combine((preconds_cost, action_costs[action_idx] * repeats))
+
+                    if cand_cost < best_cost:
+                        best_cost = cand_cost
+                        supporters[cond] = (action_idx, gain)
+
+                if best_cost < costs[cond]:
+                    costs[cond] = best_cost
+                    changed = True
+
+        return costs, supporters
+
+    def h_add(self, values: tuple) -> float:
+        costs, _ = self.condition_costs(self.deficits(values), combine=sum)
+        return sum(costs[cond] for cond in self.goal_conditions)
+
+    def h_max(self, values: tuple) -> float:
+        costs, _ = self.condition_costs(self.deficits(values), combine=_max_or_zero, fractional=True)
+        return _max_or_zero(costs[cond] for cond in self.goal_conditions)
+
+    def relaxed_plan_cost(self, values: tuple) -> float:
+        deficits = self.deficits(values)
+        costs, supporters = self.condition_costs(deficits, combine=sum)
+
+        if any(costs[cond] == PLUS_INF for cond in self.goal_conditions):
+            return PLUS_INF
+
+        # Walk back from the goal along the cheapest supporters; each Action gets applied
+        # as many times as the most demanding condition it supports requires.
+        repeats_per_action: typing.Dict[int, int] = {}
+        pending = list(self.goal_conditions)
+        seen = set()
+
+        while pending:
+            cond = pending.pop()
+            if cond in seen or deficits[cond] <= 0:
+                continue
+
+            seen.add(cond)
+            action_idx, gain = supporters[cond]
+            repeats = math.ceil(deficits[cond] / gain)
+            repeats_per_action[action_idx] = max(repeats_per_action.get(action_idx, 0), repeats)
+            pending.extend(self.preconds[action_idx])
+
+        return sum(self.costs[action_idx] * repeats for (action_idx, repeats) in repeats_per_action.items())
+
+    def estimator(self, variant: str = "add") -> typing.Callable[[tuple], float]:
+        if variant == "add":
+            return self.h_add
+
+        if variant == "max":
+            return self.h_max
+
+        if variant == "plan":
+            return self.relaxed_plan_cost
+
+        raise ValueError(f"Unknown heuristic variant {variant!r}, expected one of {HEURISTIC_VARIANTS}!")
+
+
+def _max_or_zero(values: typing.Iterable[float]) -> float:
+    return max(values, default=0)
+
+
+def relaxed_measure(
+    mapobj: MapLike,
+    variant: str = "add",
+    default: typing.Any = 0,
+    cache_size: typing.Optional[int] = 2 ** 16,
+) -> typing.Callable[[StateLike, StateLike], float]:
+    """Builds a goal_measure estimating the cost to the goal on the relaxed version of the problem.
+
+    :param mapobj: The action map, or the same compiled with compile_domain() to plan on compiled states.
+    :param variant: 'add' for h_add, 'max' for h_max (admissible) or 'plan' for the relaxed plan cost.
+    :param default: The value state keys have if not set; should match the planner's blackboard_default.
+    :param cache_size: How many per-state estimates to remember (per goal). None for no limit.
+    :return: A callable taking a state and the goal, for use as a goal_measure with astar=True.
+    """
+    if variant not in HEURISTIC_VARIANTS:
+        raise ValueError(f"Unknown heuristic variant {variant!r}, expected one of {HEURISTIC_VARIANTS}!")
+
+    actions, compiled = split_domain(mapobj)
+
+    def _build_estimator(goal: StateLike) -> Estimator:
+        domain = RelaxedDomain(actions, goal, default=default)
+        estimate = functools.lru_cache(maxsize=cache_size)(domain.estimator(variant))
+
+        def _estimate(state: StateLike) -> float:
+            return estimate(domain.project(state))
+
+        return _estimate
+
+    return measure_per_goal(_build_estimator, compiled)
+
+
+def hadd_measure(mapobj: MapLike, default: typing.Any = 0) -> typing.Callable:
+    return relaxed_measure(mapobj, variant="add", default=default)
+
+
+def hmax_measure(mapobj: MapLike, default: typing.Any = 0) -> typing.Callable:
+    return relaxed_measure(mapobj, variant="max", default=default)
+
+
+def relaxed_plan_measure(mapobj: MapLike, default: typing.Any = 0) -> typing.Callable:
+    return relaxed_measure(mapobj, variant="plan", default=default)
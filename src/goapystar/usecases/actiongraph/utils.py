@@ -2,7 +2,7 @@ import abc
 import operator
 import typing
 
-from ...state import State
+from ...state import State, STATE_TYPES
 from ...types import ActionKey, ActionDict, StateLike
 
 
@@ -18,7 +18,7 @@ def get_actions(mapobj: ActionDict) -> typing.Callable:
 def get_effects(mapobj: ActionDict) -> typing.Callable:
 
     def _effectgetter(action, *args, **kwargs) -> typing.Sequence[State]:
-        if isinstance(action, State):
+        if isinstance(action, STATE_TYPES):
             effects = action
         else:
             cost, preconds, effects = mapobj.get(action) or (float("inf"), State(), State())
@@ -154,6 +154,29 @@ class BasePathfindingGraph:
         return set(self.adjacent_lazy(pos=pos, *args, **kwargs))
 
 
+    @abc.abstractmethod
+    def adjacent_reverse_lazy(
+        self,
+        pos,
+        *args,
+        **kwargs
+    ):
+        # Positions we could have come to pos *from* - for searching backwards from a goal.
+        yield None
+
+
+    @abc.abstractmethod
+    def edge_cost(
+        self,
+        start,
+        end,
+        *args,
+        **kwargs
+    ) -> float:
+
+        return 1
+
+
     @abc.abstractmethod
     def set_current(
         self,
@@ -5,7 +5,7 @@ import typing
 
 from ..actiongraph.utils import BasePathfindingGraph
 from .consts import WALL, OPEN, PATH, GOAL, CURR, SLOW
-from ...measures import manhattan_distance
+from ...measures import manhattan_distance, obstacle_dist
 
 
 def map_1():
@@ -200,6 +200,29 @@ class Map2D(BasePathfindingGraph):
         return positions
 
 
+    def adjacent_reverse_lazy(
+        self,
+        pos: float | tuple[float, float],
+        pos_y: None | float = None,
+        diagonals: bool | None = None,
+        *args,
+        **kwargs
+    ) -> typing.Iterable[tuple[int, int]]:
+        # Moves are symmetric - if we can step from A to B, we can step from B to A.
+        return self.adjacent_lazy(pos, pos_y=pos_y, diagonals=diagonals, *args, **kwargs)
+
+
+    def edge_cost(
+        self,
+        start: tuple[float, float],
+        end: tuple[float, float],
+        *args,
+        **kwargs
+    ) -> float:
+        # Same as the obstacle_dist() measure the forward planners use, so SLOW tiles cost the same either way.
+        return obstacle_dist(self)(start, end)
+
+
     def set_current(
         self,
         pos: float | tuple[float, float],
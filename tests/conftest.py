@@ -0,0 +1,97 @@
+import typing
+
+import pytest
+
+from src.goapystar.impls import goap
+from src.goapystar.maputils import load_map_json
+from src.goapystar.default_impl import *
+
+
+class PlanningCase(typing.NamedTuple):
+    mapname: str
+    start: dict
+    goal: dict
+    optimal_cost: float
+
+    @property
+    def raw_map(self):
+        return load_map_json(self.mapname)
+
+
+# The planning problems the planner tests share. The planning_case fixture runs a test on the STANDARD_CASES;
+# to pick others, parametrize it indirectly with their names, e.g.:
+#   @pytest.mark.parametrize("planning_case", ("fed_only:fed", "debug_complex:fed"), indirect=True)
+PLANNING_CASES = {
+    "debug_only:debug": PlanningCase("debug_only", {}, {"Debug": 1}, 100),
+    "fed_only:fed": PlanningCase("fed_only", {}, {"Fed": 1}, 2),
+    "debug_complex:fed": PlanningCase("debug_complex", {"HasDirtyDishes": 1}, {"Fed": 1}, 5),
+    "complex_nodebug:rested": PlanningCase("complex_nodebug", {"HasDirtyDishes": 1}, {"Rested": 10}, 6),
+    "debug_complex:money+rested": PlanningCase("debug_complex", {}, {"Money": 30, "Rested": 5}, 8),
+    "debug_complex:fed+rested+money": PlanningCase(
+        "debug_complex", {"HasDirtyDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 30}, 9
+    ),
+    "complex_nodebug_workhard:fed+rested+money": PlanningCase(
+        "complex_nodebug_workhard", {"HasCleanDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 10}, 8
+    ),
+    "complex_sleepless_workhard:money+rested": PlanningCase(
+        "complex_sleepless_workhard", {}, {"Money": 30, "Rested": 5}, 11
+    ),
+    # Too big for blind search - these need a heuristic.
+    "complex_sleepless:money": PlanningCase("complex_sleepless", {}, {"Money": 50}, 6),
+    "complex_sleepless:lots_of_money": PlanningCase("complex_sleepless", {}, {"Money": 500}, 51),
+    "debug_complex:money+rested+debug": PlanningCase(
+        "debug_complex", {}, {"Money": 20, "Rested": 4, "Debug": 2}, 206
+    ),
+}
+
+STANDARD_CASES = tuple(PLANNING_CASES)[:8]
+
+
+@pytest.fixture(params=STANDARD_CASES)
+def planning_case(request) -> PlanningCase:
+    return PLANNING_CASES[request.param]
+
+
+def _callback_kwargs(raw_map, expansions: typing.Optional[list] = None, **kwargs) -> dict:
+    actiongetter = get_actions(raw_map)
+
+    def _counting_actiongetter(*args, **kwargs):
+        if expansions is not None:
+            expansions.append(args)
+        return actiongetter(*args, **kwargs)
+
+    return dict(
+        adjacency_gen=_counting_actiongetter,
+        preconditions_check=preconds_checker_for(raw_map),
+        neighbor_measure=neighbor_measure(raw_map),
+        goal_check=goal_checker_for(raw_map),
+        get_effects=get_effects(raw_map),
+        **kwargs
+    )
+
+
+@pytest.fixture
+def callback_kwargs():
+    """The planner callbacks for an action map, as keyword arguments (along with any extra ones passed in).
+    If given a list for expansions, every call to the adjacency callback gets recorded in it.
+    """
+    return _callback_kwargs
+
+
+@pytest.fixture
+def run_plan():
+    """Runs goap.find_plan() (in A* mode, unless told otherwise) and returns the (cost, path, expansions)."""
+
+    def _run_plan(raw_map, start, goal, goal_measure=None, cutoff_iter=5000, astar=True, **kwargs):
+        expansions = []
+
+        cost, path = goap.find_plan(
+            start, goal,
+            goal_measure=goal_measure,
+            cutoff_iter=cutoff_iter,
+            astar=astar,
+            **_callback_kwargs(raw_map, expansions, **kwargs)
+        )
+        return cost, path, len(expansions)
+
+    return _run_plan
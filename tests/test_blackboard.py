@@ -0,0 +1,56 @@
+from src.goapystar.blackboard import OverlayBlackboard, MAX_OVERLAY_DEPTH, overlay_on
+from src.goapystar.state import statehash
+
+
+def test_overlay_writes_do_not_leak_into_parent():
+    parent = OverlayBlackboard({"Money": 10, "Fed": 0})
+    child = parent.derive()
+    child["Money"] = 0
+    child["HasFood"] = 1
+
+    assert parent == {"Money": 10, "Fed": 0}
+    assert child == {"Money": 0, "Fed": 0, "HasFood": 1}
+
+
+def test_overlay_delete_masks_parent_key():
+    parent = OverlayBlackboard({"Money": 10, "Fed": 0})
+    child = parent.derive()
+    del child["Fed"]
+
+    assert "Fed" not in child
+    assert child.get("Fed", 5) == 5
+    assert "Fed" in parent
+
+
+def test_overlay_flattens_deep_chains():
+    board = OverlayBlackboard({"Rested": 0})
+
+    for step in range(MAX_OVERLAY_DEPTH * 3):
+        board = board.derive()
+        board["Rested"] = board["Rested"] + 1
+
+    assert board._depth <= MAX_OVERLAY_DEPTH
+    assert board["Rested"] == MAX_OVERLAY_DEPTH * 3
+
+
+def test_overlay_hashes_like_a_dict():
+    board = overlay_on({"Money": 10})
+    board["Fed"] = 1
+    assert statehash(board) == statehash({"Fed": 1, "Money": 10})
+
+
+def test_overlay_incremental_hash_matches_full_rehash():
+    import random
+    rng = random.Random(7)
+    board = OverlayBlackboard({"Money": 10})
+
+    for step in range(200):
+        board = board.derive()
+        key = rng.choice(("Money", "Fed", "Rested", "HasFood"))
+
+        if key in board and rng.random() < 0.2:
+            del board[key]
+        else:
+            board[key] = rng.randrange(5)
+
+        assert board.as_hash() == statehash(board.to_dict())
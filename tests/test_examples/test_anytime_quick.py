@@ -0,0 +1,150 @@
+import time
+
+import pytest
+
+from src.goapystar.impls import goap, interruptable
+from src.goapystar.impls.common import NoPathError
+from src.goapystar.maputils import load_map_json
+from src.goapystar.usecases.actiongraph.heuristics import deficit_measure, hmax_measure
+from src.goapystar.default_impl import *
+
+
+def collect_plans(plan_loop):
+    plans = []
+
+    while True:
+        try:
+            plans.append(next(plan_loop))
+
+        except StopIteration as stop:
+            return plans, stop.value
+
+
+@pytest.mark.parametrize("planning_case", (
+    "debug_complex:fed",
+    "debug_complex:money+rested",
+    "debug_complex:fed+rested+money",
+    "complex_nodebug_workhard:fed+rested+money",
+), indirect=True)
+def test_anytime_plans_improve_to_optimal(planning_case, callback_kwargs):
+    mapname, start, goal, optimal_cost = planning_case
+    raw_map = load_map_json(mapname)
+
+    plans, final_plan = collect_plans(interruptable.plan_anytime(
+        start, goal,
+        goal_measure=hmax_measure(raw_map),
+        initial_weight=5,
+        weight_step=1,
+        cutoff_iter=5000,
+        **callback_kwargs(raw_map)
+    ))
+
+    assert plans
+    assert final_plan == plans[-1]
+    assert final_plan.cost == optimal_cost
+    assert final_plan.bound == 1.0
+
+    for (plan, next_plan) in zip(plans, plans[1:]):
+        assert next_plan.cost <= plan.cost
+        assert next_plan.bound <= plan.bound
+        assert next_plan.weight < plan.weight
+
+    for plan in plans:
+        assert plan.cost == sum(raw_map[action][0] for action in plan.path[1:])
+        assert plan.cost <= plan.bound * optimal_cost <= plan.weight * optimal_cost
+
+
+def test_anytime_first_plan_is_fast(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+    start, goal = {"HasDirtyDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 30}
+
+    expansions = []
+    plan_loop = interruptable.plan_anytime(
+        start, goal,
+        goal_measure=hmax_measure(raw_map),
+        initial_weight=5,
+        **callback_kwargs(raw_map, expansions=expansions)
+    )
+    first_plan = next(plan_loop)
+    first_plan_expansions = len(expansions)
+
+    optimal_expansions = []
+    goap.find_plan(
+        start, goal,
+        goal_measure=hmax_measure(raw_map),
+        astar=True,
+        cutoff_iter=5000,
+        **callback_kwargs(raw_map, expansions=optimal_expansions)
+    )
+
+    print("")
+    print("EXPANSIONS:", first_plan_expansions, len(optimal_expansions))
+
+    assert first_plan.bound > 1
+    assert first_plan_expansions < len(optimal_expansions)
+
+
+@pytest.mark.parametrize("progress", (0, 0.25, 0.5, 0.75, 1))
+def test_anytime_bounds_hold_when_interrupted(progress, callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+    start, goal = {"HasDirtyDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 30}
+    anytime_kwargs = dict(goal_measure=hmax_measure(raw_map), initial_weight=5, weight_step=1)
+
+    # Measures how far in the first plan turns up, and how long until the last one is proven optimal...
+    expansions = []
+    plan_loop = interruptable.plan_anytime(start, goal, **anytime_kwargs, **callback_kwargs(raw_map, expansions))
+    next(plan_loop)
+    first_plan_expansions = len(expansions)
+    collect_plans(plan_loop)
+    last_plan_expansions = len(expansions)
+
+    # ...and cuts the search off somewhere in between. Each plan takes an iteration more than the expansions
+    # leading up to it, to pop the goal node.
+    cutoff_iter = 1 + first_plan_expansions + round(progress * (last_plan_expansions - first_plan_expansions))
+    plan = interruptable.find_plan_anytime(
+        start, goal,
+        cutoff_iter=cutoff_iter,
+        **anytime_kwargs,
+        **callback_kwargs(raw_map)
+    )
+
+    assert plan.cost <= plan.bound * 9
+    if progress == 1:
+        assert plan.bound == 1.0
+
+
+def test_anytime_deadline(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+    start, goal = {}, {"Money": 30, "Rested": 5}
+
+    with pytest.raises(NoPathError):
+        interruptable.find_plan_anytime(start, goal, deadline=time.monotonic(), **callback_kwargs(raw_map))
+
+    path = []
+    plan = interruptable.find_plan_anytime(
+        start, goal,
+        handle_backtrack_node=path.append,
+        goal_measure=deficit_measure(raw_map),
+        deadline=time.monotonic() + 60,
+        **callback_kwargs(raw_map)
+    )
+
+    assert (plan.cost, plan.bound) == (8, 1.0)
+    assert path == plan.path
+
+
+def test_anytime_start_is_goal(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+
+    plan = interruptable.find_plan_anytime({"Money": 50}, {"Money": 30}, **callback_kwargs(raw_map))
+    assert (plan.cost, len(plan.path), plan.bound) == (0, 1, 1.0)
+
+
+def test_anytime_bad_weights(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+
+    with pytest.raises(ValueError):
+        interruptable.find_plan_anytime({}, {"Money": 30}, initial_weight=0.5, **callback_kwargs(raw_map))
+
+    with pytest.raises(ValueError):
+        interruptable.find_plan_anytime({}, {"Money": 30}, weight_step=0, **callback_kwargs(raw_map))
@@ -0,0 +1,108 @@
+import math
+
+import pytest
+
+from src.goapystar.impls import interruptable
+from src.goapystar.impls.common import evaluate_neighbor_astar, new_transposition_table
+from src.goapystar.maputils import load_map_json
+from src.goapystar.measures import no_goal_heuristic
+from src.goapystar.state import State, statehash
+from src.goapystar.default_impl import *
+
+
+def deficit_heuristic(raw_map):
+    # Admissible - each missing unit of a goal key takes at least (cheapest action / best gain per action).
+    min_cost = min(cost for (cost, preconds, effects) in raw_map.values())
+    best_gain = {}
+
+    for (cost, preconds, effects) in raw_map.values():
+        for (key, value) in effects.items():
+            if value > 0:
+                best_gain[key] = max(best_gain.get(key, 0), value)
+
+    def _measure(state, goal):
+        result = 0
+
+        for (key, value) in goal.items():
+            deficit = value - state.get(key, 0)
+            if deficit > 0:
+                result = max(result, math.ceil(deficit / best_gain[key]) * min_cost)
+
+        return result
+
+    return _measure
+
+
+@pytest.mark.parametrize("planning_case", (
+    "debug_only:debug",
+    "fed_only:fed",
+    "debug_complex:fed",
+    "complex_nodebug:rested",
+    "debug_complex:money+rested",
+), indirect=True)
+def test_astar_finds_optimal_plans(planning_case, run_plan):
+    mapname, start, goal, optimal_cost = planning_case
+    raw_map = load_map_json(mapname)
+
+    cost, path, _ = run_plan(raw_map, start, goal)
+    informed_cost, informed_path, _ = run_plan(raw_map, start, goal, deficit_heuristic(raw_map))
+
+    # In A* mode, the cost is just the sum of Action costs.
+    assert cost == optimal_cost == sum(raw_map[action][0] for action in path[1:])
+    assert informed_cost == optimal_cost == sum(raw_map[action][0] for action in informed_path[1:])
+
+
+def test_astar_expands_fewer_nodes(run_plan):
+    raw_map = load_map_json("debug_complex")
+    start, goal = {}, {"Money": 30, "Rested": 5}
+
+    _, _, default_expansions = run_plan(raw_map, start, goal, no_goal_heuristic, astar=False)
+    _, _, blind_expansions = run_plan(raw_map, start, goal)
+    _, _, informed_expansions = run_plan(raw_map, start, goal, deficit_heuristic(raw_map))
+
+    assert informed_expansions < blind_expansions < default_expansions
+
+
+def test_astar_interruptible(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+
+    cost, path = interruptable.find_plan(
+        start_pos={"HasDirtyDishes": 1},
+        goal={"Fed": 1},
+        cutoff_iter=1000,
+        astar=True,
+        **callback_kwargs(raw_map)
+    )
+
+    assert cost == 5
+
+
+def test_astar_transpositions_reopen_on_cheaper_paths():
+    raw_map = load_map_json("fed_only")
+    start = State.fromdict({}, name="START")
+    table = new_transposition_table(start, astar=True)
+    assert table == {statehash(start): 0}
+
+    evaluate = dict(
+        check_preconds=preconds_checker_for(raw_map),
+        neigh="GetFood",
+        current_pos=start,
+        goal=State(Fed=1),
+        blackboard={},
+        neighbor_measure=neighbor_measure(raw_map),
+        goal_measure=lambda state, goal: 0,
+        get_effects=get_effects(raw_map),
+        transposition_table=table,
+    )
+
+    step_cost = raw_map["GetFood"][0]
+    path_cost, goal_distance, effects = evaluate_neighbor_astar(curr_cost=10, **evaluate)
+    assert (path_cost, goal_distance) == (10 + step_cost, 0)
+    assert table[statehash(effects)] == 10 + step_cost
+
+    # Same state, more expensive - pruned.
+    assert evaluate_neighbor_astar(curr_cost=20, **evaluate) is None
+
+    # Same state, cheaper - goes through and updates the best known cost.
+    path_cost, _, _ = evaluate_neighbor_astar(curr_cost=1, **evaluate)
+    assert path_cost == table[statehash(effects)] == 1 + step_cost
@@ -0,0 +1,113 @@
+import pytest
+
+from src.goapystar.impls import beamstack, goap
+from src.goapystar.impls.common import EmptyQueueError, NoPathError
+from src.goapystar.maputils import load_map_json
+from src.goapystar.state import statehash
+from src.goapystar.usecases.actiongraph.heuristics import deficit_measure
+from src.goapystar.default_impl import *
+
+
+@pytest.mark.parametrize("beam_width", (3, 10))
+def test_beamstack_finds_optimal_plans(planning_case, beam_width, callback_kwargs):
+    mapname, start, goal, optimal_cost = planning_case
+    raw_map = load_map_json(mapname)
+
+    path = []
+    cost, plan = beamstack.find_plan(
+        start, goal,
+        handle_backtrack_node=path.append,
+        goal_measure=deficit_measure(raw_map),
+        beam_width=beam_width,
+        cutoff_iter=None,
+        **callback_kwargs(raw_map)
+    )
+
+    assert cost == optimal_cost
+    assert cost == sum(raw_map[action][0] for action in plan[1:])
+    assert path == plan
+
+
+@pytest.mark.parametrize("planning_case", (
+    "debug_complex:money+rested",
+    "debug_complex:fed+rested+money",
+    "complex_nodebug_workhard:fed+rested+money",
+    "complex_sleepless_workhard:money+rested",
+), indirect=True)
+def test_beamstack_completes_where_the_beam_fails(planning_case, callback_kwargs):
+    mapname, start, goal, optimal_cost = planning_case
+    raw_map = load_map_json(mapname)
+
+    # Once the plain beam evicts the candidates the plan goes through, it's stuck.
+    with pytest.raises(NoPathError):
+        goap.find_plan(start, goal, astar=True, max_queue_size=3, cutoff_iter=2000, **callback_kwargs(raw_map))
+
+    # The beam stack backtracks to them instead.
+    cost, _ = beamstack.find_plan(start, goal, beam_width=3, cutoff_iter=None, **callback_kwargs(raw_map))
+    assert cost == optimal_cost
+
+
+@pytest.mark.parametrize(("mapname", "start", "goal", "beam_width", "cutoff_iter"), (
+    ("complex_sleepless_workhard", {}, {"Money": 30, "Rested": 5}, 1, 10),
+    ("complex_sleepless_workhard", {}, {"Money": 30, "Rested": 5}, 3, 20),
+    ("debug_complex", {"HasDirtyDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 30}, 3, 20),
+))
+def test_beamstack_memory_is_bounded(mapname, start, goal, beam_width, cutoff_iter, callback_kwargs):
+    raw_map = load_map_json(mapname)
+
+    with pytest.raises(NoPathError) as excinfo:
+        beamstack.find_plan(start, goal, beam_width=beam_width, cutoff_iter=cutoff_iter, **callback_kwargs(raw_map))
+
+    # The partial plan comes from the deepest layer, so its length is the depth of the beam stack.
+    _, partial_path = excinfo.value.best_partial_plan
+    assert excinfo.value.stats["queue_size"] <= beam_width * len(partial_path)
+
+
+def test_beamstack_out_of_budget_with_a_plan(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+    start, goal = {"HasDirtyDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 30}
+
+    # The first dive gets to *a* plan quickly; backtracking to find better ones (and prove the best one) takes longer.
+    costs = []
+
+    for cutoff_iter in (200, 500, None):
+        cost, plan = beamstack.find_plan(start, goal, beam_width=3, cutoff_iter=cutoff_iter, **callback_kwargs(raw_map))
+        assert cost == sum(raw_map[action][0] for action in plan[1:])
+        costs.append(cost)
+
+    assert costs[0] > 9
+    assert costs == sorted(costs, reverse=True)
+    assert costs[-1] == 9
+
+
+def test_beamstack_breaks_ties_the_same_way_every_run(callback_kwargs, monkeypatch):
+    raw_map = load_map_json("debug_complex")
+    start, goal = {"HasDirtyDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 30}
+
+    def _plans_found():
+        return [
+            beamstack.find_plan(start, goal, beam_width=3, cutoff_iter=cutoff_iter, **callback_kwargs(raw_map))
+            for cutoff_iter in (200, 500)
+        ]
+
+    # The state hashes change with PYTHONHASHSEED; which of the tied candidates make the cut shouldn't.
+    plans = _plans_found()
+    monkeypatch.setattr(beamstack, "statehash", lambda state: ~statehash(state))
+    assert _plans_found() == plans
+
+
+def test_beamstack_edge_cases(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+
+    cost, path = beamstack.find_plan({"Money": 50}, {"Money": 30}, **callback_kwargs(raw_map))
+    assert (cost, len(path)) == (0, 1)
+
+    with pytest.raises(EmptyQueueError):
+        beamstack.find_plan({}, {"Unobtainium": 1}, goal_measure=deficit_measure(raw_map), **callback_kwargs(raw_map))
+
+    with pytest.raises(ValueError):
+        beamstack.find_plan({}, {"Money": 30}, beam_width=0, **callback_kwargs(raw_map))
+
+    assert beamstack.maybe_find_plan({}, {"Money": 300, "Rested": 5}, cutoff_iter=10, **callback_kwargs(raw_map)) == (
+        float("inf"), []
+    )
@@ -0,0 +1,180 @@
+import time
+
+import pytest
+
+from src.goapystar.impls import bidirectional
+from src.goapystar.impls.common import EmptyQueueError, NoPathError
+from src.goapystar.measures import manhattan_distance, obstacle_dist
+from src.goapystar.usecases.actiongraph.graph import ActionGraph
+from src.goapystar.usecases.map_2d.utils import Map2D, map_3, map_4
+
+
+MAZE_CASES = (
+    ((1, 1), (35, 35)),
+    ((1, 1), (35, 1)),
+    ((17, 17), (1, 35)),
+    ((1, 35), (35, 1)),
+    ((5, 5), (25, 13)),
+)
+
+
+def counting_search(graph, start, goal, heuristic=None, both_ways=True):
+    expansions = []
+
+    def _adjacent(pos):
+        expansions.append(pos)
+        return graph.adjacent_lazy(pos)
+
+    def _adjacent_reverse(pos):
+        expansions.append(pos)
+        return graph.adjacent_reverse_lazy(pos)
+
+    cost, path = bidirectional.find_path(
+        start_pos=start,
+        goal=goal,
+        adjacency_gen=_adjacent,
+        reverse_adjacency_gen=_adjacent_reverse,
+        edge_cost=graph.edge_cost,
+        heuristic=heuristic,
+        cutoff_iter=None,
+        bidirectional=both_ways,
+    )
+    return cost, path, len(expansions)
+
+
+def test_action_graph_reverse_edges():
+    graph = ActionGraph()
+
+    assert graph.reverse_map["3"] == {"1": 3, "2": 1}
+    assert set(graph.adjacent_reverse_lazy("1")) == {"2", "5"}
+    assert set(graph.adjacent_reverse_lazy("6")) == {"3", "5"}
+    assert graph.edge_cost("3", "6") == 20
+
+
+@pytest.mark.parametrize(("start", "goal", "expected_cost", "expected_path"), (
+    ("1", "6", 22, ["1", "2", "3", "6"]),
+    ("5", "4", 7, ["5", "1", "2", "3", "4"]),
+    ("4", "4", 0, ["4"]),
+))
+def test_action_graph_bidirectional(start, goal, expected_cost, expected_path):
+    graph = ActionGraph()
+
+    cost, path = bidirectional.find_graph_path(graph, start, goal)
+    ref_cost, ref_path = bidirectional.find_graph_path(ActionGraph(), start, goal, bidirectional=False)
+
+    assert (cost, path) == (expected_cost, expected_path)
+    assert ref_cost == expected_cost
+    assert graph.path == expected_path
+
+
+def test_action_graph_unreachable():
+    # Nothing leads out of 6.
+    with pytest.raises(EmptyQueueError):
+        bidirectional.find_graph_path(ActionGraph(), "6", "1")
+
+
+@pytest.mark.parametrize("heuristic", (None, manhattan_distance))
+@pytest.mark.parametrize(("start", "goal"), MAZE_CASES)
+def test_map2d_bidirectional_finds_shortest_paths(start, goal, heuristic):
+    cost, path, _ = counting_search(Map2D(map_4()), start, goal, heuristic=heuristic)
+    ref_cost, ref_path, _ = counting_search(Map2D(map_4()), start, goal, heuristic=heuristic, both_ways=False)
+
+    assert cost == ref_cost == len(path) - 1
+    assert path[0] == start and path[-1] == goal
+
+    graph = Map2D(map_4())
+    for (pos, next_pos) in zip(path, path[1:]):
+        assert next_pos in graph.adjacent(pos)
+
+
+def test_map2d_bidirectional_expands_fewer_nodes():
+    total, ref_total = 0, 0
+
+    for (start, goal) in MAZE_CASES:
+        _, _, expansions = counting_search(Map2D(map_4()), start, goal)
+        _, _, ref_expansions = counting_search(Map2D(map_4()), start, goal, both_ways=False)
+
+        total += expansions
+        ref_total += ref_expansions
+
+    print("")
+    print("EXPANSIONS:", ref_total, total)
+
+    assert total < ref_total
+
+    # Two frontiers meeting in the middle of the maze cover a lot less of it than one crossing all of it.
+    _, _, expansions = counting_search(Map2D(map_4()), (17, 17), (1, 35))
+    _, _, ref_expansions = counting_search(Map2D(map_4()), (17, 17), (1, 35), both_ways=False)
+    assert expansions < 0.6 * ref_expansions
+
+
+def test_map2d_bidirectional_diagonals():
+    graph = Map2D(map_3(), diagonals=True)
+
+    cost, path = bidirectional.find_graph_path(graph, (1, 0), (19, 4), cutoff_iter=None)
+    ref_cost, _ = bidirectional.find_graph_path(
+        Map2D(map_3(), diagonals=True), (1, 0), (19, 4), cutoff_iter=None, bidirectional=False,
+    )
+
+    assert cost == ref_cost
+    assert path[0] == (1, 0) and path[-1] == (19, 4)
+
+
+@pytest.mark.parametrize("diagonals", (False, True))
+@pytest.mark.parametrize(("start", "goal"), (
+    ((7, 0), (11, 0)),
+    ((7, 0), (19, 0)),
+    ((9, 2), (13, 0)),
+))
+def test_map2d_bidirectional_slow_tiles(start, goal, diagonals):
+    # Everything past column 10 of map_3 is behind a SLOW tile.
+    cost, path = bidirectional.find_graph_path(Map2D(map_3(), diagonals=diagonals), start, goal, cutoff_iter=None)
+    ref_cost, ref_path = bidirectional.find_graph_path(
+        Map2D(map_3(), diagonals=diagonals), start, goal, cutoff_iter=None, bidirectional=False,
+    )
+
+    measure = obstacle_dist(Map2D(map_3()))
+
+    assert cost == ref_cost
+    assert cost == sum(measure(pos, next_pos) for (pos, next_pos) in zip(path, path[1:]))
+    assert ref_cost == sum(measure(pos, next_pos) for (pos, next_pos) in zip(ref_path, ref_path[1:]))
+    assert cost > 100
+
+
+def test_bidirectional_cutoff():
+    with pytest.raises(NoPathError) as excinfo:
+        bidirectional.find_graph_path(Map2D(map_4()), (1, 1), (35, 35), cutoff_iter=10)
+
+    error = excinfo.value
+    assert str(error) == "Path not found within 10 iterations!"
+    assert error.stats["iterations"] == 10
+    assert error.stats["generated"] > 0
+
+    # The frontiers are nowhere near each other yet, so the best we have is a path out of the start.
+    cost, path = error.best_partial_plan
+    assert path[0] == (1, 1)
+    assert cost == len(path) - 1
+
+    assert bidirectional.maybe_find_path((1, 1), (35, 35), Map2D(map_4()).adjacent_lazy, cutoff_iter=10) == (float("inf"), [])
+
+
+def test_bidirectional_budgets():
+    graph = Map2D(map_4())
+
+    with pytest.raises(NoPathError) as excinfo:
+        bidirectional.find_graph_path(graph, (1, 1), (35, 35), cutoff_iter=None, max_generated=20)
+
+    assert str(excinfo.value) == "Path not found within 20 generated nodes!"
+    assert excinfo.value.stats["generated"] >= 20
+
+    with pytest.raises(NoPathError) as excinfo:
+        bidirectional.find_graph_path(graph, (1, 1), (35, 35), cutoff_iter=None, deadline=time.monotonic())
+
+    assert str(excinfo.value) == "Path not found before the deadline!"
+
+    # Out of budget after the frontiers met, but before the cheaper way round was found - the path met on so far.
+    with pytest.raises(NoPathError) as excinfo:
+        bidirectional.find_graph_path(ActionGraph(), "1", "6", cutoff_iter=3)
+
+    assert excinfo.value.best_partial_plan == (23, ["1", "3", "6"])
+    assert bidirectional.find_graph_path(ActionGraph(), "1", "6", cutoff_iter=5) == (22, ["1", "2", "3", "6"])
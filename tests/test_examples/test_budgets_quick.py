@@ -0,0 +1,139 @@
+import time
+
+import pytest
+
+from src.goapystar.impls import cacheable, goap, interruptable, regression, vectorized
+from src.goapystar.impls.common import NoPathError, SearchBudget
+from src.goapystar.maputils import load_map_json
+from src.goapystar.measures import no_goal_heuristic
+from src.goapystar.usecases.actiongraph.goap import FancyActionGraphGOAP
+from src.goapystar.usecases.actiongraph.graph import ActionGraph
+from src.goapystar.default_impl import *
+
+
+START, GOAL = {"HasDirtyDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 30}
+
+
+def assert_partial_plan(raw_map, error):
+    cost, path = error.best_partial_plan
+
+    assert path[0].to_dict() == START
+    assert all(action in raw_map for action in path[1:])
+    assert cost >= sum(raw_map[action][0] for action in path[1:])
+
+
+def test_search_budget():
+    budget = SearchBudget(cutoff_iter=10, max_generated=100)
+    assert budget.exceeded(5, 50) is None
+    assert budget.exceeded(10, 50) == "within 10 iterations"
+    assert budget.exceeded(5, 100) == "within 100 generated nodes"
+
+    assert SearchBudget(deadline=time.monotonic()).exceeded(0) == "before the deadline"
+    assert SearchBudget().exceeded(10 ** 9, 10 ** 9) is None
+
+    with pytest.raises(NoPathError) as excinfo:
+        budget.check(10, 50, queue_size=3, best_partial_plan=lambda: (1, ["start"]))
+
+    assert excinfo.value.best_partial_plan == (1, ["start"])
+    assert excinfo.value.stats["iterations"] == 10
+    assert excinfo.value.stats["generated"] == 50
+    assert excinfo.value.stats["queue_size"] == 3
+    assert excinfo.value.stats["elapsed"] >= 0
+
+
+@pytest.mark.parametrize("astar", (False, True))
+def test_find_plan_cutoff_carries_stats(astar, callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+    callbacks = callback_kwargs(raw_map, goal_measure=no_goal_heuristic)
+
+    with pytest.raises(NoPathError) as excinfo:
+        goap.find_plan(START, GOAL, cutoff_iter=20, astar=astar, **callbacks)
+
+    error = excinfo.value
+    assert str(error) == "Path not found within 20 iterations!"
+    assert error.stats["iterations"] == 20
+    assert error.stats["generated"] > 0
+    assert_partial_plan(raw_map, error)
+
+
+def test_find_plan_max_generated(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+    callbacks = callback_kwargs(raw_map, goal_measure=no_goal_heuristic)
+
+    with pytest.raises(NoPathError) as excinfo:
+        goap.find_plan(START, GOAL, cutoff_iter=None, max_generated=50, astar=True, **callbacks)
+
+    error = excinfo.value
+    assert str(error) == "Path not found within 50 generated nodes!"
+    assert error.stats["generated"] >= 50
+    assert error.stats["iterations"] < 50
+    assert_partial_plan(raw_map, error)
+
+    cost, _ = goap.find_plan(START, GOAL, cutoff_iter=None, max_generated=10000, astar=True, **callbacks)
+    assert cost == 9
+
+
+def test_find_plan_deadline(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+    callbacks = callback_kwargs(raw_map, goal_measure=no_goal_heuristic)
+
+    with pytest.raises(NoPathError) as excinfo:
+        goap.find_plan(START, GOAL, cutoff_iter=None, deadline=time.monotonic(), **callbacks)
+
+    assert str(excinfo.value) == "Path not found before the deadline!"
+    assert excinfo.value.stats["iterations"] == 2
+
+    cost, _ = goap.find_plan(START, GOAL, deadline=time.monotonic() + 60, astar=True, **callbacks)
+    assert cost == 9
+
+
+def test_siblings_honor_budgets(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+    callbacks = callback_kwargs(raw_map, goal_measure=no_goal_heuristic)
+    expired = time.monotonic()
+
+    with pytest.raises(NoPathError):
+        interruptable.find_plan(START, GOAL, deadline=expired, **callbacks)
+
+    with pytest.raises(NoPathError):
+        interruptable.find_plan(START, GOAL, max_generated=10, **callbacks)
+
+    with pytest.raises(NoPathError) as excinfo:
+        interruptable.find_plan_anytime(START, GOAL, max_generated=10, **callbacks)
+    assert_partial_plan(raw_map, excinfo.value)
+
+    solver_kwargs = dict(callbacks, handle_backtrack_node=lambda node: None, max_generated=10)
+    solve = cacheable.cacheable_solver(**solver_kwargs)
+    with pytest.raises(NoPathError):
+        solve(START, GOAL)
+
+    solve = cacheable.cacheable_solver(handle_backtrack_node=lambda node: None, **callbacks)
+    with pytest.raises(NoPathError):
+        solve(START, GOAL, deadline=expired)
+
+    with pytest.raises(NoPathError):
+        FancyActionGraphGOAP(ActionGraph(raw_map), max_generated=10).find_plan(START, GOAL)
+
+    with pytest.raises(NoPathError):
+        FancyActionGraphGOAP(ActionGraph(raw_map)).find_plan(START, GOAL, deadline=expired)
+
+    with pytest.raises(NoPathError) as excinfo:
+        regression.find_plan(START, GOAL, raw_map, max_generated=10)
+    assert excinfo.value.best_partial_plan is None
+    assert excinfo.value.stats["generated"] >= 10
+
+    with pytest.raises(NoPathError):
+        regression.find_plan(START, GOAL, raw_map, deadline=expired)
+
+
+@pytest.mark.parametrize("batch_size", (1, 4))
+def test_vectorized_budgets(batch_size):
+    pytest.importorskip("numpy")
+    raw_map = load_map_json("debug_complex")
+
+    with pytest.raises(NoPathError) as excinfo:
+        vectorized.find_plan(START, GOAL, raw_map, max_generated=10, batch_size=batch_size)
+    assert_partial_plan(raw_map, excinfo.value)
+
+    with pytest.raises(NoPathError):
+        vectorized.find_plan(START, GOAL, raw_map, deadline=time.monotonic(), batch_size=batch_size)
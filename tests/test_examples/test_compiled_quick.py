@@ -0,0 +1,112 @@
+import pytest
+
+from src.goapystar.impls import cacheable, goap, interruptable
+from src.goapystar.maputils import load_map_json
+from src.goapystar.measures import no_goal_heuristic
+from src.goapystar.usecases.actiongraph.compiled import compile_domain
+from src.goapystar.default_impl import *
+
+
+CASES = (
+    ("debug_only", {}, {"Debug": 1}, 10, 20),
+    ("fed_only", {}, {"Fed": 1}, 100, 200),
+    ("debug_complex", {"HasDirtyDishes": 1}, {"Fed": 1}, 200, 200),
+    ("complex_nodebug", {"HasDirtyDishes": 1}, {"Rested": 10}, 300, 200),
+    ("complex_nodebug", {}, {"Money": 50}, 200, 200),
+    ("complex_sleepless", {}, {"Money": 30, "Rested": 5}, 500, 500),
+    ("debug_complex", {"HasCleanDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 10}, 600, 5000),
+)
+
+
+@pytest.mark.parametrize(("mapname", "start", "goal", "maxiters", "maxheap"), CASES)
+def test_compiled_matches_uncompiled(mapname, start, goal, maxiters, maxheap):
+    raw_map = load_map_json(mapname)
+    domain = compile_domain(raw_map)
+
+    ref_cost, ref_path = goap.find_plan(
+        start_pos=start,
+        goal=goal,
+        adjacency_gen=get_actions(raw_map),
+        preconditions_check=preconds_checker_for(raw_map),
+        neighbor_measure=neighbor_measure(raw_map),
+        goal_measure=no_goal_heuristic,
+        goal_check=goal_checker_for(raw_map),
+        get_effects=get_effects(raw_map),
+        cutoff_iter=maxiters,
+        max_queue_size=maxheap,
+    )
+
+    cost, path = goap.find_plan(
+        start_pos=domain.compile_state(start),
+        goal=domain.compile_goal(goal),
+        adjacency_gen=domain.get_actions(),
+        preconditions_check=domain.preconds_checker(),
+        neighbor_measure=domain.neighbor_measure(),
+        goal_measure=no_goal_heuristic,
+        goal_check=domain.goal_checker(),
+        get_effects=domain.get_effects(),
+        cutoff_iter=maxiters,
+        max_queue_size=maxheap,
+    )
+
+    print("")
+    print("COST:", cost)
+
+    decoded = domain.decode_plan(path)
+    assert decoded[1:] == ref_path[1:]
+    assert decoded[0] == {**{key: 0 for key in domain.keys}, **start}
+    assert cost == ref_cost
+
+
+@pytest.mark.parametrize(("mapname", "start", "goal", "maxiters", "maxheap"), CASES[:3])
+def test_compiled_runs_on_other_planners(mapname, start, goal, maxiters, maxheap):
+    raw_map = load_map_json(mapname)
+    domain = compile_domain(raw_map)
+
+    callbacks = dict(
+        adjacency_gen=domain.get_actions(),
+        preconditions_check=domain.preconds_checker(),
+        handle_backtrack_node=lambda node: None,
+        neighbor_measure=domain.neighbor_measure(),
+        goal_measure=no_goal_heuristic,
+        goal_check=domain.goal_checker(),
+        get_effects=domain.get_effects(),
+        cutoff_iter=maxiters,
+        max_queue_size=maxheap,
+    )
+
+    solver = cacheable.cached_solver(cache_size=2, **callbacks)
+    cached_cost, cached_path = solver(domain.compile_state(start), domain.compile_goal(goal))
+
+    interrupt_cost, interrupt_path = interruptable.find_plan(
+        start_pos=domain.compile_state(start),
+        goal=domain.compile_goal(goal),
+        **callbacks
+    )
+
+    assert cached_path == interrupt_path
+    assert domain.decode_plan(cached_path)[-1] in raw_map
+
+
+def test_compile_rejects_unknown_keys():
+    domain = compile_domain(load_map_json("debug_only"))
+
+    with pytest.raises(KeyError):
+        domain.compile_state({"NotAThing": 1})
+
+    extended = compile_domain(load_map_json("debug_only"), extra_keys=("NotAThing",))
+    assert extended.decode_state(extended.compile_state({"NotAThing": 1}))["NotAThing"] == 1
+
+
+def test_compiled_states_by_name():
+    domain = compile_domain(load_map_json("debug_complex"))
+    state = domain.compile_state({"Money": 10})
+
+    # Key names aren't slots; reading them as the default would hide the mixup.
+    with pytest.raises(TypeError):
+        state.get("Money", 0)
+
+    assert state.get(len(state), 0) == 0
+    assert domain.view(state).get("Money", 0) == 10
+    assert domain.view(state).get("NotAThing", 0) == 0
+    assert dict(domain.view(domain.compile_goal({"Fed": 1}))) == {"Fed": 1}
@@ -0,0 +1,105 @@
+import pytest
+
+from src.goapystar.impls import focal, goap
+from src.goapystar.impls.common import NoPathError
+from src.goapystar.maputils import load_map_json
+from src.goapystar.usecases.actiongraph.heuristics import deficit_measure
+from src.goapystar.default_impl import *
+
+
+@pytest.mark.parametrize("use_focal", (True, False))
+@pytest.mark.parametrize("weight", (1, 1.5, 2, 3))
+@pytest.mark.parametrize("planning_case", (
+    "debug_complex:fed",
+    "complex_nodebug:rested",
+    "debug_complex:money+rested",
+    "debug_complex:fed+rested+money",
+    "complex_nodebug_workhard:fed+rested+money",
+    "complex_sleepless_workhard:money+rested",
+), indirect=True)
+def test_focal_stays_within_bound(planning_case, weight, use_focal, callback_kwargs):
+    mapname, start, goal, optimal_cost = planning_case
+    raw_map = load_map_json(mapname)
+
+    path = []
+    cost, plan, bound = focal.find_plan(
+        start, goal,
+        handle_backtrack_node=path.append,
+        goal_measure=deficit_measure(raw_map),
+        weight=weight,
+        focal=use_focal,
+        cutoff_iter=None,
+        **callback_kwargs(raw_map)
+    )
+
+    assert cost == sum(raw_map[action][0] for action in plan[1:])
+    assert path == plan
+    assert 1 <= bound <= weight
+    assert optimal_cost <= cost <= bound * optimal_cost
+
+    if weight == 1:
+        assert cost == optimal_cost
+
+
+@pytest.mark.parametrize("planning_case", (
+    "debug_complex:money+rested",
+    "debug_complex:fed+rested+money",
+    "complex_sleepless_workhard:money+rested",
+), indirect=True)
+def test_focal_expands_less(planning_case, callback_kwargs):
+    mapname, start, goal, _ = planning_case
+    raw_map = load_map_json(mapname)
+    measure = deficit_measure(raw_map)
+
+    expansions, focal_expansions, weighted_expansions = [], [], []
+    goap.find_plan(start, goal, astar=True, goal_measure=measure, cutoff_iter=None, **callback_kwargs(raw_map, expansions))
+    focal.find_plan(
+        start, goal, weight=2, goal_measure=measure, cutoff_iter=None, **callback_kwargs(raw_map, focal_expansions)
+    )
+    focal.find_plan(
+        start, goal, weight=2, focal=False, goal_measure=measure, cutoff_iter=None,
+        **callback_kwargs(raw_map, weighted_expansions)
+    )
+
+    print("")
+    print("EXPANSIONS:", len(expansions), len(focal_expansions), len(weighted_expansions))
+
+    assert len(focal_expansions) < len(expansions)
+    assert len(weighted_expansions) < len(expansions)
+
+
+def test_focal_secondary_priority(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+    start, goal = {"HasDirtyDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 30}
+
+    # Prefers the candidates furthest along their plans, rather than the ones closest to the goal.
+    cost, _, bound = focal.find_plan(
+        start, goal,
+        weight=1.5,
+        pqueue_key_func=lambda it, g, h: (g + h, -g, it),
+        goal_measure=deficit_measure(raw_map),
+        cutoff_iter=None,
+        **callback_kwargs(raw_map)
+    )
+
+    assert 9 <= cost <= bound * 9
+    assert bound <= 1.5
+
+
+def test_focal_edge_cases(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+
+    cost, path, bound = focal.find_plan({"Money": 50}, {"Money": 30}, **callback_kwargs(raw_map))
+    assert (cost, len(path), bound) == (0, 1, 1)
+
+    with pytest.raises(ValueError):
+        focal.find_plan({}, {"Money": 30}, weight=0.5, **callback_kwargs(raw_map))
+
+    with pytest.raises(NoPathError) as excinfo:
+        focal.find_plan({}, {"Money": 30, "Rested": 5}, cutoff_iter=3, **callback_kwargs(raw_map))
+
+    cost, _ = excinfo.value.continuation.resume()
+    assert cost >= 8
+
+    result = focal.maybe_find_plan({}, {"Money": 30, "Rested": 5}, cutoff_iter=3, **callback_kwargs(raw_map))
+    assert result == (float("inf"), [], float("inf"))
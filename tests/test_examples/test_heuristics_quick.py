@@ -0,0 +1,436 @@
+import pytest
+
+from src.goapystar.impls import goap
+from src.goapystar.impls.cacheable import cached_solver
+from src.goapystar.maputils import load_map_json
+from src.goapystar.state import State
+from src.goapystar.usecases.actiongraph.compiled import compile_domain
+from src.goapystar.usecases.actions import ActionGOAP
+from src.goapystar.usecases.actiongraph.heuristics import (
+    LandmarkGraph,
+    PatternDatabases,
+    build_pattern_databases,
+    cached_pattern_databases,
+    load_pattern_databases,
+    pattern_database_measure,
+    RelaxedDomain,
+    best_rates,
+    deficit_measure,
+    hadd_measure,
+    hmax_measure,
+    landmark_measure,
+    relaxed_measure,
+    relaxed_plan_measure,
+)
+from src.goapystar.default_impl import *
+
+
+# The last one is too big for the blind reference searches, so those stick to CASES[:5].
+CASES = (
+    "debug_complex:fed",
+    "complex_nodebug:rested",
+    "complex_sleepless:money",
+    "complex_nodebug_workhard:fed+rested+money",
+    "debug_complex:money+rested",
+    "debug_complex:money+rested+debug",
+)
+
+
+@pytest.mark.parametrize("planning_case", CASES, indirect=True)
+def test_relaxed_heuristics_find_plans_faster(planning_case, run_plan):
+    mapname, start, goal, _ = planning_case
+    raw_map = load_map_json(mapname)
+
+    hmax_cost, hmax_path, hmax_expansions = run_plan(raw_map, start, goal, hmax_measure(raw_map))
+    hadd_cost, hadd_path, hadd_expansions = run_plan(raw_map, start, goal, hadd_measure(raw_map))
+    plan_cost, plan_path, plan_expansions = run_plan(raw_map, start, goal, relaxed_plan_measure(raw_map))
+
+    print("")
+    print("EXPANSIONS:", hmax_expansions, hadd_expansions, plan_expansions)
+
+    # h_max is admissible, so it's as good as it gets; the others are allowed to be a bit worse.
+    assert hmax_cost <= hadd_cost
+    assert hmax_cost <= plan_cost
+    assert plan_expansions <= hmax_expansions
+    assert hadd_expansions <= hmax_expansions
+
+
+@pytest.mark.parametrize("planning_case", CASES[:5], indirect=True)
+def test_hmax_is_optimal(planning_case, run_plan):
+    mapname, start, goal, _ = planning_case
+    raw_map = load_map_json(mapname)
+
+    ref_cost, _, ref_expansions = run_plan(raw_map, start, goal)
+    cost, _, expansions = run_plan(raw_map, start, goal, hmax_measure(raw_map))
+
+    assert cost == ref_cost
+    assert expansions <= ref_expansions
+
+
+def test_hmax_does_not_double_count_self_supporting_actions(run_plan):
+    # B covers A's precondition and chips away at X itself; counting both in full overshoots the B x5, A plan.
+    raw_map = {
+        "A": [1, {"Y": 5}, {"X": 5}],
+        "B": [1, {}, {"X": 1, "Y": 1}],
+        "C": [6.5, {}, {"X": 10}],
+    }
+    start, goal = {}, {"X": 10}
+
+    ref_cost, _, _ = run_plan(raw_map, start, goal)
+    cost, path, _ = run_plan(raw_map, start, goal, hmax_measure(raw_map))
+
+    assert hmax_measure(raw_map)(start, State(**goal)) <= ref_cost == 6
+    assert cost == ref_cost
+    assert path[1:] == ["B"] * 5 + ["A"]
+
+
+def test_relaxed_estimates():
+    raw_map = load_map_json("debug_complex")
+    goal = State(Money=30, Rested=5)
+    domain = RelaxedDomain(raw_map, goal)
+
+    start = domain.project({})
+    done = domain.project({"Money": 30, "Rested": 5})
+
+    assert domain.h_add(done) == domain.h_max(done) == domain.relaxed_plan_cost(done) == 0
+    assert 0 < domain.h_max(start) <= domain.relaxed_plan_cost(start) <= domain.h_add(start)
+
+    unreachable = RelaxedDomain(raw_map, State(NoSuchThing=1))
+    assert unreachable.h_add(unreachable.project({})) == float("inf")
+    assert unreachable.relaxed_plan_cost(unreachable.project({})) == float("inf")
+
+
+def test_relaxed_measure_needs_states():
+    raw_map = load_map_json("debug_complex")
+    measure = relaxed_measure(raw_map)
+
+    with pytest.raises(TypeError):
+        measure("Work", State(Money=1))
+
+    with pytest.raises(ValueError):
+        relaxed_measure(raw_map, variant="nope")
+
+
+def test_relaxed_measure_plugs_into_other_planners(run_plan):
+    raw_map = load_map_json("debug_complex")
+    start, goal = {}, {"Money": 20, "Rested": 4, "Debug": 2}
+
+    ref_cost, ref_path, _ = run_plan(raw_map, start, goal, hmax_measure(raw_map))
+
+    solver = cached_solver(
+        adjacency_gen=get_actions(raw_map),
+        preconditions_check=preconds_checker_for(raw_map),
+        handle_backtrack_node=lambda node: None,
+        neighbor_measure=neighbor_measure(raw_map),
+        goal_measure=hmax_measure(raw_map),
+        goal_check=goal_checker_for(raw_map),
+        get_effects=get_effects(raw_map),
+        cutoff_iter=500,
+        astar=True,
+    )
+    cost, path = solver(start_pos=start, goal=goal)
+    assert cost == ref_cost
+
+    classy_planner = ActionGOAP(raw_map, goal_measure=hmax_measure(raw_map), astar=True, cutoff_iter=500)
+    cost, path = classy_planner(start_pos=start, goal=goal)
+    assert cost == ref_cost
+
+
+@pytest.mark.parametrize("planning_case", CASES + ("complex_sleepless:lots_of_money",), indirect=True)
+def test_deficit_heuristic_is_admissible_and_faster(planning_case, run_plan):
+    mapname, start, goal, _ = planning_case
+    raw_map = load_map_json(mapname)
+
+    ref_cost, _, ref_expansions = run_plan(raw_map, start, goal, hmax_measure(raw_map), cutoff_iter=20000)
+    cost, _, expansions = run_plan(raw_map, start, goal, deficit_measure(raw_map), cutoff_iter=20000)
+    greedy_cost, _, greedy_expansions = run_plan(raw_map, start, goal, deficit_measure(raw_map, combine="sum"))
+
+    print("")
+    print("EXPANSIONS:", expansions, greedy_expansions)
+
+    assert cost == ref_cost
+    assert greedy_cost >= ref_cost
+    assert greedy_expansions <= expansions
+
+
+def test_deficit_numerically_obvious_goal(run_plan):
+    raw_map = load_map_json("complex_sleepless")
+    goal = {"Money": 500}
+
+    cost, path, expansions = run_plan(raw_map, {}, goal, deficit_measure(raw_map), cutoff_iter=200)
+
+    assert cost == 51
+    assert expansions <= len(path)
+
+
+def test_deficit_estimates():
+    raw_map = load_map_json("complex_sleepless")
+    rates = best_rates(raw_map)
+    measure = deficit_measure(raw_map)
+    greedy_measure = deficit_measure(raw_map, combine="sum")
+    goal = State(Money=30, Fed=1)
+
+    money_estimate = 30 * rates["Money"]
+    fed_estimate = 1 * rates["Fed"]
+
+    assert measure({}, goal) == max(money_estimate, fed_estimate)
+    assert greedy_measure({}, goal) == money_estimate + fed_estimate
+    assert measure({"Money": 40, "Fed": 1}, goal) == 0
+    assert measure({}, State(NoSuchThing=1)) == float("inf")
+
+    with pytest.raises(ValueError):
+        deficit_measure(raw_map, combine="nope")
+
+
+def test_landmark_extraction():
+    raw_map = load_map_json("complex_nodebug")
+    graph = LandmarkGraph(raw_map, State(Fed=1), initial={"HasDirtyDishes": 1})
+    index = {landmark: idx for (idx, landmark) in enumerate(graph.landmarks)}
+
+    # Fed needs Eat, which needs food and clean dishes; food needs Shopping, which needs Money.
+    assert {("Fed", 1), ("HasFood", 1), ("HasCleanDishes", 1), ("Money", 10)} <= set(graph.landmarks)
+    assert ("HasDirtyDishes", 1) in graph.landmarks
+    assert graph.successor_masks[index[("HasFood", 1)]] & (1 << index[("Fed", 1)])
+    assert graph.successor_masks[index[("Money", 10)]] & (1 << index[("HasFood", 1)])
+    assert graph.goal_mask == 1 << index[("Fed", 1)]
+
+    nothing_reached = graph.estimate(0, 0)
+    all_reached = graph.estimate(graph.all_mask, graph.all_mask)
+    assert nothing_reached == sum(graph.weights)
+    assert all_reached == 0
+
+    # Without any dirty dishes to wash, there's no way to get clean ones, so no way to Eat.
+    dead_end = LandmarkGraph(raw_map, State(Fed=1), initial={})
+    assert dead_end.estimate(0, 0) == float("inf")
+
+    # Reached Fed, but then it got undone - it's a goal, so it's needed again.
+    fed_bit = 1 << index[("Fed", 1)]
+    assert graph.estimate(graph.all_mask, graph.all_mask & ~fed_bit) == graph.weights[index[("Fed", 1)]]
+
+
+@pytest.mark.parametrize(("mapname", "start", "goal"), (
+    ("debug_complex", {"HasDirtyDishes": 1}, {"Fed": 1}),
+    ("complex_nodebug_workhard", {"HasCleanDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 10}),
+    ("debug_complex", {"HasCleanDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 10}),
+))
+def test_landmark_count_multigoal(mapname, start, goal, run_plan):
+    raw_map = load_map_json(mapname)
+
+    ref_cost, _, ref_expansions = run_plan(raw_map, start, goal)
+    cost, _, expansions = run_plan(raw_map, start, goal, landmark_measure(raw_map))
+    admissible_cost, _, admissible_expansions = run_plan(raw_map, start, goal, landmark_measure(raw_map, admissible=True))
+
+    print("")
+    print("EXPANSIONS:", ref_expansions, expansions, admissible_expansions)
+
+    assert admissible_cost == ref_cost
+    assert cost >= ref_cost
+    assert expansions * 3 < ref_expansions
+    assert admissible_expansions * 3 < ref_expansions
+
+
+def test_landmark_measure_tracks_nodes_incrementally():
+    raw_map = load_map_json("complex_nodebug")
+    measure = landmark_measure(raw_map)
+    goal = State(Fed=1)
+    root = State.fromdict({"Money": 10, "HasCleanDishes": 1}, name="START")
+
+    shopped = {"HasFood": 1, "Money": 0, "HasCleanDishes": 1}
+    after_shopping = measure.measure_successor(shopped, goal, parent=root, action="Shop")
+
+    # Spending the Money undid that landmark, but we already got the food it was needed for.
+    assert after_shopping == measure.graph.weights[measure.graph.landmarks.index(("Fed", 1))]
+
+    # Without the path, it looks like the Money still needs getting.
+    assert measure(shopped, goal) >= after_shopping
+
+
+def test_landmark_measure_starts_from_the_start_state(run_plan):
+    raw_map = load_map_json("complex_nodebug")
+    goal = State(Fed=1)
+    start = State.fromdict({"Money": 10, "HasCleanDishes": 1}, name="START")
+
+    # There are no dirty dishes to wash, so seen from an empty start, Fed would look unreachable.
+    seeded = LandmarkGraph(raw_map, goal, initial=start)
+    true_now = seeded.true_mask(start)
+    assert landmark_measure(raw_map)(start, goal) == seeded.estimate(true_now, true_now) < float("inf")
+
+    ref_cost, _, _ = run_plan(raw_map, start, goal)
+    cost, _, _ = run_plan(raw_map, start, goal, landmark_measure(raw_map, admissible=True))
+    assert cost == ref_cost == 2
+
+    # Nothing carries over between searches, even for the same goal - the last one's paths don't matter anymore.
+    measure = landmark_measure(raw_map)
+    _, path, _ = run_plan(raw_map, {"HasDirtyDishes": 1}, goal, measure)
+
+    # Picks up right before the last step of that plan - a state the previous search has been through already.
+    last_step = {"HasDirtyDishes": 1}
+    for action in path[1:-1]:
+        for (key, value) in raw_map[action][2].items():
+            last_step[key] = last_step.get(key, 0) + value
+
+    last_step = State.fromdict(last_step)
+    run_plan(raw_map, last_step, goal, measure)
+    assert measure(last_step, goal) == landmark_measure(raw_map)(last_step, goal) == raw_map[path[-1]][0]
+
+
+PDB_CAPS = {"Money": 30, "Rested": 10}
+
+
+@pytest.mark.parametrize("planning_case", CASES[:5], indirect=True)
+def test_pattern_databases_are_admissible(planning_case, run_plan):
+    mapname, start, goal, _ = planning_case
+    raw_map = load_map_json(mapname)
+    pdbs = build_pattern_databases(raw_map, caps=PDB_CAPS)
+
+    ref_cost, _, ref_expansions = run_plan(raw_map, start, goal)
+    cost, _, expansions = run_plan(raw_map, start, goal, pattern_database_measure(pdbs))
+
+    print("")
+    print("EXPANSIONS:", ref_expansions, expansions)
+
+    assert cost == ref_cost
+    assert expansions <= ref_expansions
+
+
+def test_pattern_database_lookups():
+    raw_map = load_map_json("debug_complex")
+    pdbs = build_pattern_databases(raw_map, patterns=[("Money", "Rested")], caps=PDB_CAPS)
+    estimate = pdbs.estimator(State(Money=30, Rested=5))
+
+    # Work is the only way to Money, and needs Rested; with Fed projected away, one Sleep covers that.
+    assert estimate({"Money": 30, "Rested": 5}) == 0
+    assert estimate({"Money": 100, "Rested": 50}) == 0
+    assert estimate({"Money": 20, "Rested": 5}) == 1
+    assert estimate({}) == 4
+
+    # Nothing increases Unobtainium, so no plan can ever get it.
+    unreachable = build_pattern_databases(raw_map, patterns=[("Money", "Unobtainium")], caps=PDB_CAPS)
+    assert unreachable.estimator(State(Unobtainium=1))({}) == float("inf")
+    assert unreachable.estimator(State(Money=20))({}) == 2
+
+    with pytest.raises(ValueError):
+        build_pattern_databases(raw_map, patterns=[("Money", "Rested")], caps={"Money": 1000}, max_states=100)
+
+
+def test_pattern_databases_follow_the_goals():
+    raw_map = load_map_json("debug_complex")
+    pdbs = build_pattern_databases(raw_map, patterns=[("Money", "Rested")])
+    database = pdbs.databases[0]
+    goal = State(Money=50, Rested=5)
+
+    # Nothing gets solved until a goal asks for it - then only that goal's row does.
+    assert database.caps[0] < 50
+    assert database.rows == {}
+
+    # Past the default cap, so that gets raised to cover it: Idle once, then Work five times.
+    assert pdbs.estimator(goal)({}) == 6
+    assert pdbs.databases[0].caps == (50, 5)
+    assert len(pdbs.databases[0].rows) == 1
+
+    # If raising the cap would take too many states, the goal gets capped instead -
+    # that's less informative, but still a lower bound.
+    capped = build_pattern_databases(raw_map, patterns=[("Money", "Rested")], max_states=database.num_states)
+    assert capped.estimator(goal)({}) < 6
+    assert capped.databases[0].caps == database.caps
+
+    # Goals passed in up front are covered by the caps, and solved right away.
+    prepared = build_pattern_databases(raw_map, patterns=[("Money", "Rested")], goals=[goal])
+    assert prepared.databases[0].caps == (50, 5)
+    assert len(prepared.databases[0].rows) == 1
+    assert prepared.estimator(goal)({}) == 6
+
+
+def test_pattern_databases_round_non_integer_states_optimistically(run_plan):
+    raw_map = {
+        "Work": [1, {"Rested": 1.5}, {"Money": 1}],
+        "Sleep": [1, {}, {"Rested": 1}],
+    }
+    pdbs = build_pattern_databases(raw_map, patterns=[("Money", "Rested")])
+    goal = State(Money=1)
+
+    # Already Rested enough to Work; truncating to Rested=1 used to charge for a Sleep on top.
+    start = {"Money": 0, "Rested": 1.7}
+    cost, _, _ = run_plan(raw_map, start, goal)
+    assert cost == 1
+    assert pdbs.estimator(goal)(start) == 1
+
+    # Same for goals in between abstract values - rounding them up would ask for more than they do.
+    start, goal = {"Money": -0.5, "Rested": 2}, State(Money=0.2)
+    cost, _, _ = run_plan(raw_map, start, goal)
+    assert pdbs.estimator(goal)(start) <= cost == 1
+
+
+def test_pattern_databases_cached_to_disk(tmp_path, run_plan):
+    raw_map = load_map_json("debug_complex")
+    directory = str(tmp_path)
+
+    pdbs = cached_pattern_databases("debug_complex", directory=directory, caps=PDB_CAPS)
+    assert (tmp_path / "debug_complex.pdb.json").exists()
+
+    loaded = load_pattern_databases("debug_complex", directory=directory)
+    assert isinstance(loaded, PatternDatabases)
+    assert loaded.fingerprint == pdbs.fingerprint
+    assert loaded.to_dict() == pdbs.to_dict()
+
+    goal = State(Fed=1, Money=10, Rested=10)
+    # Rows for goals passed in get saved along with the rest.
+    prepared_dir = tmp_path / "prepared"
+    prepared_dir.mkdir()
+    prepared = cached_pattern_databases("debug_complex", directory=str(prepared_dir), goals=[goal])
+    reloaded = load_pattern_databases("debug_complex", directory=str(prepared_dir))
+    assert all(database.rows for database in reloaded.databases)
+    assert reloaded.to_dict() == prepared.to_dict()
+
+    state = {"HasCleanDishes": 1}
+    assert loaded.estimator(goal)(state) == pdbs.estimator(goal)(state)
+
+    # Same parameters - served from the file; different ones - rebuilt and resaved.
+    assert cached_pattern_databases("debug_complex", directory=directory, caps=PDB_CAPS).fingerprint == pdbs.fingerprint
+    rebuilt = cached_pattern_databases("debug_complex", directory=directory, caps={"Money": 20})
+    assert rebuilt.fingerprint != pdbs.fingerprint
+    assert load_pattern_databases("debug_complex", directory=directory).fingerprint == rebuilt.fingerprint
+
+    measure = pattern_database_measure("debug_complex", directory=directory, caps={"Money": 20})
+    cost, _, _ = run_plan(raw_map, {"HasDirtyDishes": 1}, {"Fed": 1}, measure)
+    assert cost == 5
+
+
+COMPILED_MEASURES = (
+    lambda raw_map, mapobj: deficit_measure(mapobj),
+    lambda raw_map, mapobj: hadd_measure(mapobj),
+    lambda raw_map, mapobj: hmax_measure(mapobj),
+    lambda raw_map, mapobj: relaxed_plan_measure(mapobj),
+    lambda raw_map, mapobj: landmark_measure(mapobj),
+    lambda raw_map, mapobj: pattern_database_measure(
+        build_pattern_databases(raw_map, caps=PDB_CAPS),
+        domain=mapobj if not isinstance(mapobj, dict) else None,
+    ),
+)
+
+
+@pytest.mark.parametrize("make_measure", COMPILED_MEASURES)
+def test_heuristics_on_compiled_domains(make_measure, run_plan):
+    raw_map = load_map_json("debug_complex")
+    domain = compile_domain(raw_map)
+    start, goal = {"HasDirtyDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 30}
+
+    ref_cost, ref_path, _ = run_plan(raw_map, start, goal, make_measure(raw_map, raw_map))
+
+    cost, path = goap.find_plan(
+        start_pos=domain.compile_state(start),
+        goal=domain.compile_goal(goal),
+        adjacency_gen=domain.get_actions(),
+        preconditions_check=domain.preconds_checker(),
+        neighbor_measure=domain.neighbor_measure(),
+        goal_measure=make_measure(raw_map, domain),
+        goal_check=domain.goal_checker(),
+        get_effects=domain.get_effects(),
+        cutoff_iter=5000,
+        astar=True,
+    )
+    assert cost == ref_cost == sum(raw_map[action][0] for action in domain.decode_plan(path)[1:])
+
+    # Built from the plain action map, it can't tell what the slots are - better to say so than to guess.
+    with pytest.raises(TypeError):
+        make_measure(raw_map, raw_map)(domain.compile_state(start), domain.compile_goal(goal))
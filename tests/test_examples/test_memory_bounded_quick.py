@@ -0,0 +1,116 @@
+import tracemalloc
+
+import pytest
+
+from src.goapystar.impls import goap, memory_bounded
+from src.goapystar.impls.common import EmptyQueueError, NoPathError
+from src.goapystar.maputils import load_map_json
+from src.goapystar.measures import no_goal_heuristic
+from src.goapystar.usecases.actiongraph.heuristics import deficit_measure
+from src.goapystar.default_impl import *
+
+
+def peak_memory(func, *args, **kwargs):
+    tracemalloc.start()
+
+    try:
+        result = func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+
+    finally:
+        tracemalloc.stop()
+
+    return result, peak
+
+
+@pytest.mark.parametrize("with_heuristic", (False, True))
+def test_ida_finds_optimal_plans(planning_case, with_heuristic, callback_kwargs):
+    mapname, start, goal, optimal_cost = planning_case
+    raw_map = load_map_json(mapname)
+
+    path = []
+    cost, plan = memory_bounded.find_plan(
+        start, goal,
+        handle_backtrack_node=path.append,
+        goal_measure=deficit_measure(raw_map) if with_heuristic else None,
+        cutoff_iter=20000,
+        max_cache_size=100,
+        **callback_kwargs(raw_map)
+    )
+
+    assert cost == optimal_cost
+    assert cost == sum(raw_map[action][0] for action in plan[1:])
+    assert path == plan
+
+
+def test_ida_beats_the_beam_on_sleepless(callback_kwargs):
+    # A beam small enough to keep memory in check throws away the cheap plans here...
+    raw_map = load_map_json("complex_sleepless_workhard")
+    start, goal = {}, {"Money": 30, "Rested": 5}
+
+    beam_cost, _ = goap.find_plan(
+        start, goal,
+        goal_measure=no_goal_heuristic,
+        cutoff_iter=4500,
+        max_queue_size=2000,
+        **callback_kwargs(raw_map)
+    )
+
+    # ...while IDA* doesn't keep a queue at all, and still gets the optimal one.
+    cost, _ = memory_bounded.find_plan(start, goal, cutoff_iter=None, max_cache_size=100, **callback_kwargs(raw_map))
+
+    assert cost == 11 < beam_cost
+
+
+def test_ida_uses_less_memory(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+    start, goal = {"HasDirtyDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 30}
+
+    (cost, _), peak = peak_memory(
+        memory_bounded.find_plan, start, goal, cutoff_iter=None, max_cache_size=1000, **callback_kwargs(raw_map)
+    )
+    (ref_cost, _), ref_peak = peak_memory(
+        goap.find_plan, start, goal, cutoff_iter=None, astar=True, **callback_kwargs(raw_map)
+    )
+
+    print("")
+    print("PEAK MEMORY:", ref_peak, peak)
+
+    assert cost == ref_cost == 9
+    assert peak < 0.5 * ref_peak
+
+
+def test_ida_cache_size(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+    start, goal = {}, {"Money": 30, "Rested": 5}
+
+    expansions, small_cache_expansions = [], []
+    cost, _ = memory_bounded.find_plan(
+        start, goal, cutoff_iter=None, max_cache_size=None, **callback_kwargs(raw_map, expansions)
+    )
+    small_cache_cost, _ = memory_bounded.find_plan(
+        start, goal, cutoff_iter=None, max_cache_size=1, **callback_kwargs(raw_map, small_cache_expansions)
+    )
+
+    # A cache too small to hold anything makes it a lot slower, but not wrong.
+    assert cost == small_cache_cost == 8
+    assert len(expansions) < len(small_cache_expansions)
+
+
+def test_ida_edge_cases(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+
+    cost, path = memory_bounded.find_plan({"Money": 50}, {"Money": 30}, **callback_kwargs(raw_map))
+    assert (cost, len(path)) == (0, 1)
+
+    with pytest.raises(EmptyQueueError):
+        memory_bounded.find_plan({}, {"Unobtainium": 1}, goal_measure=deficit_measure(raw_map), **callback_kwargs(raw_map))
+
+    with pytest.raises(NoPathError) as excinfo:
+        memory_bounded.find_plan({}, {"Money": 30, "Rested": 5}, cutoff_iter=10, **callback_kwargs(raw_map))
+
+    assert excinfo.value.stats["iterations"] == 10
+    assert excinfo.value.best_partial_plan is not None
+
+    result = memory_bounded.maybe_find_plan({}, {"Money": 30, "Rested": 5}, cutoff_iter=10, **callback_kwargs(raw_map))
+    assert result == (float("inf"), [])
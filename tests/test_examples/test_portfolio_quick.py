@@ -0,0 +1,106 @@
+import time
+
+import pytest
+
+from src.goapystar.impls import portfolio
+from src.goapystar.impls.common import NoPathError
+from src.goapystar.maputils import load_map_json
+from src.goapystar.measures import no_goal_heuristic
+from src.goapystar.usecases.actiongraph.heuristics import deficit_measure
+from src.goapystar.default_impl import *
+
+
+def sluggish_measure(raw_map):
+    # A heuristic that takes ages to work out - the kind of configuration a portfolio is there to cover for.
+
+    def _measure(*args, **kwargs):
+        time.sleep(0.01)
+        return no_goal_heuristic(*args, **kwargs)
+
+    return _measure
+
+
+SLUGGISH = dict(cutoff_iter=None, goal_measure_factory=sluggish_measure)
+
+
+def replay(raw_map, start, path):
+    # Checks the plan actually works, step by step; returns the state it ends up in.
+    check_preconds = preconds_checker_for(raw_map)
+    state = dict(start)
+
+    for action in path[1:]:
+        assert check_preconds(action, state)
+        for (key, value) in raw_map[action][2].items():
+            state[key] = state.get(key, 0) + value
+
+    return state
+
+
+@pytest.mark.parametrize("planning_case", (
+    "debug_complex:fed",
+    "debug_complex:money+rested",
+    "debug_complex:fed+rested+money",
+    "complex_sleepless_workhard:money+rested",
+), indirect=True)
+def test_portfolio_finds_plans(planning_case):
+    mapname, start, goal, optimal_cost = planning_case
+    raw_map = load_map_json(mapname)
+
+    cost, path, winner = portfolio.portfolio_find_plan(start, goal, mapname)
+
+    print("")
+    print("WINNER:", winner)
+
+    assert winner in portfolio.DEFAULT_PORTFOLIO
+    assert path[0].to_dict() == start
+    assert goal_checker_for(raw_map)(replay(raw_map, start, path), goal)
+    assert sum(raw_map[action][0] for action in path[1:]) >= optimal_cost
+
+
+def test_portfolio_cancels_losers():
+    start, goal = {}, {"Money": 30, "Rested": 5}
+    fast = dict(astar=True, cutoff_iter=None, goal_measure_factory=deficit_measure)
+
+    solver = portfolio.portfolio_solver("complex_sleepless_workhard", configurations=(SLUGGISH, fast))
+
+    try:
+        # Were the sluggish one left running, the second race would have to do with just one worker.
+        for _ in range(3):
+            started_at = time.monotonic()
+            cost, _, winner = solver(start, goal)
+
+            assert (cost, winner) == (11, fast)
+            assert time.monotonic() - started_at < 10
+
+    finally:
+        solver.shutdown()
+
+
+def test_portfolio_with_a_raw_map():
+    raw_map = load_map_json("debug_complex")
+    start, goal = {"HasDirtyDishes": 1}, {"Fed": 1}
+
+    # With a single worker, the configurations take turns - the ones that fail make way for the next.
+    configurations = (dict(cutoff_iter=1), dict(astar=True, cutoff_iter=None))
+    cost, _, winner = portfolio.portfolio_find_plan(start, goal, raw_map, configurations=configurations, max_workers=1)
+
+    assert (cost, winner) == (5, configurations[1])
+
+
+def test_portfolio_failures():
+    start, goal = {}, {"Money": 30, "Rested": 5}
+
+    with pytest.raises(NoPathError):
+        portfolio.portfolio_find_plan(start, goal, "debug_complex", configurations=(dict(cutoff_iter=1), dict(cutoff_iter=2)))
+
+    with pytest.raises(NoPathError):
+        portfolio.portfolio_find_plan(
+            start, goal, "complex_sleepless_workhard", configurations=(SLUGGISH,), deadline=time.monotonic() + 0.2
+        )
+
+    with pytest.raises(ValueError):
+        portfolio.portfolio_solver("debug_complex", configurations=())
+
+    # A broken configuration is a bug, not a lost race.
+    with pytest.raises(TypeError):
+        portfolio.portfolio_find_plan(start, goal, "debug_complex", configurations=(dict(no_such_option=1),))
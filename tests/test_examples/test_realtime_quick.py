@@ -0,0 +1,111 @@
+import time
+
+import pytest
+
+from src.goapystar.impls import realtime
+from src.goapystar.impls.common import EmptyQueueError, apply_effects
+from src.goapystar.maputils import load_map_json
+from src.goapystar.usecases.actiongraph.heuristics import deficit_measure
+from src.goapystar.default_impl import *
+
+
+def run_trial(raw_map, solver, start, goal, max_steps=100):
+    # Plays the agent's part - asks for an action, does it, repeat until the goal is reached.
+    state = dict(start)
+    actions = []
+
+    while len(actions) < max_steps:
+        _, action = solver(state, goal)
+
+        if action is None:
+            break
+
+        actions.append(action)
+        state = dict(apply_effects(state, raw_map[action][2]).items())
+
+    return sum(raw_map[action][0] for action in actions), actions
+
+
+@pytest.mark.parametrize("planning_case", (
+    "debug_only:debug",
+    "fed_only:fed",
+    "debug_complex:fed",
+    "complex_nodebug:rested",
+    "debug_complex:money+rested",
+    "complex_nodebug_workhard:fed+rested+money",
+    "complex_sleepless_workhard:money+rested",
+), indirect=True)
+def test_realtime_converges_to_optimal(planning_case, callback_kwargs):
+    mapname, start, goal, optimal_cost = planning_case
+    raw_map = load_map_json(mapname)
+    solver = realtime.realtime_solver(goal_measure=deficit_measure(raw_map), lookahead=5, **callback_kwargs(raw_map))
+
+    costs = [run_trial(raw_map, solver, start, goal)[0] for _ in range(30)]
+
+    print("")
+    print("TRIAL COSTS:", costs)
+
+    # Every trial gets to the goal, and the more the agent has learned, the better it gets at it.
+    assert min(costs) >= optimal_cost
+    assert costs[-3:] == [optimal_cost] * 3
+
+
+def test_realtime_learns_across_calls(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+    start, goal = {}, {"Money": 30, "Rested": 5}
+    measure = deficit_measure(raw_map)
+    solver = realtime.realtime_solver(goal_measure=measure, lookahead=3, **callback_kwargs(raw_map))
+
+    run_trial(raw_map, solver, start, goal)
+    learned = dict(solver.heuristic_table)
+    assert learned
+
+    run_trial(raw_map, solver, start, goal)
+
+    # Learned values only ever go up - they're never less informed than what we started with.
+    assert all(solver.heuristic_table[key] >= value for (key, value) in learned.items())
+    assert solver.heuristic_table[next(iter(learned))] >= measure(start, goal)
+
+    # A fresh table is a fresh start, the same domain's table can be shared between solvers.
+    table = {}
+    first = realtime.realtime_solver(heuristic_table=table, goal_measure=measure, **callback_kwargs(raw_map))
+    second = realtime.realtime_solver(heuristic_table=table, goal_measure=measure, **callback_kwargs(raw_map))
+    first(start, goal)
+    assert second.heuristic_table is table and table
+
+
+def test_realtime_stays_within_budget(callback_kwargs):
+    raw_map = load_map_json("complex_sleepless_workhard")
+    start, goal = {}, {"Money": 30, "Rested": 5}
+
+    expansions = []
+    est_cost, action = realtime.find_next_action(start, goal, lookahead=4, **callback_kwargs(raw_map, expansions))
+    assert action in raw_map
+    assert est_cost >= 0
+    assert len(expansions) == 4
+
+    # Even with no time to think at all, we get *some* answer.
+    expansions = []
+    _, action = realtime.find_next_action(
+        start, goal, lookahead=None, deadline=time.monotonic(), **callback_kwargs(raw_map, expansions)
+    )
+    assert action in raw_map
+    assert len(expansions) == 1
+
+
+def test_realtime_edge_cases(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+
+    assert realtime.find_next_action({"Money": 50}, {"Money": 30}, **callback_kwargs(raw_map)) == (0, None)
+
+    with pytest.raises(EmptyQueueError):
+        realtime.find_next_action(
+            {}, {"Unobtainium": 1}, goal_measure=deficit_measure(raw_map), **callback_kwargs(raw_map)
+        )
+
+    # A lookahead that reaches the goal gets the whole plan's cost right.
+    est_cost, action = realtime.find_next_action(
+        {"HasDirtyDishes": 1}, {"Fed": 1}, lookahead=None, **callback_kwargs(raw_map)
+    )
+    assert est_cost == 5
+    assert action in raw_map
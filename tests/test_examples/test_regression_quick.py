@@ -0,0 +1,140 @@
+import pytest
+
+from src.goapystar.impls import regression
+from src.goapystar.impls.common import EmptyQueueError, NoPathError
+from src.goapystar.maputils import load_map_json
+from src.goapystar.state import State
+from src.goapystar.usecases.actiongraph.compiled import compile_domain
+from src.goapystar.usecases.actiongraph.heuristics import deficit_measure
+from src.goapystar.default_impl import *
+
+
+def replay_plan(raw_map, start, path):
+    state = dict(start)
+
+    for action in path[1:]:
+        cost, preconds, effects = raw_map[action]
+
+        for (key, value) in preconds.items():
+            assert state.get(key, 0) >= value, f"{action} is not applicable at this point in the plan"
+
+        for (key, value) in effects.items():
+            state[key] = state.get(key, 0) + value
+
+    return state
+
+
+def counting_measure(calls):
+
+    def _measure(start, subgoal):
+        calls.append(subgoal)
+        return 0
+
+    return _measure
+
+
+@pytest.mark.parametrize("planning_case", (
+    "debug_only:debug",
+    "fed_only:fed",
+    "debug_complex:fed",
+    "complex_nodebug:rested",
+    "debug_complex:money+rested",
+    "complex_nodebug_workhard:fed+rested+money",
+), indirect=True)
+def test_regression_finds_optimal_plans(planning_case, run_plan):
+    mapname, start, goal, optimal_cost = planning_case
+    raw_map = load_map_json(mapname)
+
+    cost, path = regression.find_plan(start, goal, raw_map, cutoff_iter=5000)
+    ref_cost, _, _ = run_plan(raw_map, start, goal, cutoff_iter=20000)
+
+    assert isinstance(path[0], State)
+    assert path[0].to_dict() == start
+
+    end_state = replay_plan(raw_map, start, path)
+    for (key, value) in goal.items():
+        assert end_state.get(key, 0) >= value
+
+    assert cost == ref_cost == optimal_cost == sum(raw_map[action][0] for action in path[1:])
+
+
+def test_regression_reachieves_keys_the_start_already_has(run_plan):
+    # Eating makes a mess, so the Clean the start already has needs redoing afterwards.
+    raw_map = {
+        "Eat": [1, {}, {"Fed": 1, "Clean": -1}],
+        "Wash": [1, {"Fed": 1}, {"Clean": 1}],
+    }
+    start, goal = {"Clean": 1}, {"Fed": 1, "Clean": 1}
+
+    cost, path = regression.find_plan(start, goal, raw_map)
+    ref_cost, ref_path, _ = run_plan(raw_map, start, goal, cutoff_iter=20000)
+
+    assert (cost, path[1:]) == (ref_cost, ref_path[1:]) == (2, ["Eat", "Wash"])
+
+
+def test_regression_with_heuristic():
+    raw_map = load_map_json("debug_complex")
+    start, goal = {}, {"Money": 30, "Rested": 5}
+
+    blind_calls, informed_calls = [], []
+    blind_cost, _ = regression.find_plan(start, goal, raw_map, goal_measure=counting_measure(blind_calls))
+
+    measure = deficit_measure(raw_map)
+    informed_cost, path = regression.find_plan(
+        start, goal, raw_map,
+        goal_measure=lambda state, subgoal: informed_calls.append(subgoal) or measure(state, subgoal),
+    )
+
+    assert blind_cost == informed_cost == 8
+    assert len(informed_calls) < len(blind_calls)
+
+
+def test_regression_ignores_irrelevant_actions(run_plan):
+    raw_map = load_map_json("debug_complex")
+    start, goal = {"HasDirtyDishes": 1}, {"Fed": 1}
+
+    # A bunch of always-applicable Actions that have nothing to do with being Fed.
+    padded_map = dict(raw_map)
+    for idx in range(4):
+        padded_map[f"Hobby{idx}"] = (1, State(), State(**{f"Hobby{idx}": 1}))
+
+    calls, padded_calls = [], []
+    cost, path = regression.find_plan(start, goal, raw_map, goal_measure=counting_measure(calls))
+    padded_cost, padded_path = regression.find_plan(start, goal, padded_map, goal_measure=counting_measure(padded_calls))
+
+    assert (cost, path) == (padded_cost, padded_path)
+    assert len(padded_calls) == len(calls)
+
+    # Progression has to try every one of them at every step.
+    _, _, expansions = run_plan(raw_map, start, goal, cutoff_iter=20000)
+    _, _, padded_expansions = run_plan(padded_map, start, goal, cutoff_iter=20000)
+    assert padded_expansions > expansions
+
+
+def test_regression_compiled_domain():
+    raw_map = load_map_json("debug_complex")
+    domain = compile_domain(raw_map)
+
+    cost, path = regression.find_plan({"HasDirtyDishes": 1}, {"Fed": 1}, domain)
+    assert cost == 5
+    assert all(action in raw_map for action in path[1:])
+
+
+def test_regression_already_satisfied():
+    raw_map = load_map_json("debug_complex")
+
+    cost, path = regression.find_plan({"Money": 50}, {"Money": 30}, raw_map)
+    assert cost == 0
+    assert len(path) == 1
+
+
+def test_regression_unreachable():
+    raw_map = load_map_json("debug_complex")
+
+    with pytest.raises(EmptyQueueError):
+        regression.find_plan({}, {"Unobtainium": 1}, raw_map)
+
+    with pytest.raises(NoPathError):
+        regression.find_plan({}, {"Debug": 2, "Money": 300}, raw_map, cutoff_iter=10)
+
+    assert regression.maybe_find_plan({}, {"Debug": 2, "Money": 300}, raw_map, cutoff_iter=10) == (float("inf"), [])
@@ -0,0 +1,164 @@
+import time
+
+import pytest
+
+from src.goapystar.impls import cacheable, goap, interruptable
+from src.goapystar.impls.common import NoPathError
+from src.goapystar.maputils import load_map_json
+from src.goapystar.measures import no_goal_heuristic
+from src.goapystar.usecases.actiongraph.goap import FancyActionGraphGOAP
+from src.goapystar.usecases.actiongraph.graph import ActionGraph
+from src.goapystar.default_impl import *
+
+
+@pytest.mark.parametrize("astar", (False, True))
+@pytest.mark.parametrize("planning_case", (
+    "debug_complex:fed+rested+money",
+    "complex_nodebug:rested",
+    "complex_nodebug_workhard:fed+rested+money",
+), indirect=True)
+def test_resume_picks_up_where_it_stopped(planning_case, astar, callback_kwargs):
+    mapname, start, goal, _ = planning_case
+    raw_map = load_map_json(mapname)
+
+    expansions = []
+    ref_cost, ref_path = goap.find_plan(
+        start, goal,
+        goal_measure=no_goal_heuristic,
+        cutoff_iter=None,
+        astar=astar,
+        **callback_kwargs(raw_map, expansions)
+    )
+
+    resumed_expansions = []
+    resumed_path = []
+    resumes = 0
+
+    try:
+        result = goap.find_plan(
+            start, goal,
+            handle_backtrack_node=resumed_path.append,
+            goal_measure=no_goal_heuristic,
+            cutoff_iter=5,
+            astar=astar,
+            **callback_kwargs(raw_map, resumed_expansions)
+        )
+
+    except NoPathError as error:
+        continuation = error.continuation
+
+        while True:
+            resumes += 1
+
+            try:
+                result = continuation.resume(extra_iters=5)
+                break
+
+            except NoPathError as next_error:
+                continuation = next_error.continuation
+
+    # Stopping and resuming doesn't lose or redo any work - it's exactly the same search as an uninterrupted one.
+    assert resumes > 0
+    assert result == (ref_cost, ref_path)
+    assert resumed_path == ref_path
+    assert len(resumed_expansions) == len(expansions)
+
+
+def test_resume_is_cheaper_than_retrying(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+    start, goal = {"HasDirtyDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 30}
+
+    retried_expansions = []
+    cutoff_iter = 4
+
+    while True:
+        try:
+            retried = goap.find_plan(
+                start, goal,
+                goal_measure=no_goal_heuristic,
+                cutoff_iter=cutoff_iter,
+                **callback_kwargs(raw_map, retried_expansions)
+            )
+            break
+
+        except NoPathError:
+            cutoff_iter *= 2
+
+    resumed_expansions = []
+
+    try:
+        resumed = goap.find_plan(
+            start, goal,
+            goal_measure=no_goal_heuristic,
+            cutoff_iter=4,
+            **callback_kwargs(raw_map, resumed_expansions)
+        )
+
+    except NoPathError as error:
+        resumed = error.continuation.resume()
+
+    print("")
+    print("EXPANSIONS:", len(retried_expansions), len(resumed_expansions))
+
+    assert resumed == retried
+    assert len(resumed_expansions) < len(retried_expansions)
+
+
+def test_resume_with_other_budgets(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+    callbacks = callback_kwargs(raw_map, goal_measure=no_goal_heuristic)
+    start, goal = {"HasDirtyDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 30}
+
+    with pytest.raises(NoPathError) as excinfo:
+        goap.find_plan(start, goal, cutoff_iter=None, max_generated=20, astar=True, **callbacks)
+
+    generated = excinfo.value.stats["generated"]
+
+    with pytest.raises(NoPathError) as next_excinfo:
+        excinfo.value.continuation.resume(extra_generated=20)
+
+    assert next_excinfo.value.stats["generated"] >= generated + 20
+
+    with pytest.raises(NoPathError) as last_excinfo:
+        next_excinfo.value.continuation.resume(deadline=time.monotonic())
+
+    cost, _ = last_excinfo.value.continuation.resume()
+    assert cost == 9
+
+
+def test_resume_only_once(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+    callbacks = callback_kwargs(raw_map, goal_measure=no_goal_heuristic)
+
+    with pytest.raises(NoPathError) as excinfo:
+        goap.find_plan({"HasDirtyDishes": 1}, {"Fed": 1}, cutoff_iter=3, **callbacks)
+
+    continuation = excinfo.value.continuation
+    cost, _ = continuation.resume()
+
+    with pytest.raises(RuntimeError):
+        continuation.resume()
+
+
+def test_siblings_are_resumable(callback_kwargs):
+    raw_map = load_map_json("debug_complex")
+    callbacks = callback_kwargs(raw_map, goal_measure=no_goal_heuristic)
+    start, goal = {"HasDirtyDishes": 1}, {"Fed": 1}
+    ref_cost, ref_path = goap.find_plan(start, goal, **callbacks)
+
+    with pytest.raises(NoPathError) as excinfo:
+        interruptable.find_plan(start, goal, cutoff_iter=3, **callbacks)
+    assert excinfo.value.continuation.resume() == (ref_cost, ref_path)
+
+    backtracked = []
+    solve = cacheable.cacheable_solver(cutoff_iter=3, handle_backtrack_node=backtracked.append, **callbacks)
+    with pytest.raises(NoPathError) as excinfo:
+        solve(start, goal)
+    assert excinfo.value.continuation.resume() == (ref_cost, ref_path)
+    assert backtracked == ref_path
+
+    graph = ActionGraph(raw_map)
+    with pytest.raises(NoPathError) as excinfo:
+        FancyActionGraphGOAP(graph, cutoff_iter=3).find_plan(start, goal)
+    cost, path = excinfo.value.continuation.resume()
+    assert graph.path == path
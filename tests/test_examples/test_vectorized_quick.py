@@ -0,0 +1,163 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.goapystar.impls import goap, vectorized
+from src.goapystar.maputils import load_map_json
+from src.goapystar.measures import no_goal_heuristic
+from src.goapystar.usecases.actiongraph.compiled import compile_domain
+from src.goapystar.default_impl import *
+
+
+@pytest.mark.parametrize(("mapname", "start", "goal", "maxiters", "maxheap"), (
+    ("debug_only", {"Debug": 1}, {"Debug": 1}, 10, 10),
+    ("debug_only", {}, {"Debug": 1}, 10, 20),
+    ("fed_only", {}, {"Fed": 1}, 100, 200),
+    ("debug_complex", {"HasDirtyDishes": 1}, {"Fed": 1}, 200, 200),
+    ("complex_nodebug", {"HasDirtyDishes": 1}, {"Rested": 10}, 300, 200),
+    ("complex_sleepless", {}, {"Money": 50}, 200, 200),
+    ("complex_nodebug", {}, {"Money": 30, "Rested": 5}, 700, 500),
+    ("complex_nodebug_workhard", {"HasCleanDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 10}, 300, 5000),
+    ("debug_complex", {}, {"Money": 30, "Rested": 5}, 4000, 3000),
+))
+def test_vectorized_matches_core(mapname, start, goal, maxiters, maxheap):
+    raw_map = load_map_json(mapname)
+
+    ref_cost, ref_path = goap.find_plan(
+        start_pos=start,
+        goal=goal,
+        adjacency_gen=get_actions(raw_map),
+        preconditions_check=preconds_checker_for(raw_map),
+        neighbor_measure=neighbor_measure(raw_map),
+        goal_measure=no_goal_heuristic,
+        goal_check=goal_checker_for(raw_map),
+        get_effects=get_effects(raw_map),
+        cutoff_iter=maxiters,
+        max_queue_size=maxheap,
+    )
+
+    cost, path = vectorized.find_plan(
+        start_pos=start,
+        goal=goal,
+        mapobj=raw_map,
+        cutoff_iter=maxiters,
+        max_queue_size=maxheap,
+    )
+
+    print("")
+    print("COST:", cost)
+
+    assert path == ref_path
+    assert cost == ref_cost
+
+
+def test_vectorized_reuses_compiled_domain():
+    raw_map = load_map_json("debug_complex")
+    vec_domain = vectorized.VectorizedDomain(compile_domain(raw_map))
+    backtracked = []
+
+    cost, path = vectorized.find_plan(
+        start_pos={},
+        goal={"Debug": 1},
+        mapobj=vec_domain,
+        handle_backtrack_node=backtracked.append,
+        cutoff_iter=1000,
+        max_queue_size=500,
+    )
+
+    assert path[1:] == ["DebugGetSimple"]
+    assert backtracked == path
+
+
+def test_vectorized_raises_when_out_of_budget():
+    raw_map = load_map_json("complex_nodebug")
+
+    with pytest.raises(vectorized.NoPathError):
+        vectorized.find_plan(start_pos={}, goal={"Money": 500}, mapobj=raw_map, cutoff_iter=20)
+
+
+def test_vectorized_keys_outside_the_domain():
+    raw_map = load_map_json("debug_complex")
+
+    # Keys no Action touches just get carried along, same as in the core planner.
+    cost, path = vectorized.find_plan(start_pos={"Foo": 1}, goal={"Money": 10}, mapobj=raw_map)
+    ref_cost, ref_path = goap.find_plan(
+        start_pos={"Foo": 1},
+        goal={"Money": 10},
+        adjacency_gen=get_actions(raw_map),
+        preconditions_check=preconds_checker_for(raw_map),
+        neighbor_measure=neighbor_measure(raw_map),
+        goal_measure=no_goal_heuristic,
+        goal_check=goal_checker_for(raw_map),
+        get_effects=get_effects(raw_map),
+    )
+    assert (cost, path[1:]) == (ref_cost, ref_path[1:])
+
+    # ...and a goal nothing can achieve is no plan, rather than an error.
+    assert vectorized.maybe_find_plan({}, {"Unobtainium": 1}, raw_map) == (float("inf"), [])
+    assert vectorized.maybe_find_plan({}, {"Unobtainium": 1}, raw_map, batch_size=4) == (float("inf"), [])
+
+
+def _replay_plan(raw_map, start, path):
+    state = dict(start)
+
+    for action in path[1:]:
+        cost, preconds, effects = raw_map[action]
+
+        for (key, value) in preconds.items():
+            assert state.get(key, 0) >= value, f"{action} is not applicable at this point in the plan"
+
+        for (key, value) in effects.items():
+            state[key] = state.get(key, 0) + value
+
+    return state
+
+
+@pytest.mark.parametrize("batch_size", (2, 8, 32))
+@pytest.mark.parametrize(("mapname", "start", "goal", "maxiters", "maxheap"), (
+    ("debug_only", {}, {"Debug": 1}, 10, 20),
+    ("debug_complex", {"HasDirtyDishes": 1}, {"Fed": 1}, 200, 200),
+    ("complex_nodebug", {}, {"Money": 30, "Rested": 5}, 700, 500),
+    ("complex_nodebug_workhard", {"HasCleanDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 10}, 300, 5000),
+    ("debug_complex", {}, {"Money": 30, "Rested": 5}, 4000, 3000),
+))
+def test_vectorized_batched_finds_valid_plans(batch_size, mapname, start, goal, maxiters, maxheap):
+    raw_map = load_map_json(mapname)
+
+    cost, path = vectorized.find_plan(
+        start_pos=start,
+        goal=goal,
+        mapobj=raw_map,
+        cutoff_iter=maxiters,
+        max_queue_size=maxheap,
+        batch_size=batch_size,
+    )
+
+    end_state = _replay_plan(raw_map, start, path)
+
+    for (key, value) in goal.items():
+        assert end_state.get(key, 0) >= value
+
+    assert cost == sum(raw_map[action][0] + 1 for action in path[1:])
+
+
+def test_vectorized_batched_start_at_goal():
+    cost, path = vectorized.find_plan(
+        start_pos={"Debug": 1},
+        goal={"Debug": 1},
+        mapobj=load_map_json("debug_only"),
+        batch_size=16,
+    )
+
+    assert cost == 0
+    assert len(path) == 1
+
+
+def test_vectorized_batched_raises_when_out_of_budget():
+    raw_map = load_map_json("complex_nodebug")
+
+    with pytest.raises(vectorized.NoPathError):
+        vectorized.find_plan(start_pos={}, goal={"Money": 500}, mapobj=raw_map, cutoff_iter=20, batch_size=8)
+
+    with pytest.raises(ValueError):
+        vectorized.find_plan(start_pos={}, goal={"Money": 1}, mapobj=raw_map, batch_size=0)
@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from src.goapystar.impls.cacheable import cached_solver
+from src.goapystar.impls.common import NoPathError
+from src.goapystar.maputils import load_map_json
+from src.goapystar.measures import no_goal_heuristic
+from src.goapystar.state import FrozenState
+from src.goapystar.default_impl import *
+
+
+def fed_only_solver():
+    raw_map = load_map_json("fed_only")
+    return cached_solver(
+        cache_size=10,
+        adjacency_gen=get_actions(raw_map),
+        preconditions_check=preconds_checker_for(raw_map),
+        handle_backtrack_node=lambda node: None,
+        neighbor_measure=neighbor_measure(raw_map),
+        goal_measure=no_goal_heuristic,
+        goal_check=goal_checker_for(raw_map),
+        get_effects=get_effects(raw_map),
+        cutoff_iter=100,
+    )
+
+
+def test_cached_solver_accepts_dicts_and_hits_cache():
+    solver = fed_only_solver()
+
+    first_cost, first_path = solver(start_pos={}, goal={"Fed": 1})
+    second_cost, second_path = solver(start_pos=FrozenState(), goal=FrozenState(Fed=1))
+
+    assert first_path == second_path
+    assert first_path[1:] == ["GetFood", "Eat"]
+    assert solver.cache_info().hits == 1
+
+
+def test_cached_solver_deadline():
+    solver = fed_only_solver()
+
+    with pytest.raises(NoPathError):
+        solver(start_pos={}, goal={"Fed": 1}, deadline=time.monotonic())
+
+    # Running out of time doesn't get cached; a plan found in time does, whatever the deadline was.
+    cost, path = solver(start_pos={}, goal={"Fed": 1}, deadline=time.monotonic() + 60)
+    assert path[1:] == ["GetFood", "Eat"]
+
+    assert solver(start_pos={}, goal={"Fed": 1}, deadline=time.monotonic()) == (cost, path)
+    assert solver(start_pos={}, goal={"Fed": 1}) == (cost, path)
+    assert solver.cache_info().hits == 2
@@ -1,5 +1,11 @@
 import pytest
 from examples import reasoning
+from src.goapystar.blackboard import overlay_on
+from src.goapystar.impls.common import candidate_key
+from src.goapystar.impls.goap import find_plan
+from src.goapystar.maputils import load_map_json
+from src.goapystar.measures import no_goal_heuristic
+from src.goapystar.state import FrozenState
 
 
 @pytest.mark.parametrize(
@@ -34,3 +40,116 @@ def test_preconds(action, blackboard, expected):
     result = prec_checker(action, blackboard)
     assert result is expected
 
+
+
+def test_find_plan_accepts_frozen_states():
+    test_map = load_map_json("fed_only")
+    start = FrozenState(name="START")
+
+    cost, path = find_plan(
+        start_pos=start,
+        goal=FrozenState(Fed=1),
+        adjacency_gen=reasoning.get_actions(test_map),
+        preconditions_check=reasoning.preconds_checker_for(test_map),
+        neighbor_measure=reasoning.neighbor_measure(test_map),
+        goal_measure=no_goal_heuristic,
+        goal_check=reasoning.goal_checker_for(test_map),
+        get_effects=reasoning.get_effects(test_map),
+        cutoff_iter=100,
+    )
+
+    assert path == [start, "GetFood", "Eat"]
+
+
+def zero_goal_measure(*args, **kwargs):
+    return 0
+
+
+@pytest.mark.parametrize(("start", "goal"), (
+    ({}, {"Money": 30, "Rested": 5}),
+    ({"HasDirtyDishes": 1}, {"Fed": 1, "Rested": 10, "Money": 30}),
+))
+def test_find_plan_reports_cost_of_returned_path(start, goal, run_plan):
+    test_map = load_map_json("debug_complex")
+
+    cost, path, _ = run_plan(test_map, start, goal, zero_goal_measure, cutoff_iter=20000, astar=False)
+
+    # Used to be the cheapest cost seen for the final Action on *any* path, rather than this one.
+    assert cost == sum(test_map[action][0] for action in path[1:])
+
+
+def test_find_plan_keeps_options_past_first_expansion(run_plan):
+    test_map = load_map_json("debug_complex")
+    start, goal = {}, {"Money": 30, "Rested": 5}
+
+    iterations = set()
+
+    def _recording_key(curr_iter, cost, heuristic):
+        iterations.add(curr_iter)
+        return cost + heuristic, curr_iter
+
+    # Both used to get dropped after the first expansion.
+    run_plan(test_map, start, goal, zero_goal_measure, astar=False, pqueue_key_func=_recording_key)
+    assert len(iterations) > 1
+
+    _, _, with_table = run_plan(test_map, start, goal, zero_goal_measure, astar=False, use_transposition_table=True)
+    _, _, without_table = run_plan(test_map, start, goal, zero_goal_measure, astar=False, use_transposition_table=False)
+    assert with_table < without_table
+
+
+class CountingState(dict):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hashed = 0
+
+    def items(self):
+        self.hashed += 1
+        return super().items()
+
+
+def test_candidate_key_avoids_rehashing_states():
+    state = CountingState(Money=10, Fed=1)
+
+    # Without a transposition table, nothing is ever looked up by state, so there's no point hashing it.
+    assert candidate_key("Eat", state, 7) == ("Eat", 7)
+    assert state.hashed == 0
+
+    assert candidate_key("Eat", state, 7, set()) == candidate_key("Eat", dict(state), 8, set())
+    assert state.hashed == 1
+
+    # Overlays keep their hash up to date as they go, so that's reused as-is, table or not.
+    overlay = overlay_on({"Money": 10})
+    overlay["Fed"] = 1
+    assert candidate_key("Eat", overlay, 7) == ("Eat", overlay.as_hash())
+    assert candidate_key("Eat", overlay, 7) == candidate_key("Eat", overlay, 8, set())
+
+
+@pytest.mark.parametrize("use_transposition_table", (True, False))
+def test_astar_decreases_key_on_cheaper_path_to_queued_state(monkeypatch, run_plan, use_transposition_table):
+    from src.goapystar.impls import openlist
+
+    # Direct queues up {X: 1, Y: 0} at a cost of 5 first; A then B get to the same state for 2.
+    shortcut_map = {
+        "Direct": [5, {}, {"X": 1, "Y": 0}],
+        "A": [1, {}, {"Y": 1}],
+        "B": [1, {"Y": 1}, {"X": 1, "Y": -1}],
+        "Finish": [1, {"X": 1}, {"Z": 1}],
+    }
+
+    decreased = []
+    original_push = openlist.IndexedOpenList.push
+
+    def _spying_push(self, key, priority, item):
+        was_queued = key in self._index
+        changed = original_push(self, key, priority, item)
+        if was_queued and changed:
+            decreased.append(key)
+        return changed
+
+    monkeypatch.setattr(openlist.IndexedOpenList, "push", _spying_push)
+
+    cost, path, _ = run_plan(shortcut_map, {}, {"Z": 1}, use_transposition_table=use_transposition_table)
+
+    assert cost == 3
+    assert path[1:] == ["A", "B", "Finish"]
+    assert decreased
@@ -0,0 +1,13 @@
+from src.goapystar.impls.nodes import SearchNode
+
+
+def test_node_path_rebuilds_from_parents():
+    root = SearchNode("START")
+    shop = SearchNode("Shop", parent=root, cost=1)
+    eat = SearchNode("Eat", parent=shop, cost=2)
+    wash = SearchNode("DishWash", parent=shop, cost=2)
+
+    assert eat.path() == ["START", "Shop", "Eat"]
+    assert wash.path() == ["START", "Shop", "DishWash"]
+    assert eat.depth == 2
+    assert root.path() == ["START"]
@@ -0,0 +1,205 @@
+import random
+
+import pytest
+
+from src.goapystar.impls.openlist import IndexedOpenList, BoundedOpenList, FocalOpenList
+
+
+def test_openlist_pops_in_priority_order():
+    queue = IndexedOpenList()
+    priorities = list(range(50))
+    random.Random(1).shuffle(priorities)
+
+    for prio in priorities:
+        queue.push(f"node{prio}", prio, prio)
+
+    popped = [queue.pop()[0] for _ in range(len(priorities))]
+    assert popped == sorted(priorities)
+    assert not queue
+
+
+def test_openlist_membership():
+    queue = IndexedOpenList()
+    queue.push("a", 3, "A")
+    assert "a" in queue
+    assert "b" not in queue
+
+    queue.pop()
+    assert "a" not in queue
+
+
+def test_openlist_decrease_key():
+    queue = IndexedOpenList()
+    queue.push("a", 5, "old")
+    queue.push("b", 3, "B")
+
+    assert queue.push("a", 1, "new") is True
+    assert len(queue) == 2
+    assert queue.pop() == (1, "a", "new")
+
+
+def test_openlist_ignores_worse_duplicate():
+    queue = IndexedOpenList()
+    queue.push("a", 1, "kept")
+
+    assert queue.push("a", 2, "dropped") is False
+    assert queue.priority_of("a") == 1
+    assert queue.pop() == (1, "a", "kept")
+
+
+def test_openlist_remove_keeps_heap_valid():
+    queue = IndexedOpenList()
+    for prio in (7, 2, 9, 4, 1, 8):
+        queue.push(prio, prio, None)
+
+    queue.remove(4)
+    popped = [queue.pop()[0] for _ in range(len(queue))]
+    assert popped == [1, 2, 7, 8, 9]
+
+
+def test_bounded_openlist_evicts_worst():
+    queue = BoundedOpenList(max_size=3)
+    for prio in (5, 1, 9, 3):
+        queue.push(prio, prio, None)
+
+    assert len(queue) == 3
+    assert 9 not in queue
+    assert queue.peek_worst()[0] == 5
+
+
+def test_bounded_openlist_rejects_worse_than_worst():
+    queue = BoundedOpenList(max_size=2)
+    queue.push("a", 1, None)
+    queue.push("b", 2, None)
+
+    assert queue.push("c", 3, None) is False
+    assert "c" not in queue
+
+
+def test_bounded_openlist_matches_sorted_reference():
+    rng = random.Random(42)
+    queue = BoundedOpenList(max_size=25)
+    reference = {}
+
+    for step in range(2000):
+        roll = rng.random()
+
+        if roll < 0.6:
+            # Priorities are unique across keys, so which entry is 'the worst' is never ambiguous.
+            key = rng.randrange(60)
+            prio = rng.randrange(1000) * 100 + key
+            queue.push(key, prio, step)
+
+            if key in reference:
+                reference[key] = min(reference[key], prio)
+            else:
+                reference[key] = prio
+                if len(reference) > 25:
+                    worst = max(reference, key=reference.get)
+                    del reference[worst]
+
+        elif roll < 0.75 and reference:
+            prio, key, _ = queue.pop()
+            assert prio == min(reference.values())
+            del reference[key]
+
+        elif roll < 0.9 and reference:
+            prio, key, _ = queue.pop_worst()
+            assert prio == max(reference.values())
+            del reference[key]
+
+        elif reference:
+            key = rng.choice(sorted(reference))
+            queue.remove(key)
+            del reference[key]
+
+        assert len(queue) == len(reference)
+        assert sorted(entry[0] for entry in queue) == sorted(reference.values())
+
+    drained = []
+    while queue:
+        drained.append(queue.pop()[0])
+    assert drained == sorted(drained)
+
+
+def focal_priority(f, secondary):
+    # Shaped like the core A* mode's priorities - (priority key, cost, Action).
+    return (f, secondary), 0, None
+
+
+def test_focal_openlist_picks_by_secondary_within_range():
+    queue = FocalOpenList(weight=1.5)
+    queue.push("a", focal_priority(10, 5), "A")
+    queue.push("b", focal_priority(14, 1), "B")
+    queue.push("c", focal_priority(16, 0), "C")
+
+    # c has the best secondary priority, but 16 > 1.5 * 10, so it's out of range.
+    assert queue.min_f() == 10
+    assert queue.peek()[1] == "b"
+    assert queue.pop()[1] == "b"
+    assert queue.pop()[1] == "a"
+    assert queue.pop()[1] == "c"
+    assert not queue
+
+
+def test_focal_openlist_weight_one_is_by_f():
+    queue = FocalOpenList(weight=1)
+    for (key, f) in (("a", 3), ("b", 1), ("c", 2)):
+        queue.push(key, focal_priority(f, -f), None)
+
+    assert [queue.pop()[1] for _ in range(3)] == ["b", "c", "a"]
+
+
+def test_focal_openlist_range_shrinks():
+    queue = FocalOpenList(weight=2)
+    queue.push("a", focal_priority(10, 5), None)
+    queue.push("b", focal_priority(19, 0), None)
+    assert queue.peek()[1] == "b"
+
+    # A new lowest f means b no longer qualifies.
+    queue.push("c", focal_priority(5, 9), None)
+    assert queue.pop()[1] == "a"
+    assert queue.pop()[1] == "c"
+    assert queue.pop()[1] == "b"
+
+
+def test_focal_openlist_decrease_key_and_remove():
+    queue = FocalOpenList(weight=1.2)
+    queue.push("a", focal_priority(10, 5), "old")
+    queue.push("b", focal_priority(11, 4), "B")
+
+    assert queue.push("a", focal_priority(10, 3), "new") is True
+    assert queue.push("a", focal_priority(12, 0), "worse") is False
+    assert queue.priority_of("a") == focal_priority(10, 3)
+
+    queue.remove("b")
+    assert "b" not in queue
+    assert queue.pop() == (focal_priority(10, 3), "a", "new")
+
+    with pytest.raises(ValueError):
+        FocalOpenList(weight=0.5)
+
+
+def test_focal_openlist_matches_reference():
+    rng = random.Random(7)
+    weight = 1.5
+    queue = FocalOpenList(weight=weight)
+    reference = {}
+
+    for step in range(2000):
+        if rng.random() < 0.6 or not reference:
+            key = rng.randrange(60)
+            prio = focal_priority(rng.randrange(10, 40), (rng.randrange(20), key))
+            queue.push(key, prio, step)
+            reference[key] = min(reference.get(key, prio), prio)
+
+        else:
+            prio, key, _ = queue.pop()
+            bound = weight * min(ref_prio[0][0] for ref_prio in reference.values())
+            in_range = [ref_prio for ref_prio in reference.values() if ref_prio[0][0] <= bound]
+
+            assert prio == reference.pop(key)
+            assert prio[0][0] <= bound
+            assert prio[0][1] == min(ref_prio[0][1] for ref_prio in in_range)
+
+        assert len(queue) == len(reference)
@@ -0,0 +1,40 @@
+import pickle
+
+import pytest
+
+from src.goapystar.state import FrozenState, State, statehash
+
+
+def test_frozen_state_matches_state():
+    frozen = FrozenState.fromdict({"Money": 10, "Fed": 1}, name="START")
+    thawed = State.fromdict({"Money": 10, "Fed": 1}, name="START")
+
+    assert frozen == thawed
+    assert thawed == frozen
+    assert hash(frozen) == hash(thawed) == statehash({"Fed": 1, "Money": 10})
+    assert frozen.Money == 10
+    assert dict(frozen.items()) == thawed.to_dict()
+
+
+def test_frozen_state_is_immutable():
+    frozen = FrozenState(Money=10)
+
+    with pytest.raises(TypeError):
+        frozen.Money = 20
+
+    with pytest.raises(TypeError):
+        frozen._name = "Hacked"
+
+
+def test_frozen_state_keys_skip_no_bookkeeping():
+    frozen = FrozenState(name="START", Money=10)
+    assert list(frozen.keys()) == ["Money"]
+    assert frozen._name == "START"
+
+
+def test_frozen_state_pickles():
+    frozen = FrozenState(name="START", Money=10)
+    restored = pickle.loads(pickle.dumps(frozen))
+
+    assert restored == frozen
+    assert restored._name == "START"